@@ -1,18 +1,22 @@
 from models.autoencoder import autoencoder
 from dataHelpers import fromCsv
-import tensorflowjs as tfjs
+from modelExport import exportModels
 
 MODEL_SAVE_PATH = "../resources/models/album/"
 TRACKS_DATA_FILE = "../resources/data/album/all/data.csv"
 
 
-def main():
-    train, validation, test = fromCsv(
+def loadData():
+    return fromCsv(
         TRACKS_DATA_FILE,
         4000,
         4000,
         skipHeader=0,
     )
+
+
+def main(quantization=None, pruneFraction=0, sharedWeights=False):
+    train, validation, test = loadData()
     (
         auto,
         encoder,
@@ -28,17 +32,18 @@ def main():
         learningRate=0.001,
     )
 
-    tfjs.converters.save_keras_model(
-        auto,
-        MODEL_SAVE_PATH + 'auto',
-    )
-    tfjs.converters.save_keras_model(
-        encoder,
-        MODEL_SAVE_PATH + 'encoder',
-    )
-    tfjs.converters.save_keras_model(
-        decoder,
-        MODEL_SAVE_PATH + 'decoder',
+    exportModels(
+        {
+            MODEL_SAVE_PATH + 'auto': auto,
+            MODEL_SAVE_PATH + 'encoder': encoder,
+            MODEL_SAVE_PATH + 'decoder': decoder,
+        },
+        quantization=quantization,
+        pruneFraction=pruneFraction,
+        evaluationModel=auto,
+        evaluationFeatures=test,
+        evaluationLabels=test,
+        sharedWeights=sharedWeights,
     )
 
 
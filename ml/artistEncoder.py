@@ -1,18 +1,69 @@
+from functools import partial
 from models.autoencoder import autoencoder
+from batchSizeTuner import tuneBatchSize
 from dataHelpers import fromCsv
-import tensorflowjs as tfjs
+from modelExport import exportModels
 
 MODEL_SAVE_PATH = "../resources/models/artist/"
 TRACKS_DATA_FILE = "../resources/data/artist/all/data.csv"
+ENCODING_DIMENSION = 16
+MODEL_PARAMETERS = {
+    'activation': 'selu',
+    'batchSize': 4,
+    'epochs': 100,
+    'hiddenDimension': 22,
+    'learningRate': 0.0005,
+}
+TUNING_EPOCHS = 20
 
 
-def main():
-    train, validation, test = fromCsv(
+def loadData():
+    return fromCsv(
         TRACKS_DATA_FILE,
         2000,
         2000,
         skipHeader=0,
     )
+
+
+def tunedParameters(train, validation, batchSizes):
+    fixedParameters = {
+        name: value for name, value in MODEL_PARAMETERS.items()
+        if name not in ('batchSize', 'learningRate', 'epochs')
+    }
+    best, _ = tuneBatchSize(
+        partial(
+            autoencoder,
+            train,
+            validation,
+            ENCODING_DIMENSION,
+            **fixedParameters,
+        ),
+        validation,
+        validation,
+        len(train),
+        MODEL_PARAMETERS['batchSize'],
+        MODEL_PARAMETERS['learningRate'],
+        batchSizes=batchSizes,
+        epochs=TUNING_EPOCHS,
+    )
+    return dict(
+        MODEL_PARAMETERS,
+        batchSize=best['batchSize'],
+        learningRate=best['learningRate'],
+    )
+
+
+def main(
+    quantization=None,
+    pruneFraction=0,
+    sharedWeights=False,
+    tuneBatchSizes=None,
+):
+    train, validation, test = loadData()
+    parameters = MODEL_PARAMETERS
+    if tuneBatchSizes:
+        parameters = tunedParameters(train, validation, tuneBatchSizes)
     (
         auto,
         encoder,
@@ -20,25 +71,22 @@ def main():
     ) = autoencoder(
         train,
         validation,
-        16,
-        activation='selu',
-        batchSize=4,
-        epochs=100,
-        hiddenDimension=22,
-        learningRate=0.0005,
+        ENCODING_DIMENSION,
+        **parameters,
     )
 
-    tfjs.converters.save_keras_model(
-        auto,
-        MODEL_SAVE_PATH + 'auto',
-    )
-    tfjs.converters.save_keras_model(
-        encoder,
-        MODEL_SAVE_PATH + 'encoder',
-    )
-    tfjs.converters.save_keras_model(
-        decoder,
-        MODEL_SAVE_PATH + 'decoder',
+    exportModels(
+        {
+            MODEL_SAVE_PATH + 'auto': auto,
+            MODEL_SAVE_PATH + 'encoder': encoder,
+            MODEL_SAVE_PATH + 'decoder': decoder,
+        },
+        quantization=quantization,
+        pruneFraction=pruneFraction,
+        evaluationModel=auto,
+        evaluationFeatures=test,
+        evaluationLabels=test,
+        sharedWeights=sharedWeights,
     )
 
 
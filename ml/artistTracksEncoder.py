@@ -1,18 +1,82 @@
+from functools import partial
 from models.lstmAutoencoder import lstmAutoencoder
-from dataHelpers import fromCsvFiles
-import tensorflowjs as tfjs
+from dataHelpers import fromCsvFiles, sequencesFromCsvFiles
+from distributedTraining import trainDataParallel
+from modelExport import exportModels
 
 ARTIST_DATA_FILES = "../resources/data/artist/"
 MODEL_SAVE_PATH = "../resources/models/"
+MODEL_PARAMETERS = {
+    'sequenceLength': 5,
+    'featureCount': 13,
+    'encodingDimension': 32,
+    'hiddenDimension': 64,
+    'batchSize': 16,
+    'epochs': 4000,
+    'learningRate': 0.0002,
+}
 
 
-def main():
-    train, validation, test = fromCsvFiles(
+def loadData(variableLength=False):
+    loader = sequencesFromCsvFiles if variableLength else fromCsvFiles
+    return loader(
         ARTIST_DATA_FILES,
         2000,
         2000,
         skipHeader=0,
     )
+
+
+def saveModels(
+    auto,
+    encoder,
+    decoder,
+    evaluationData=None,
+    quantization=None,
+    pruneFraction=0,
+    sharedWeights=False,
+):
+    exportModels(
+        {
+            MODEL_SAVE_PATH + 'artist/tracks/auto': auto,
+            MODEL_SAVE_PATH + 'artist/tracks/encoder': encoder,
+            MODEL_SAVE_PATH + 'artist/tracks/decoder': decoder,
+        },
+        quantization=quantization,
+        pruneFraction=pruneFraction,
+        evaluationModel=auto,
+        evaluationFeatures=evaluationData,
+        evaluationLabels=evaluationData,
+        sharedWeights=sharedWeights,
+    )
+
+
+def main(
+    workerCount=1,
+    threadsPerWorker=0,
+    variableLength=False,
+    quantization=None,
+    pruneFraction=0,
+    sharedWeights=False,
+):
+    save = partial(
+        saveModels,
+        quantization=quantization,
+        pruneFraction=pruneFraction,
+        sharedWeights=sharedWeights,
+    )
+    if workerCount > 1:
+        trainDataParallel(
+            partial(loadData, variableLength),
+            save,
+            workerCount,
+            threadsPerWorker,
+            variableLength=variableLength,
+            **MODEL_PARAMETERS,
+        )
+        return
+
+    train, validation, test = loadData(variableLength)
     (
         auto,
         encoder,
@@ -20,27 +84,12 @@ def main():
     ) = lstmAutoencoder(
         train,
         validation,
-        sequenceLength=5,
-        featureCount=13,
-        encodingDimension=32,
-        hiddenDimension=64,
-        batchSize=16,
-        epochs=4000,
-        learningRate=0.0002,
-    )
-
-    tfjs.converters.save_keras_model(
-        auto,
-        MODEL_SAVE_PATH + 'artist/tracks/auto',
-    )
-    tfjs.converters.save_keras_model(
-        encoder,
-        MODEL_SAVE_PATH + 'artist/tracks/encoder',
-    )
-    tfjs.converters.save_keras_model(
-        decoder,
-        MODEL_SAVE_PATH + 'artist/tracks/decoder',
+        variableLength=variableLength,
+        **MODEL_PARAMETERS,
     )
+    # padded evaluation would score the padding, so only fixed length
+    # sequences are checked against the held-out set
+    save(auto, encoder, decoder, None if variableLength else test)
 
 
 if __name__ == "__main__":
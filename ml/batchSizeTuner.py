@@ -0,0 +1,139 @@
+import time
+import numpy as np
+
+EVALUATION_BATCH_SIZE = 256
+
+
+def scaledLearningRate(
+    baseLearningRate,
+    baseBatchSize,
+    batchSize,
+    scaling='sqrt',
+):
+    ratio = batchSize / baseBatchSize
+    if scaling == 'linear':
+        return baseLearningRate * ratio
+    if scaling == 'sqrt':
+        return baseLearningRate * float(np.sqrt(ratio))
+    return baseLearningRate
+
+
+def validationCurve(model):
+    history = getattr(model, 'history', None)
+    if history is None or 'val_loss' not in history.history:
+        return []
+    return history.history['val_loss']
+
+
+def validationLoss(model, validationFeatures, validationLabels):
+    loss = model.evaluate(
+        validationFeatures,
+        validationLabels,
+        batch_size=EVALUATION_BATCH_SIZE,
+        verbose=0,
+    )
+    if isinstance(loss, list):
+        loss = loss[0]
+    return float(loss)
+
+
+def epochsToTarget(curve, target):
+    for epoch, loss in enumerate(curve):
+        if loss <= target:
+            return epoch + 1
+    return None
+
+
+def printTuningReport(results, best):
+    print('{:>6s}\t{:>10s}\t{:>12s}\t{:>10s}\t{:>10s}\t{:>10s}'.format(
+        'batch',
+        'lr',
+        'samples/sec',
+        'val_loss',
+        'to target',
+        'seconds',
+    ))
+    for result in results:
+        toTarget = (
+            '-' if result['epochsToTarget'] is None
+            else '{:.1f}s'.format(result['secondsToTarget'])
+        )
+        print('{:>6d}\t{:>10.6f}\t{:>12.1f}\t{:>10.4f}\t{:>10s}\t{:>10.1f}{}'
+              .format(
+                  result['batchSize'],
+                  result['learningRate'],
+                  result['samplesPerSecond'],
+                  result['valLoss'],
+                  toTarget,
+                  result['seconds'],
+                  ' *' if result is best else '',
+              ))
+
+
+def tuneBatchSize(
+    train,
+    validationFeatures,
+    validationLabels,
+    sampleCount,
+    baseBatchSize,
+    baseLearningRate,
+    batchSizes=[8, 16, 32, 64, 128, 256],
+    epochs=20,
+    scaling='sqrt',
+    tolerance=0.02,
+    verbose=1,
+):
+    candidates = sorted(set([baseBatchSize] + list(batchSizes)))
+    candidates.remove(baseBatchSize)
+    candidates.insert(0, baseBatchSize)
+
+    results = []
+    target = None
+    for batchSize in candidates:
+        learningRate = scaledLearningRate(
+            baseLearningRate,
+            baseBatchSize,
+            batchSize,
+            scaling,
+        )
+        startTime = time.perf_counter()
+        # every candidate validates on the whole set, not batchSize steps
+        model = train(
+            batchSize=batchSize,
+            learningRate=learningRate,
+            epochs=epochs,
+            validationSteps=None,
+        )
+        seconds = time.perf_counter() - startTime
+        if isinstance(model, tuple):
+            model = model[0]
+
+        valLoss = validationLoss(model, validationFeatures, validationLabels)
+        curve = validationCurve(model) or [valLoss]
+        if target is None:
+            target = min(curve) * (1 + tolerance)
+        reachedAt = epochsToTarget(curve, target)
+        results.append({
+            'batchSize': batchSize,
+            'learningRate': learningRate,
+            'seconds': seconds,
+            'samplesPerSecond': sampleCount * epochs / seconds,
+            'valLoss': valLoss,
+            'epochsToTarget': reachedAt,
+            'secondsToTarget': (
+                None if reachedAt is None
+                else seconds * reachedAt / len(curve)
+            ),
+        })
+        del model
+
+    reached = [result for result in results if result['epochsToTarget']]
+    # a diverged base run (a NaN loss) sets a target nothing reaches, so
+    # keep the base batch size
+    best = min(
+        reached,
+        key=lambda result: result['secondsToTarget'],
+    ) if reached else results[0]
+    if verbose > 0:
+        printTuningReport(results, best)
+    return best, results
@@ -0,0 +1,419 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from os.path import join
+import numpy as np
+from commandLine import mlPath, userPath
+from dataHelpers import (
+    fromCsv,
+    fromCsvFiles,
+    pairsFromCsv,
+    pairsFromCsvFiles,
+)
+import syntheticData
+
+TASTE_BUCKETS = syntheticData.TASTE_BUCKETS
+JIT_STEP_BENCHMARKS = [
+    'autoencoderEpoch',
+    'lstmAutoencoderEpoch',
+    'convEncoderEpoch',
+    'denseNetEpoch',
+    'lstmNetEpoch',
+]
+JIT_STEP_BATCH_SIZE = 64
+JIT_STEPS = 50
+
+
+def loadTracks(directory):
+    return lambda: fromCsv(join(directory, 'track', 'all.csv'), 0, 0)
+
+
+def loadAlbumSequences(directory):
+    return lambda: fromCsvFiles(join(directory, 'album'), 0, 0, skipHeader=0)
+
+
+def loadProfilePairs(directory):
+    return lambda: pairsFromCsvFiles(
+        join(directory, 'profile', 'encodedArtists'),
+        join(directory, 'profile', 'taste'),
+        0,
+        0,
+        labelBuckets=TASTE_BUCKETS,
+    )
+
+
+def autoencoderEpoch(directory, jitCompile=False):
+    from models.autoencoder import autoencoder
+    train, validation, test = fromCsv(
+        join(directory, 'track', 'all.csv'),
+        0,
+        -1,
+    )
+    return lambda: autoencoder(
+        train,
+        validation,
+        13,
+        batchSize=64,
+        epochs=1,
+        jitCompile=jitCompile,
+    )
+
+
+def lstmAutoencoderEpoch(directory, jitCompile=False):
+    from models.lstmAutoencoder import lstmAutoencoder
+    train, validation, test = fromCsvFiles(
+        join(directory, 'album'),
+        0,
+        100,
+        skipHeader=0,
+    )
+    return lambda: lstmAutoencoder(
+        train,
+        validation,
+        sequenceLength=syntheticData.ALBUM_SEQUENCE_LENGTH,
+        featureCount=syntheticData.ENCODED_TRACK_DIMENSION,
+        encodingDimension=24,
+        hiddenDimension=48,
+        batchSize=64,
+        epochs=1,
+        jitCompile=jitCompile,
+    )
+
+
+def convEncoderEpoch(directory, jitCompile=False):
+    from models.convEncoder import convEncoder
+    train, validation, test = fromCsvFiles(
+        join(directory, 'album'),
+        0,
+        100,
+        skipHeader=0,
+    )
+    return lambda: convEncoder(
+        train,
+        np.tanh(train.reshape(len(train), -1)[:, :24]),
+        validation,
+        np.tanh(validation.reshape(len(validation), -1)[:, :24]),
+        batchSize=64,
+        epochs=1,
+        jitCompile=jitCompile,
+    )
+
+
+def denseNetEpoch(directory, jitCompile=False):
+    from models.denseNet import denseNet
+    (
+        trainFeatures,
+        trainLabels,
+        validationFeatures,
+        validationLabels,
+        testFeatures,
+        testLabels,
+    ) = loadProfilePairs(directory)()
+    return lambda: denseNet(
+        trainFeatures,
+        trainLabels,
+        trainFeatures[:10],
+        trainLabels[:10],
+        activation='relu',
+        batchSize=2,
+        dropoutRate=0,
+        epochs=1,
+        intermediateDimensions=[17, 19],
+        jitCompile=jitCompile,
+    )
+
+
+def lstmNetEpoch(directory, jitCompile=False):
+    from models.lstmNet import lstmNet
+    (
+        trainFeatures,
+        trainLabels,
+        validationFeatures,
+        validationLabels,
+        testFeatures,
+        testLabels,
+    ) = pairsFromCsvFiles(
+        join(directory, 'profile', 'artists'),
+        join(directory, 'profile', 'taste'),
+        0,
+        0,
+        labelBuckets=TASTE_BUCKETS,
+    )
+    return lambda: lstmNet(
+        trainFeatures,
+        trainLabels,
+        trainFeatures[:10],
+        trainLabels[:10],
+        batchSize=2,
+        epochs=1,
+        jitCompile=jitCompile,
+    )
+
+
+def variableEpochPerceptronRun(directory):
+    from models.variableEpochPerceptron import variableEpochPerceptron
+    (
+        trainFeatures,
+        trainLabels,
+        validationFeatures,
+        validationLabels,
+        testFeatures,
+        testLabels,
+        trainingExampleCount,
+    ) = pairsFromCsv(
+        join(directory, 'profile', 'reviews', '0.csv'),
+        0,
+        -1,
+        skipHeader=0,
+    )
+    return lambda: variableEpochPerceptron(
+        trainFeatures,
+        trainLabels,
+        validationFeatures,
+        validationLabels,
+        staleEpochsAllowed=20,
+        batchSize=2,
+        useBias=False,
+    )
+
+
+def tasteLearnerPass(directory):
+    import tasteLearner
+    outputDirectory = tempfile.mkdtemp()
+    for bucket in ['all'] + TASTE_BUCKETS:
+        os.makedirs(join(outputDirectory, bucket))
+    tasteLearner.PROFILE_REVIEWS_PATH = join(directory, 'profile', 'reviews')
+    tasteLearner.ALL_SAVE_PATH = join(outputDirectory, 'all')
+    tasteLearner.BUCKET_6_SAVE_PATH = join(outputDirectory, '6')
+    tasteLearner.BUCKETS = [
+        (maeCap, join(outputDirectory, bucket))
+        for (maeCap, savePath), bucket in zip(
+            tasteLearner.BUCKETS,
+            TASTE_BUCKETS,
+        )
+    ]
+    tasteLearner.TELEMETRY_LOG = join(outputDirectory, 'telemetry.jsonl')
+
+    def run():
+        tasteLearner.main()
+        shutil.rmtree(outputDirectory)
+    return run
+
+
+BENCHMARKS = {
+    'loadTracks': loadTracks,
+    'loadAlbumSequences': loadAlbumSequences,
+    'loadProfilePairs': loadProfilePairs,
+    'autoencoderEpoch': autoencoderEpoch,
+    'lstmAutoencoderEpoch': lstmAutoencoderEpoch,
+    'convEncoderEpoch': convEncoderEpoch,
+    'denseNetEpoch': denseNetEpoch,
+    'lstmNetEpoch': lstmNetEpoch,
+    'variableEpochPerceptron': variableEpochPerceptronRun,
+    'tasteLearnerPass': tasteLearnerPass,
+}
+SAMPLE_COUNTS = {
+    'loadTracks': 'tracks',
+    'loadAlbumSequences': 'albums',
+    'loadProfilePairs': 'profiles',
+    'autoencoderEpoch': 'tracks',
+    'lstmAutoencoderEpoch': 'albums',
+    'convEncoderEpoch': 'albums',
+    'denseNetEpoch': 'profiles',
+    'lstmNetEpoch': 'profiles',
+    'variableEpochPerceptron': 'reviewsPerProfile',
+    'tasteLearnerPass': 'profiles',
+}
+
+
+def runBenchmark(name, directory):
+    run = BENCHMARKS[name](directory)
+    startTime = time.perf_counter()
+    run()
+    return {
+        'seconds': time.perf_counter() - startTime,
+        'peakRssBytes': (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        ),
+    }
+
+
+# steady state seconds per train step of a builder's model; the builder's
+# own epoch and XLA check run first, then steps are timed on one fixed
+# batch, so tracing and compilation fall outside the timing
+def stepSeconds(
+    name,
+    directory,
+    jitCompile,
+    steps=JIT_STEPS,
+    batchSize=JIT_STEP_BATCH_SIZE,
+):
+    os.environ['CUDA_VISIBLE_DEVICES'] = '-1'
+    from models.jitCompilation import randomInputs
+    built = BENCHMARKS[name](directory, jitCompile=jitCompile)()
+    model = built[0] if isinstance(built, tuple) else built
+    features = randomInputs(model, batchSize)
+    labels = np.random.default_rng(1).normal(
+        size=(batchSize,) + tuple(model.output_shape[1:]),
+    ).astype(np.float32)
+    model.train_on_batch(features, labels)
+    startTime = time.perf_counter()
+    for _ in range(steps):
+        model.train_on_batch(features, labels)
+    return (time.perf_counter() - startTime) / steps
+
+
+def jitSpeedups(directory, scale='small', names=None, repeats=1):
+    unknownNames = set(names or []) - set(JIT_STEP_BENCHMARKS)
+    if unknownNames:
+        raise ValueError('unknown step benchmarks {}'.format(
+            sorted(unknownNames),
+        ))
+    syntheticData.generate(directory, scale)
+    results = {}
+    for name in names or JIT_STEP_BENCHMARKS:
+        seconds = {}
+        for jitCompile in (False, True):
+            runs = []
+            for _ in range(repeats):
+                with ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context('spawn'),
+                ) as executor:
+                    runs.append(executor.submit(
+                        stepSeconds,
+                        name,
+                        directory,
+                        jitCompile,
+                    ).result())
+            seconds[jitCompile] = float(np.median(runs))
+        results[name] = {
+            'stepSeconds': seconds[False],
+            'jitStepSeconds': seconds[True],
+            'speedup': seconds[False] / seconds[True],
+        }
+    return {
+        'machine': machineProfile(),
+        'scale': scale,
+        'batchSize': JIT_STEP_BATCH_SIZE,
+        'results': results,
+    }
+
+
+def machineProfile():
+    return {
+        'node': platform.node(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+    }
+
+
+def runSuite(directory, scale='small', names=None, repeats=1, **sizes):
+    unknownNames = set(names or []) - set(BENCHMARKS)
+    if unknownNames:
+        raise ValueError('unknown benchmarks {}'.format(sorted(unknownNames)))
+    sizes = syntheticData.generate(directory, scale, **sizes)
+    results = {}
+    for name in names or BENCHMARKS:
+        runs = []
+        for _ in range(repeats):
+            # a fresh process per run keeps peak RSS and TF state separate
+            with ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context('spawn'),
+            ) as executor:
+                run = executor.submit(runBenchmark, name, directory).result()
+            run['samplesPerSecond'] = (
+                sizes[SAMPLE_COUNTS[name]] / run['seconds']
+            )
+            runs.append(run)
+        results[name] = runs
+    return {
+        'machine': machineProfile(),
+        'scale': scale,
+        'sizes': sizes,
+        'results': results,
+    }
+
+
+def printSuite(suite):
+    for name, runs in suite['results'].items():
+        print('{:24s}\t{:>10.3f}s\t{:>14.1f}/s\t{:>8.1f}MB'.format(
+            name,
+            float(np.median([run['seconds'] for run in runs])),
+            float(np.median([run['samplesPerSecond'] for run in runs])),
+            max(run['peakRssBytes'] for run in runs) / (1 << 20),
+        ))
+
+
+def main(
+    directory='../resources/synthetic/',
+    scale='small',
+    names=None,
+    repeats=1,
+    output=None,
+    jitSteps=False,
+):
+    if jitSteps:
+        suite = jitSpeedups(directory, scale, names, repeats)
+        for name, result in suite['results'].items():
+            print('{:24s}\t{:>8.2f}ms\t{:>8.2f}ms jit\t{:>6.2f}x'.format(
+                name,
+                result['stepSeconds'] * 1000,
+                result['jitStepSeconds'] * 1000,
+                result['speedup'],
+            ))
+    else:
+        suite = runSuite(directory, scale, names, repeats)
+        printSuite(suite)
+    if output is not None:
+        with open(output, 'w') as outputFile:
+            json.dump(suite, outputFile, indent=2)
+    return suite
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description='Time ml hot paths on synthetic data',
+    )
+    parser.add_argument('names', nargs='*', help=', '.join(BENCHMARKS))
+    parser.add_argument(
+        '--directory',
+        type=userPath,
+        default=mlPath('../resources/synthetic/'),
+    )
+    parser.add_argument(
+        '--scale',
+        default='small',
+        choices=list(syntheticData.SCALES),
+    )
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--output', type=userPath)
+    parser.add_argument(
+        '--jit-steps',
+        action='store_true',
+        help='compare CPU train step times with and without XLA per model',
+    )
+    args = parser.parse_args(argv)
+    return {
+        'directory': args.directory,
+        'scale': args.scale,
+        'names': args.names or None,
+        'repeats': args.repeats,
+        'output': args.output,
+        'jitSteps': args.jit_steps,
+    }
+
+
+if __name__ == "__main__":
+    main(**parseArguments(sys.argv[1:]))
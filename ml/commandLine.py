@@ -0,0 +1,15 @@
+import os
+
+ML_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+TIMING_LOG_VARIABLE = 'MUCRITIC_TIMING_LOG'
+
+
+def mlPath(path):
+    # defaults are written relative to ml/, which ml.py runs commands from
+    return os.path.normpath(os.path.join(ML_DIRECTORY, path))
+
+
+def userPath(path):
+    # typed paths are relative to wherever the command was started, so
+    # they are resolved while parsing, before ml.py changes directory
+    return os.path.abspath(path)
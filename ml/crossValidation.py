@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+def foldIndices(sampleIndices, folds, seed=0):
+    shuffled = np.random.default_rng(seed).permutation(sampleIndices)
+    return np.array_split(shuffled, folds)
+
+
+def foldWorker(
+    datasetFile,
+    trainIndices,
+    validationIndices,
+    threadsPerWorker,
+    builderArgs,
+):
+    os.environ['CUDA_VISIBLE_DEVICES'] = '-1'
+    import tensorflow as tf
+    from models.denseNet import averagedModel, denseNet, memberModels
+
+    if threadsPerWorker > 0:
+        tf.config.threading.set_intra_op_parallelism_threads(
+            threadsPerWorker,
+        )
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    with np.load(datasetFile) as dataset:
+        features, labels = dataset['features'], dataset['labels']
+    model = denseNet(
+        features[trainIndices],
+        labels[trainIndices],
+        features[validationIndices],
+        labels[validationIndices],
+        **builderArgs,
+    )
+    if builderArgs.get('ensembleSize', 1) > 1:
+        ensemble = model
+        model = averagedModel(memberModels(ensemble))
+        model.compile(
+            loss=ensemble.loss,
+            metrics=builderArgs.get('metrics', ['mae']),
+        )
+    # training only checks a few validation batches, so score the whole fold
+    scores = model.evaluate(
+        features[validationIndices],
+        labels[validationIndices],
+        batch_size=len(validationIndices),
+        verbose=0,
+        return_dict=True,
+    )
+    return {metric: float(score) for metric, score in scores.items()}
+
+
+def summarizeFolds(foldScores):
+    summary = {}
+    for metric in foldScores[0]:
+        scores = np.array([scores[metric] for scores in foldScores])
+        deviation = float(np.std(scores, ddof=1)) if len(scores) > 1 else 0
+        summary[metric] = {
+            'mean': float(np.mean(scores)),
+            'std': deviation,
+            'standardError': deviation / float(np.sqrt(len(scores))),
+        }
+    return summary
+
+
+def crossValidate(
+    datasetFile,
+    sampleIndices,
+    folds=5,
+    workerCount=None,
+    threadsPerWorker=0,
+    seed=0,
+    **builderArgs,
+):
+    # workers read the loader's cache file rather than re-parsing the CSVs
+    workerCount = workerCount or folds
+    if threadsPerWorker == 0:
+        threadsPerWorker = max(1, (os.cpu_count() or 1) // workerCount)
+    splits = foldIndices(sampleIndices, folds, seed)
+    with ProcessPoolExecutor(
+        max_workers=workerCount,
+        mp_context=multiprocessing.get_context('spawn'),
+    ) as executor:
+        futures = [
+            executor.submit(
+                foldWorker,
+                datasetFile,
+                np.concatenate(splits[:fold] + splits[fold + 1:]),
+                splits[fold],
+                threadsPerWorker,
+                builderArgs,
+            )
+            for fold in range(folds)
+        ]
+        foldScores = [future.result() for future in futures]
+    return foldScores, summarizeFolds(foldScores)
@@ -1,8 +1,11 @@
+import json
 import numpy as np
 from os import listdir
-from os.path import join, isfile
+from os.path import getmtime, join, isfile
+from memoryProfiler import profiledStage
 
 
+@profiledStage('fromCsv')
 def fromCsv(
     fileName,
     testSize,
@@ -28,6 +31,7 @@ def fromCsv(
     return train, validation, test
 
 
+@profiledStage('fromCsvBuckets')
 def fromCsvBuckets(
     baseDirectory,
     bucketNames,
@@ -58,6 +62,14 @@ def fromCsvBuckets(
     return np.array(train), np.array(validation), np.array(test)
 
 
+def dataFileNames(fileDirectory):
+    return [
+        filename for filename in listdir(fileDirectory)
+        if isfile(join(fileDirectory, filename))
+    ]
+
+
+@profiledStage('fromCsvFiles')
 def fromCsvFiles(
     fileDirectory,
     testSize,
@@ -67,16 +79,14 @@ def fromCsvFiles(
     skipHeader=1,
 ):
     data = []
-    for filename in listdir(fileDirectory):
-        dataFile = join(fileDirectory, filename)
-        if isfile(dataFile):
-            extractedData = np.genfromtxt(
-                dataFile,
-                skip_header=skipHeader,
-                filling_values=fillingValues,
-                delimiter=delimiter,
-            )
-            data.append(extractedData)
+    for filename in dataFileNames(fileDirectory):
+        extractedData = np.genfromtxt(
+            join(fileDirectory, filename),
+            skip_header=skipHeader,
+            filling_values=fillingValues,
+            delimiter=delimiter,
+        )
+        data.append(extractedData)
 
     test = data[:testSize]
     validation = data[testSize:testSize + validationSize]
@@ -85,6 +95,33 @@ def fromCsvFiles(
     return np.array(train), np.array(validation), np.array(test)
 
 
+def loadCachedArrays(cacheFile, sourceFiles, settings=''):
+    # a cache only counts for exactly these source files and settings
+    if cacheFile is None or not isfile(cacheFile):
+        return None
+    cacheTime = getmtime(cacheFile)
+    if any(getmtime(sourceFile) > cacheTime for sourceFile in sourceFiles):
+        return None
+    with np.load(cacheFile) as cached:
+        if (
+            list(cached['sourceFiles']) != list(sourceFiles) or
+            str(cached['settings']) != settings
+        ):
+            return None
+        return {name: cached[name] for name in cached.files}
+
+
+def saveCachedArrays(cacheFile, sourceFiles, settings='', **arrays):
+    with open(cacheFile, 'wb') as cache:
+        np.savez(
+            cache,
+            sourceFiles=np.array(sourceFiles),
+            settings=np.array(settings),
+            **arrays,
+        )
+
+
+@profiledStage('pairsFromCsvFiles')
 def pairsFromCsvFiles(
     fileDirectoryFeatures,
     fileDirectoryLabels,
@@ -95,9 +132,9 @@ def pairsFromCsvFiles(
     skipHeader=0,
     labelBuckets=None,
     skipBiasInLabels=False,
+    cacheFile=None,
 ):
-    features = []
-    labels = []
+    pairFiles = []
     for filename in listdir(fileDirectoryFeatures):
         featureFile = join(fileDirectoryFeatures, filename)
         labelFile = None
@@ -110,6 +147,17 @@ def pairsFromCsvFiles(
         else:
             labelFile = join(fileDirectoryLabels, filename)
         if isfile(featureFile) and labelFile and isfile(labelFile):
+            pairFiles.append((featureFile, labelFile))
+
+    sourceFiles = [fileName for pair in pairFiles for fileName in pair]
+    settings = repr((delimiter, fillingValues, skipHeader, skipBiasInLabels))
+    cached = loadCachedArrays(cacheFile, sourceFiles, settings)
+    if cached is not None:
+        features, labels = cached['features'], cached['labels']
+    else:
+        features = []
+        labels = []
+        for featureFile, labelFile in pairFiles:
             extractedFeatures = np.genfromtxt(
                 featureFile,
                 skip_header=skipHeader,
@@ -127,6 +175,14 @@ def pairsFromCsvFiles(
                 labels.append(extractedLabels[1:])
             else:
                 labels.append(extractedLabels)
+        if cacheFile is not None:
+            saveCachedArrays(
+                cacheFile,
+                sourceFiles,
+                settings,
+                features=np.array(features),
+                labels=np.array(labels),
+            )
 
     testFeatures = features[:testSize]
     validationFeatures = features[testSize:testSize + validationSize]
@@ -153,6 +209,7 @@ def pairsFromCsvFiles(
     )
 
 
+@profiledStage('pairsFromCsv')
 def pairsFromCsv(
     fileName,
     testSize,
@@ -204,3 +261,119 @@ def pairsFromCsv(
         testLabels,
         len(train)
     )
+
+
+def trueSequenceLength(sequence, paddingValue=0):
+    filledSteps = np.nonzero(np.any(sequence != paddingValue, axis=-1))[0]
+    if len(filledSteps) == 0:
+        return 0
+    return int(filledSteps[-1]) + 1
+
+
+@profiledStage('sequencesFromCsvFiles')
+def sequencesFromCsvFiles(
+    fileDirectory,
+    testSize,
+    validationSize,
+    delimiter=',',
+    fillingValues=0,
+    skipHeader=1,
+    maxLength=None,
+):
+    data = []
+    for filename in listdir(fileDirectory):
+        dataFile = join(fileDirectory, filename)
+        if isfile(dataFile):
+            extractedData = np.genfromtxt(
+                dataFile,
+                skip_header=skipHeader,
+                filling_values=fillingValues,
+                delimiter=delimiter,
+                ndmin=2,
+            )
+            length = trueSequenceLength(extractedData, fillingValues)
+            if maxLength is not None:
+                length = min(length, maxLength)
+            if length > 0:
+                data.append(extractedData[:length])
+
+    test = data[:testSize]
+    validation = data[testSize:testSize + validationSize]
+    train = data[testSize + validationSize:]
+
+    return train, validation, test
+
+
+def padSequences(sequences, length, paddingValue=0):
+    padded = np.full(
+        (len(sequences), length, len(sequences[0][0])),
+        paddingValue,
+        dtype=np.float32,
+    )
+    for i, sequence in enumerate(sequences):
+        padded[i, :len(sequence)] = sequence[:length]
+    return padded
+
+
+def bucketBatches(
+    sequences,
+    batchSize,
+    labels=None,
+    bucketWidth=1,
+    shuffle=True,
+    generator=None,
+):
+    generator = generator or np.random
+    buckets = {}
+    for i, sequence in enumerate(sequences):
+        buckets.setdefault(len(sequence) // bucketWidth, []).append(i)
+
+    batches = []
+    for indices in buckets.values():
+        if shuffle:
+            generator.shuffle(indices)
+        for start in range(0, len(indices), batchSize):
+            batchIndices = indices[start:start + batchSize]
+            batchSequences = [sequences[i] for i in batchIndices]
+            features = padSequences(
+                batchSequences,
+                max(len(sequence) for sequence in batchSequences),
+            )
+            if labels is None:
+                batches.append((features, features))
+            else:
+                batches.append((
+                    features,
+                    np.array(
+                        [labels[i] for i in batchIndices],
+                        dtype=np.float32,
+                    ),
+                ))
+    if shuffle:
+        generator.shuffle(batches)
+    return batches
+
+
+def shardBatches(batches, shardIndex, shardCount):
+    # every worker takes every shardCount-th row of the same batches, so
+    # all of them run the same number of steps; a batch too small to give
+    # each worker a row is dropped
+    return [
+        (features[shardIndex::shardCount], labels[shardIndex::shardCount])
+        for features, labels in batches
+        if len(features) >= shardCount
+    ]
+
+
+def appendJsonLine(fileName, record):
+    with open(fileName, 'a') as logFile:
+        logFile.write(json.dumps(record) + '\n')
+
+
+def readJsonLines(fileName):
+    records = []
+    with open(fileName) as logFile:
+        for line in logFile:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
@@ -0,0 +1,112 @@
+import time
+import numpy as np
+from dataHelpers import fromCsvFiles
+
+MODEL_SAVE_PATH = "../resources/models/"
+TEACHERS = {
+    'album': {
+        'data': "../resources/data/album/",
+        'models': MODEL_SAVE_PATH + 'album/tracks/',
+    },
+    'artist': {
+        'data': "../resources/data/artist/",
+        'models': MODEL_SAVE_PATH + 'artist/tracks/',
+    },
+}
+
+
+def neighbourAgreement(teacherCodes, studentCodes, neighbours=10):
+    def nearest(codes):
+        squared = np.sum(codes ** 2, axis=1)
+        distances = (
+            squared[:, None] + squared[None, :] - 2 * codes @ codes.T
+        )
+        np.fill_diagonal(distances, np.inf)
+        return np.argsort(distances, axis=1)[:, :neighbours]
+
+    teacherNearest = nearest(teacherCodes)
+    studentNearest = nearest(studentCodes)
+    overlap = [
+        len(np.intersect1d(teacherRow, studentRow)) / neighbours
+        for teacherRow, studentRow in zip(teacherNearest, studentNearest)
+    ]
+    return float(np.mean(overlap))
+
+
+def codeMse(teacherCodes, studentCodes):
+    return float(np.mean((teacherCodes - studentCodes) ** 2))
+
+
+def inferenceLatency(model, data, batchSize=1, repeats=3):
+    model.predict(data[:batchSize], batch_size=batchSize)
+    timings = []
+    for _ in range(repeats):
+        startTime = time.perf_counter()
+        model.predict(data, batch_size=batchSize)
+        timings.append(time.perf_counter() - startTime)
+    return min(timings) / len(data)
+
+
+def codeFidelity(teacher, student, data, neighbours=10):
+    teacherCodes = teacher.predict(data, batch_size=4096)
+    studentCodes = student.predict(data, batch_size=4096)
+    return {
+        'codeMse': codeMse(teacherCodes, studentCodes),
+        'neighbourAgreement': neighbourAgreement(
+            teacherCodes,
+            studentCodes,
+            neighbours,
+        ),
+        'teacherLatency': inferenceLatency(teacher, data[:512]),
+        'studentLatency': inferenceLatency(student, data[:512]),
+    }
+
+
+def main(entity='album', quantization=None, pruneFraction=0):
+    # tensorflow loads here so the fidelity metrics import without it
+    from models.convEncoder import convEncoder
+    from modelExport import exportModels, loadSharedModel
+
+    teacher = TEACHERS[entity]
+    # teachers are exported in the shared weight layout
+    teacherEncoder = loadSharedModel(teacher['models'] + 'encoder')
+    train, validation, test = fromCsvFiles(
+        teacher['data'],
+        2000,
+        2000,
+        skipHeader=0,
+    )
+    student = convEncoder(
+        train,
+        teacherEncoder.predict(train, batch_size=4096),
+        validation,
+        teacherEncoder.predict(validation, batch_size=4096),
+        batchSize=64,
+        epochs=300,
+    )
+
+    fidelity = codeFidelity(teacherEncoder, student, test)
+    print(
+        '''code mse: {:.6f}\tneighbour agreement: {:.3f}\
+        \tlstm: {:.3f}ms\tstudent: {:.3f}ms ({:.1f}x)'''
+        .format(
+            fidelity['codeMse'],
+            fidelity['neighbourAgreement'],
+            fidelity['teacherLatency'] * 1000,
+            fidelity['studentLatency'] * 1000,
+            fidelity['teacherLatency'] / fidelity['studentLatency'],
+        )
+    )
+
+    exportModels(
+        {teacher['models'] + 'distilled/encoder': student},
+        quantization=quantization,
+        pruneFraction=pruneFraction,
+        evaluationModel=student,
+        evaluationFeatures=test,
+        evaluationLabels=teacherEncoder.predict(test, batch_size=4096),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import json
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import socket
+
+
+def freePorts(count):
+    sockets = []
+    for _ in range(count):
+        portSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        portSocket.bind(('localhost', 0))
+        sockets.append(portSocket)
+    ports = [portSocket.getsockname()[1] for portSocket in sockets]
+    for portSocket in sockets:
+        portSocket.close()
+    return ports
+
+
+def clusterConfig(ports, workerIndex):
+    return json.dumps({
+        'cluster': {
+            'worker': ['localhost:{}'.format(port) for port in ports],
+        },
+        'task': {'type': 'worker', 'index': workerIndex},
+    })
+
+
+def dataParallelWorker(
+    workerIndex,
+    ports,
+    threadsPerWorker,
+    loadData,
+    saveModels,
+    builderArgs,
+    inspectWorker=None,
+):
+    os.environ['TF_CONFIG'] = clusterConfig(ports, workerIndex)
+    os.environ['CUDA_VISIBLE_DEVICES'] = '-1'
+    import tensorflow as tf
+    from models.lstmAutoencoder import lstmAutoencoder
+
+    if threadsPerWorker > 0:
+        tf.config.threading.set_intra_op_parallelism_threads(
+            threadsPerWorker,
+        )
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    strategy = tf.distribute.MultiWorkerMirroredStrategy()
+
+    train, validation, test = loadData()
+    auto, encoder, decoder = lstmAutoencoder(
+        train,
+        validation,
+        strategy=strategy,
+        **builderArgs,
+    )
+    if inspectWorker is not None:
+        inspectWorker(workerIndex, auto)
+    if workerIndex == 0:
+        saveModels(
+            auto,
+            encoder,
+            decoder,
+            None if builderArgs.get('variableLength') else test,
+        )
+
+
+def trainDataParallel(
+    loadData,
+    saveModels,
+    workerCount,
+    threadsPerWorker=0,
+    inspectWorker=None,
+    **builderArgs,
+):
+    ports = freePorts(workerCount)
+    context = multiprocessing.get_context('spawn')
+    workers = [
+        context.Process(
+            target=dataParallelWorker,
+            args=(
+                workerIndex,
+                ports,
+                threadsPerWorker,
+                loadData,
+                saveModels,
+                builderArgs,
+                inspectWorker,
+            ),
+        )
+        for workerIndex in range(workerCount)
+    ]
+    for worker in workers:
+        worker.start()
+
+    # a worker that dies leaves its peers blocked on collective ops, so
+    # stop the whole group as soon as any one of them fails
+    failedWorkers = []
+    running = list(workers)
+    while running and not failedWorkers:
+        wait([worker.sentinel for worker in running])
+        finished = [worker for worker in running if not worker.is_alive()]
+        for worker in finished:
+            running.remove(worker)
+            if worker.exitcode != 0:
+                failedWorkers.append(workers.index(worker))
+    for worker in running:
+        worker.terminate()
+        worker.join()
+    if failedWorkers:
+        raise RuntimeError(
+            'data parallel workers {} failed'.format(failedWorkers)
+        )
@@ -0,0 +1,329 @@
+import argparse
+import json
+import sys
+import time
+from os import makedirs
+from os.path import join
+import numpy as np
+from commandLine import mlPath, userPath
+from dataHelpers import fromCsv
+
+STORE_DIRECTORY = "../resources/embeddings/album/"
+SUBSPACES = 8
+CENTROIDS = 256
+TRAINING_SAMPLES = 100000
+KMEANS_ITERATIONS = 20
+CHUNK_ROWS = 65536
+RERANK_CANDIDATES = 1000
+SCORERS = ['exact', 'compressed']
+
+
+def squaredDistances(points, centroids):
+    return (
+        np.sum(points ** 2, axis=1)[:, None] -
+        2 * points @ centroids.T +
+        np.sum(centroids ** 2, axis=1)[None]
+    )
+
+
+def kMeans(points, centroidCount, iterations=KMEANS_ITERATIONS, seed=0):
+    generator = np.random.default_rng(seed)
+    centroidCount = min(centroidCount, len(points))
+    centroids = points[
+        generator.choice(len(points), centroidCount, replace=False)
+    ].copy()
+    for _ in range(iterations):
+        assignments = np.argmin(squaredDistances(points, centroids), axis=1)
+        counts = np.bincount(assignments, minlength=centroidCount)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, points)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # an empty cluster restarts on a random point so no code is wasted
+        empty = np.flatnonzero(~filled)
+        centroids[empty] = points[generator.choice(len(points), len(empty))]
+    return centroids
+
+
+def trainCodebooks(
+    embeddings,
+    subspaces=SUBSPACES,
+    centroids=CENTROIDS,
+    trainingSamples=TRAINING_SAMPLES,
+    seed=0,
+):
+    if embeddings.shape[1] % subspaces != 0:
+        raise ValueError('{} dimensions do not split into {} subspaces'.format(
+            embeddings.shape[1],
+            subspaces,
+        ))
+    generator = np.random.default_rng(seed)
+    sample = embeddings[generator.choice(
+        len(embeddings),
+        min(trainingSamples, len(embeddings)),
+        replace=False,
+    )].astype(np.float32)
+    subspaceWidth = embeddings.shape[1] // subspaces
+    codebooks = np.zeros(
+        (subspaces, centroids, subspaceWidth),
+        dtype=np.float32,
+    )
+    for subspace in range(subspaces):
+        columns = slice(
+            subspace * subspaceWidth,
+            (subspace + 1) * subspaceWidth,
+        )
+        trained = kMeans(sample[:, columns], centroids, seed=seed + subspace)
+        codebooks[subspace, :len(trained)] = trained
+    return codebooks
+
+
+def encodeProducts(embeddings, codebooks):
+    subspaces, _, subspaceWidth = codebooks.shape
+    codes = np.empty((len(embeddings), subspaces), dtype=np.uint8)
+    for start in range(0, len(embeddings), CHUNK_ROWS):
+        chunk = embeddings[start:start + CHUNK_ROWS].astype(np.float32)
+        for subspace in range(subspaces):
+            codes[start:start + len(chunk), subspace] = np.argmin(
+                squaredDistances(
+                    chunk[:, subspace * subspaceWidth:
+                          (subspace + 1) * subspaceWidth],
+                    codebooks[subspace],
+                ),
+                axis=1,
+            )
+    return codes
+
+
+def scalarQuantize(embeddings):
+    # one byte per dimension, scaled to each dimension's own range
+    low = embeddings.min(axis=0)
+    scale = np.maximum(embeddings.max(axis=0) - low, 1e-12) / 255
+    codes = np.empty(embeddings.shape, dtype=np.uint8)
+    for start in range(0, len(embeddings), CHUNK_ROWS):
+        codes[start:start + CHUNK_ROWS] = np.rint(
+            (embeddings[start:start + CHUNK_ROWS] - low) / scale,
+        )
+    return codes, np.stack([low, scale]).astype(np.float32)
+
+
+def saveStore(directory, embeddings, storeFormat='pq', subspaces=SUBSPACES):
+    # exact vectors sit next to the compressed store for reranking and are
+    # memory mapped, so only the shortlist is read from them
+    makedirs(directory, exist_ok=True)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    np.save(join(directory, 'vectors.npy'), embeddings)
+    if storeFormat == 'int8':
+        codes, quantization = scalarQuantize(embeddings)
+        np.save(join(directory, 'int8.npy'), codes)
+        np.save(join(directory, 'quantization.npy'), quantization)
+    elif storeFormat == 'pq':
+        codebooks = trainCodebooks(embeddings, subspaces)
+        np.save(join(directory, 'codebooks.npy'), codebooks)
+        np.save(
+            join(directory, 'codes.npy'),
+            encodeProducts(embeddings, codebooks),
+        )
+    else:
+        raise ValueError('unknown store format {}'.format(storeFormat))
+    with open(join(directory, 'store.json'), 'w') as storeFile:
+        json.dump({
+            'format': storeFormat,
+            'count': len(embeddings),
+            'dimension': embeddings.shape[1],
+        }, storeFile)
+
+
+def pairCodes(codes):
+    # one uint16 per pair of subspace codes halves the table lookups while
+    # keeping the same bytes per item
+    if codes.shape[1] % 2:
+        codes = np.hstack([codes, np.zeros((len(codes), 1), np.uint8)])
+    return (
+        codes[:, 0::2].astype(np.uint16) |
+        codes[:, 1::2].astype(np.uint16) << 8
+    )
+
+
+def pairTables(table):
+    if len(table) % 2:
+        table = np.vstack([table, np.zeros((1, table.shape[1]), table.dtype)])
+    # index odd * 256 + even matches the packing in pairCodes
+    return (table[0::2, None, :] + table[1::2, :, None]).reshape(
+        len(table) // 2,
+        -1,
+    )
+
+
+class EmbeddingStore:
+    def __init__(self, directory, scorer='compressed'):
+        with open(join(directory, 'store.json')) as storeFile:
+            self.metadata = json.load(storeFile)
+        self.format = self.metadata['format']
+        self.vectors = np.load(join(directory, 'vectors.npy'), mmap_mode='r')
+        if self.format == 'int8':
+            self.compressed = np.load(join(directory, 'int8.npy'))
+            self.quantization = np.load(join(directory, 'quantization.npy'))
+        else:
+            self.codebooks = np.load(join(directory, 'codebooks.npy'))
+            self.compressed = pairCodes(np.load(join(directory, 'codes.npy')))
+        if scorer not in SCORERS:
+            raise ValueError('unknown scorer {}'.format(scorer))
+        self.scorer = scorer
+
+    # bytes each query scans per item; the compressed scorer reads only a
+    # shortlist of the exact vectors back for its rerank
+    def bytesPerItem(self):
+        scanned = self.vectors if self.scorer == 'exact' else self.compressed
+        return scanned.nbytes / len(scanned)
+
+    def exactScores(self, taste, rows=None):
+        taste = np.asarray(taste, dtype=np.float32)
+        vectors = self.vectors[:rows]
+        scores = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(scores), CHUNK_ROWS):
+            chunk = vectors[start:start + CHUNK_ROWS]
+            scores[start:start + len(chunk)] = chunk @ taste
+        return scores
+
+    def approximateScores(self, taste, rows=None):
+        taste = np.asarray(taste, dtype=np.float32)
+        compressed = self.compressed[:rows]
+        scores = np.empty(len(compressed), dtype=np.float32)
+        if self.format == 'int8':
+            low, scale = self.quantization
+            offset = float(low @ taste)
+            scaledTaste = scale * taste
+            for start in range(0, len(scores), CHUNK_ROWS):
+                chunk = compressed[start:start + CHUNK_ROWS]
+                scores[start:start + len(chunk)] = (
+                    chunk.astype(np.float32) @ scaledTaste + offset
+                )
+            return scores
+
+        # each subspace's dot products with every centroid, looked up by code
+        subspaces, _, subspaceWidth = self.codebooks.shape
+        tables = pairTables(np.einsum(
+            'kcw,kw->kc',
+            self.codebooks,
+            taste.reshape(subspaces, subspaceWidth),
+        ))
+        for start in range(0, len(scores), CHUNK_ROWS):
+            codes = compressed[start:start + CHUNK_ROWS]
+            chunkScores = tables[0].take(codes[:, 0])
+            for pair in range(1, len(tables)):
+                chunkScores += tables[pair].take(codes[:, pair])
+            scores[start:start + len(codes)] = chunkScores
+        return scores
+
+    def topScores(self, taste, count=100, candidates=RERANK_CANDIDATES):
+        if self.scorer == 'exact':
+            scores = self.exactScores(taste)
+            count = min(count, len(scores))
+            items = np.argpartition(-scores, count - 1)[:count]
+            order = np.argsort(-scores[items])
+            return items[order], scores[items[order]]
+
+        # the best items by exact score among the approximate shortlist
+        scores = self.approximateScores(taste)
+        candidates = min(max(candidates, count), len(scores))
+        shortlist = np.argpartition(-scores, candidates - 1)[:candidates]
+        shortlist.sort()
+        exactScores = (
+            np.asarray(self.vectors[shortlist], dtype=np.float32) @
+            np.asarray(taste, dtype=np.float32)
+        )
+        order = np.argsort(-exactScores)[:count]
+        return shortlist[order], exactScores[order]
+
+
+def recall(store, tastes, count=100, candidates=RERANK_CANDIDATES):
+    vectors = np.asarray(store.vectors, dtype=np.float32)
+    found = 0
+    for taste in tastes:
+        items, _ = store.topScores(taste, count, candidates)
+        exact = np.argpartition(-(vectors @ taste), count - 1)[:count]
+        found += len(np.intersect1d(items, exact))
+    return found / (count * len(tastes))
+
+
+def main(
+    source,
+    directory=STORE_DIRECTORY,
+    storeFormat='pq',
+    subspaces=SUBSPACES,
+    queries=20,
+    scorer='compressed',
+):
+    embeddings, _, _ = fromCsv(source, 0, 0, skipHeader=0)
+    saveStore(directory, embeddings, storeFormat, subspaces)
+    store = EmbeddingStore(directory, scorer)
+
+    tastes = np.random.default_rng(0).normal(
+        size=(queries, embeddings.shape[1]),
+    ).astype(np.float32)
+    seconds = {}
+    for name, score in [
+        ('exact', store.exactScores),
+        (storeFormat, store.approximateScores),
+        ('top 100', store.topScores),
+    ]:
+        startTime = time.perf_counter()
+        for taste in tastes:
+            score(taste)
+        seconds[name] = (time.perf_counter() - startTime) / queries
+    recallAt100 = recall(store, tastes)
+
+    print('{} items\t{:.1f} bytes/item ({:.1f}x smaller)'.format(
+        len(embeddings),
+        store.bytesPerItem(),
+        embeddings.shape[1] * 4 / store.bytesPerItem(),
+    ))
+    print('\t'.join(
+        '{} scan: {:.2f}ms'.format(name, scanSeconds * 1000)
+        for name, scanSeconds in seconds.items()
+    ))
+    print('scorer: {}\trecall@100: {:.3f}'.format(store.scorer, recallAt100))
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description='Build a compressed embedding store from a CSV of '
+                    'encodings and report its size, speed and recall',
+    )
+    parser.add_argument('source', type=userPath)
+    parser.add_argument(
+        '--directory',
+        type=userPath,
+        default=mlPath(STORE_DIRECTORY),
+    )
+    parser.add_argument(
+        '--format',
+        default='pq',
+        choices=['pq', 'int8'],
+    )
+    parser.add_argument('--subspaces', type=int, default=SUBSPACES)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument(
+        '--scorer',
+        default='compressed',
+        choices=SCORERS,
+        help=(
+            'compressed scans the codes and reranks a shortlist exactly; '
+            'exact scans the full vectors, which can be faster at low '
+            'dimensions but reads four or more times the bytes'
+        ),
+    )
+    args = parser.parse_args(argv)
+    return {
+        'source': args.source,
+        'directory': args.directory,
+        'storeFormat': args.format,
+        'subspaces': args.subspaces,
+        'queries': args.queries,
+        'scorer': args.scorer,
+    }
+
+
+if __name__ == "__main__":
+    main(**parseArguments(sys.argv[1:]))
@@ -0,0 +1,252 @@
+import argparse
+import importlib
+import json
+import sys
+import time
+from os import makedirs
+from os.path import isdir, join
+import numpy as np
+from dataHelpers import dataFileNames
+from encodingCache import EncodingCache, modelWeightHash
+
+EVALUATION_DIRECTORY = "../resources/evaluation/"
+BATCH_SIZE = 8192
+ENCODERS = [
+    {
+        'name': 'track',
+        'script': 'trackEncoder',
+        'model': "../resources/models/track/auto/",
+        'data': "../resources/data/track/all.csv",
+    },
+    {
+        'name': 'albumTracks',
+        'script': 'albumTracksEncoder',
+        'model': "../resources/models/album/tracks/auto/",
+        'data': "../resources/data/album/",
+    },
+    {
+        'name': 'artistTracks',
+        'script': 'artistTracksEncoder',
+        'model': "../resources/models/artist/tracks/auto/",
+        'data': "../resources/data/artist/",
+    },
+    {
+        'name': 'album',
+        'script': 'albumEncoder',
+        'model': "../resources/models/album/auto/",
+        'data': "../resources/data/album/all/data.csv",
+    },
+    {
+        'name': 'artist',
+        'script': 'artistEncoder',
+        'model': "../resources/models/artist/auto/",
+        'data': "../resources/data/artist/all/data.csv",
+    },
+    {
+        'name': 'multiArtist',
+        'script': 'multiArtistEncoder',
+        'model': "../resources/models/artist/multi/auto/",
+        'data': "../resources/data/profile/artists/",
+    },
+]
+
+
+def sampleNames(dataPath, sampleCount):
+    if isdir(dataPath):
+        return dataFileNames(dataPath)[:sampleCount]
+    return [str(row) for row in range(sampleCount)]
+
+
+def evaluationData(script, split='test'):
+    train, validation, test = script.loadData()
+    if split == 'test':
+        return np.asarray(test)
+    # loaders split in file order as test, validation, train
+    return np.concatenate([
+        data for data in (test, validation, train) if len(data)
+    ])
+
+
+def reconstructionErrors(
+    model,
+    data,
+    batchSize=BATCH_SIZE,
+    cache=None,
+    jitCompile=False,
+):
+    predictBatch = model.predict_on_batch
+    if jitCompile:
+        from models.jitCompilation import jitPredictor
+        predictBatch = jitPredictor(model)
+    errors = np.empty(len(data), dtype=np.float64)
+    sampleAxes = tuple(range(1, data.ndim))
+    modelHash = modelWeightHash(model) if cache is not None else None
+    for start in range(0, len(data), batchSize):
+        batch = data[start:start + batchSize].astype(np.float32)
+        if cache is not None:
+            predictions = cache.predict(model, batch, modelHash, batchSize)
+        else:
+            # predict_on_batch skips the per-call dataset setup of predict
+            predictions = np.asarray(predictBatch(batch))
+        errors[start:start + len(batch)] = np.mean(
+            (predictions - batch) ** 2,
+            axis=sampleAxes,
+        )
+    return errors
+
+
+def errorSummary(errors):
+    median, p90, p99 = np.percentile(errors, [50, 90, 99])
+    return {
+        'samples': len(errors),
+        'mse': float(np.mean(errors)),
+        'median': float(median),
+        'p90': float(p90),
+        'p99': float(p99),
+        'max': float(np.max(errors)),
+    }
+
+
+def indexFile(name):
+    return join(EVALUATION_DIRECTORY, '{}Errors.csv'.format(name))
+
+
+def saveErrorIndex(name, names, errors):
+    order = np.argsort(errors)[::-1]
+    with open(indexFile(name), 'w') as index:
+        index.write('sample,error\n')
+        for i in order:
+            index.write('{},{:.8f}\n'.format(names[i], errors[i]))
+
+
+def worstSamples(name, count=20):
+    samples = []
+    with open(indexFile(name)) as index:
+        next(index)
+        for line in index:
+            if len(samples) == count:
+                break
+            sample, _, error = line.rstrip('\n').rpartition(',')
+            samples.append((sample, float(error)))
+    return samples
+
+
+def evaluateEncoder(
+    encoder,
+    split='test',
+    batchSize=BATCH_SIZE,
+    cache=None,
+    jitCompile=False,
+):
+    # tensorflow loads here so the scoring and index import without it
+    from modelExport import loadSharedModel
+    from models.jitCompilation import checkJitPredictions
+
+    script = importlib.import_module(encoder['script'])
+    data = evaluationData(script, split)
+    model = loadSharedModel(encoder['model'])
+    if jitCompile:
+        checkJitPredictions(model, data)
+    startTime = time.perf_counter()
+    errors = reconstructionErrors(model, data, batchSize, cache, jitCompile)
+    seconds = time.perf_counter() - startTime
+
+    saveErrorIndex(
+        encoder['name'],
+        sampleNames(encoder['data'], len(data)),
+        errors,
+    )
+    summary = dict(
+        errorSummary(errors),
+        split=split,
+        seconds=seconds,
+        samplesPerSecond=len(errors) / seconds if seconds else 0,
+        jitCompile=jitCompile,
+    )
+    with open(
+        join(EVALUATION_DIRECTORY, '{}.json'.format(encoder['name'])),
+        'w',
+    ) as summaryFile:
+        json.dump(summary, summaryFile, indent=2)
+    return summary
+
+
+def main(
+    names=None,
+    split='test',
+    batchSize=BATCH_SIZE,
+    worst=0,
+    useCache=False,
+    jitCompile=False,
+):
+    makedirs(EVALUATION_DIRECTORY, exist_ok=True)
+    encoders = {encoder['name']: encoder for encoder in ENCODERS}
+    cache = EncodingCache() if useCache else None
+    for name in names or encoders:
+        if name not in encoders:
+            raise ValueError('unknown encoder {}'.format(name))
+        summary = evaluateEncoder(
+            encoders[name],
+            split,
+            batchSize,
+            cache,
+            jitCompile,
+        )
+        print('{:14s}\t{:>8d} samples\tmse: {:.6f}\tp99: {:.6f}\t'
+              '{:.0f}/s'.format(
+                  name,
+                  summary['samples'],
+                  summary['mse'],
+                  summary['p99'],
+                  summary['samplesPerSecond'],
+              ))
+        for sample, error in worstSamples(name, worst):
+            print('\t{}\t{:.6f}'.format(sample, error))
+    if cache is not None:
+        print('cache\t{}'.format(cache.report()))
+        cache.close()
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description='Score autoencoder reconstruction error per sample',
+    )
+    parser.add_argument(
+        'names',
+        nargs='*',
+        help=', '.join(encoder['name'] for encoder in ENCODERS),
+    )
+    parser.add_argument('--split', default='test', choices=['test', 'all'])
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument(
+        '--worst',
+        type=int,
+        default=0,
+        help='print the samples with the highest error',
+    )
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help=(
+            'reuse predictions for unchanged samples and weights; only '
+            'faster than predicting for encoders slower than ~10us a row'
+        ),
+    )
+    parser.add_argument(
+        '--jit',
+        action='store_true',
+        help='score through XLA compiled graphs',
+    )
+    args = parser.parse_args(argv)
+    return {
+        'names': args.names or None,
+        'split': args.split,
+        'batchSize': args.batch_size,
+        'worst': args.worst,
+        'useCache': args.cache,
+        'jitCompile': args.jit,
+    }
+
+
+if __name__ == "__main__":
+    main(**parseArguments(sys.argv[1:]))
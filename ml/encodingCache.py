@@ -0,0 +1,212 @@
+import hashlib
+import sqlite3
+import time
+from collections import OrderedDict
+from os import makedirs
+from os.path import dirname
+import numpy as np
+
+CACHE_FILE = "../resources/cache/encodings.sqlite"
+MEMORY_ENTRIES = 100000
+DISK_BYTES = 1 << 30
+# disk hits only rewrite lastUsed when it is older than this, so warm
+# runs read without writing
+LAST_USED_RESOLUTION = 3600
+
+
+def modelWeightHash(model):
+    digest = hashlib.sha256()
+    digest.update(model.to_json().encode())
+    for weight in model.get_weights():
+        digest.update(np.ascontiguousarray(weight).tobytes())
+    return digest.hexdigest()[:16]
+
+
+# predictions keyed by input content and the model's weights; hot entries
+# live in an in-memory LRU and every prediction is written through to a
+# size-bounded sqlite store, so other runs with the same weights reuse
+# them, while a weight change gives a new model hash that never hits old
+# entries, which then age out of the LRU
+class EncodingCache:
+    def __init__(
+        self,
+        cacheFile=CACHE_FILE,
+        memoryEntries=MEMORY_ENTRIES,
+        diskBytes=DISK_BYTES,
+    ):
+        makedirs(dirname(cacheFile) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(cacheFile)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS encodings ('
+            'key TEXT PRIMARY KEY, model TEXT, value BLOB, lastUsed REAL)'
+        )
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS encodingsLastUsed '
+            'ON encodings (lastUsed)'
+        )
+        self.memory = OrderedDict()
+        self.memoryEntries = memoryEntries
+        # one lookup statement per batch, up to sqlite's parameter limit
+        self.lookupRows = (
+            self.connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+            if hasattr(self.connection, 'getlimit') else 999
+        )
+        self.diskBytes = diskBytes
+        # tracked incrementally so saves do not rescan the whole table
+        self.storedBytes = self.diskSize()
+        self.stats = {
+            'memoryHits': 0,
+            'diskHits': 0,
+            'misses': 0,
+            'diskEvictions': 0,
+        }
+
+    def rowKeys(self, modelHash, inputs):
+        if len(inputs) == 0:
+            return []
+        rows = np.ascontiguousarray(inputs, dtype=np.float32)
+        rows = rows.reshape(len(rows), -1)
+        rowType = np.dtype((np.void, rows.shape[1] * rows.itemsize))
+        prefix = modelHash.encode()
+        # raw row bytes are cheaper to key on than a digest of every row,
+        # and cannot collide
+        return [prefix + row for row in rows.view(rowType).ravel().tolist()]
+
+    def remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memoryEntries:
+            self.memory.popitem(last=False)
+
+    def loadFromDisk(self, keys, outputShape):
+        found = {}
+        now = time.time()
+        for start in range(0, len(keys), self.lookupRows - 1):
+            chunk = keys[start:start + self.lookupRows - 1]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.connection.execute(
+                'SELECT key, value, lastUsed FROM encodings '
+                'WHERE key IN ({})'.format(placeholders),
+                chunk,
+            ).fetchall()
+            stale = []
+            for key, value, lastUsed in rows:
+                found[key] = np.frombuffer(
+                    value,
+                    dtype=np.float32,
+                ).reshape(outputShape)
+                if lastUsed < now - LAST_USED_RESOLUTION:
+                    stale.append(key)
+            if stale:
+                self.connection.execute(
+                    'UPDATE encodings SET lastUsed = ? '
+                    'WHERE key IN ({})'.format(','.join('?' * len(stale))),
+                    [now] + stale,
+                )
+        return found
+
+    def saveToDisk(self, modelHash, keys, values):
+        now = time.time()
+        rows = [
+            (key, modelHash, value.astype(np.float32).tobytes(), now)
+            for key, value in zip(keys, values)
+        ]
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO encodings VALUES (?, ?, ?, ?)',
+            rows,
+        )
+        self.storedBytes += sum(
+            len(key) + len(value) for key, _, value, _ in rows
+        )
+        self.evict()
+        self.connection.commit()
+
+    def diskSize(self):
+        return self.connection.execute(
+            'SELECT COALESCE(SUM(LENGTH(value) + LENGTH(key)), 0) '
+            'FROM encodings'
+        ).fetchone()[0]
+
+    def evict(self):
+        if self.storedBytes <= self.diskBytes:
+            return
+        # drop least recently used entries down to 90% to avoid thrashing
+        excess = self.storedBytes - int(self.diskBytes * 0.9)
+        rows = self.connection.execute(
+            'SELECT key, LENGTH(value) + LENGTH(key) FROM encodings '
+            'ORDER BY lastUsed'
+        )
+        evicted = []
+        for key, entrySize in rows:
+            if excess <= 0:
+                break
+            evicted.append((key,))
+            excess -= entrySize
+            self.storedBytes -= entrySize
+        rows.close()
+        self.connection.executemany(
+            'DELETE FROM encodings WHERE key = ?',
+            evicted,
+        )
+        self.stats['diskEvictions'] += len(evicted)
+
+    def predict(self, model, inputs, modelHash=None, batchSize=4096):
+        inputs = np.asarray(inputs)
+        modelHash = modelHash or modelWeightHash(model)
+        outputShape = tuple(model.output_shape[1:])
+        keys = self.rowKeys(modelHash, inputs)
+        outputs = np.empty((len(inputs),) + outputShape, dtype=np.float32)
+
+        missingRows = []
+        for row, key in enumerate(keys):
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                outputs[row] = self.memory[key]
+                self.stats['memoryHits'] += 1
+            else:
+                missingRows.append(row)
+
+        onDisk = self.loadFromDisk(
+            [keys[row] for row in missingRows],
+            outputShape,
+        )
+        uncachedRows = []
+        for row in missingRows:
+            if keys[row] in onDisk:
+                outputs[row] = onDisk[keys[row]]
+                self.remember(keys[row], outputs[row].copy())
+                self.stats['diskHits'] += 1
+            else:
+                uncachedRows.append(row)
+
+        self.stats['misses'] += len(uncachedRows)
+        if uncachedRows:
+            predictions = model.predict(
+                inputs[uncachedRows],
+                batch_size=batchSize,
+            )
+            outputs[uncachedRows] = predictions
+            uncachedKeys = [keys[row] for row in uncachedRows]
+            for key, value in zip(uncachedKeys, outputs[uncachedRows]):
+                self.remember(key, value)
+            self.saveToDisk(modelHash, uncachedKeys, outputs[uncachedRows])
+        else:
+            self.connection.commit()
+        return outputs
+
+    def hitRate(self):
+        hits = self.stats['memoryHits'] + self.stats['diskHits']
+        lookups = hits + self.stats['misses']
+        return hits / lookups if lookups else 0
+
+    def report(self):
+        return dict(
+            self.stats,
+            hitRate=self.hitRate(),
+            memoryEntries=len(self.memory),
+            diskBytes=self.storedBytes,
+        )
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
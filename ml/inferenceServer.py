@@ -0,0 +1,273 @@
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+MODELS = {
+    'track': "../resources/models/track/encoder/",
+    'albumTracks': "../resources/models/album/tracks/encoder/",
+    'artistTracks': "../resources/models/artist/tracks/encoder/",
+    'album': "../resources/models/album/encoder/",
+    'artist': "../resources/models/artist/encoder/",
+    'multiArtist': "../resources/models/artist/multi/encoder/",
+    'taste': "../resources/models/taste/",
+}
+MAX_BATCH_SIZE = 256
+MAX_DELAY_MILLISECONDS = 5
+REQUEST_TIMEOUT = 30
+
+
+# a single thread owns the model; it waits for the first request, then
+# collects until the batch is full or that request has waited maxDelay
+class MicroBatcher:
+    def __init__(
+        self,
+        model,
+        maxBatchSize=MAX_BATCH_SIZE,
+        maxDelay=MAX_DELAY_MILLISECONDS / 1000,
+        jitCompile=False,
+    ):
+        self.model = model
+        self.predictBatch = model.predict_on_batch
+        if jitCompile:
+            from models.jitCompilation import jitPredictor
+            self.predictBatch = jitPredictor(model)
+        self.inputShape = tuple(model.input_shape[1:])
+        self.maxBatchSize = maxBatchSize
+        self.maxDelay = maxDelay
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'rows': 0,
+            'batches': 0,
+            'maxQueueDepth': 0,
+            'queueSeconds': 0,
+            'predictSeconds': 0,
+            'batchSizes': {},
+        }
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def submit(self, inputs):
+        inputs = np.asarray(inputs, dtype=np.float32)
+        # a single item may be sent without its batch dimension
+        if inputs.shape == self.inputShape:
+            inputs = inputs[None]
+        if any(
+            expected is not None and expected != actual
+            for expected, actual in zip(self.inputShape, inputs.shape[1:])
+        ) or inputs.ndim != len(self.inputShape) + 1:
+            raise ValueError('expected inputs of shape (n, {}), got {}'.format(
+                ', '.join(str(dimension) for dimension in self.inputShape),
+                inputs.shape,
+            ))
+        future = Future()
+        self.requests.put((inputs, future, time.perf_counter()))
+        with self.lock:
+            self.stats['maxQueueDepth'] = max(
+                self.stats['maxQueueDepth'],
+                self.requests.qsize(),
+            )
+        return future
+
+    def collect(self):
+        batch = [self.requests.get()]
+        rows = len(batch[0][0])
+        deadline = batch[0][2] + self.maxDelay
+        while rows < self.maxBatchSize:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            rows += len(request[0])
+        return batch
+
+    def run(self):
+        while True:
+            groups = {}
+            # variable length sequences only stack with others of their
+            # length, so each length gets its own predict
+            for request in self.collect():
+                groups.setdefault(request[0].shape[1:], []).append(request)
+            for batch in groups.values():
+                self.predict(batch)
+
+    def predict(self, batch):
+        startTime = time.perf_counter()
+        try:
+            outputs = np.asarray(self.predictBatch(
+                np.concatenate([inputs for inputs, _, _ in batch]),
+            ))
+        except Exception as error:
+            for _, future, _ in batch:
+                future.set_exception(error)
+            return
+        predictSeconds = time.perf_counter() - startTime
+
+        start = 0
+        for inputs, future, _ in batch:
+            future.set_result(outputs[start:start + len(inputs)])
+            start += len(inputs)
+        self.record(batch, start, startTime, predictSeconds)
+
+    def record(self, batch, rows, startTime, predictSeconds):
+        with self.lock:
+            self.stats['requests'] += len(batch)
+            self.stats['rows'] += rows
+            self.stats['batches'] += 1
+            self.stats['queueSeconds'] += sum(
+                startTime - queuedAt for _, _, queuedAt in batch
+            )
+            self.stats['predictSeconds'] += predictSeconds
+            batchSizes = self.stats['batchSizes']
+            batchSizes[rows] = batchSizes.get(rows, 0) + 1
+
+    def metrics(self):
+        with self.lock:
+            stats = dict(self.stats, batchSizes=dict(self.stats['batchSizes']))
+        batches = max(stats['batches'], 1)
+        requests = max(stats['requests'], 1)
+        return dict(
+            stats,
+            queueDepth=self.requests.qsize(),
+            meanBatchRows=stats['rows'] / batches,
+            meanRequestsPerBatch=stats['requests'] / batches,
+            meanQueueMilliseconds=stats['queueSeconds'] / requests * 1000,
+            meanPredictMilliseconds=stats['predictSeconds'] / batches * 1000,
+        )
+
+
+class InferenceServer(ThreadingHTTPServer):
+    # bursts of concurrent callers are the point, so allow a deep backlog
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    batchers = {}
+
+    def sendJson(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self.sendJson(200, {
+                name: batcher.metrics()
+                for name, batcher in self.batchers.items()
+            })
+        elif self.path == '/health':
+            self.sendJson(200, {'models': sorted(self.batchers)})
+        else:
+            self.sendJson(404, {'error': 'unknown path {}'.format(self.path)})
+
+    def do_POST(self):
+        prefix, _, name = self.path.rpartition('/')
+        if prefix != '/predict' or name not in self.batchers:
+            self.sendJson(404, {'error': 'unknown model path {}'.format(
+                self.path,
+            )})
+            return
+        try:
+            body = json.loads(self.rfile.read(
+                int(self.headers.get('Content-Length', 0)),
+            ))
+            if not isinstance(body, dict):
+                raise ValueError('expected a JSON object with inputs')
+            future = self.batchers[name].submit(body['inputs'])
+        except (KeyError, TypeError, ValueError) as error:
+            self.sendJson(400, {'error': str(error)})
+            return
+        try:
+            outputs = future.result(timeout=REQUEST_TIMEOUT)
+        except Exception as error:
+            self.sendJson(500, {'error': str(error)})
+            return
+        self.sendJson(200, {'outputs': outputs.tolist()})
+
+    def log_message(self, *args):
+        pass
+
+
+def main(
+    host='127.0.0.1',
+    port=8765,
+    names=None,
+    maxBatchSize=MAX_BATCH_SIZE,
+    maxDelayMilliseconds=MAX_DELAY_MILLISECONDS,
+    jitCompile=False,
+):
+    # tensorflow loads here so the batching and handlers import without it
+    from modelExport import loadSharedModel
+    from models.jitCompilation import checkJitPredictions, randomInputs
+
+    for name in names or MODELS:
+        if name not in MODELS:
+            raise ValueError('unknown model {}'.format(name))
+        model = loadSharedModel(MODELS[name])
+        if jitCompile:
+            checkJitPredictions(model, randomInputs(model))
+        InferenceHandler.batchers[name] = MicroBatcher(
+            model,
+            maxBatchSize,
+            maxDelayMilliseconds / 1000,
+            jitCompile,
+        )
+    server = InferenceServer((host, port), InferenceHandler)
+    print('serving {} on http://{}:{}'.format(
+        ', '.join(sorted(InferenceHandler.batchers)),
+        host,
+        port,
+    ))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description='Serve encoder and taste predictions with micro-batching',
+    )
+    parser.add_argument('names', nargs='*', help=', '.join(MODELS))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument(
+        '--max-delay',
+        type=float,
+        default=MAX_DELAY_MILLISECONDS,
+        help='milliseconds the first request in a batch may wait',
+    )
+    parser.add_argument(
+        '--jit',
+        action='store_true',
+        help='run predictions through XLA compiled graphs',
+    )
+    args = parser.parse_args(argv)
+    return {
+        'host': args.host,
+        'port': args.port,
+        'names': args.names or None,
+        'maxBatchSize': args.max_batch_size,
+        'maxDelayMilliseconds': args.max_delay,
+        'jitCompile': args.jit,
+    }
+
+
+if __name__ == "__main__":
+    main(**parseArguments(sys.argv[1:]))
@@ -0,0 +1,231 @@
+import argparse
+import atexit
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from commandLine import userPath
+
+MEMORY_PROFILE_VARIABLE = 'MUCRITIC_MEMORY_PROFILE'
+MEMORY_PROFILE_OWNER_VARIABLE = 'MUCRITIC_MEMORY_PROFILE_OWNER'
+SAMPLE_INTERVAL = 0.05
+TIMELINE_RESOLUTION = 1 << 20
+
+activeProfiler = None
+
+
+def residentBytes():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # without procfs only the peak is available, which still bounds it
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryProfiler:
+    def __init__(self, reportFile, sampleInterval=SAMPLE_INTERVAL):
+        self.reportFile = reportFile
+        self.sampleInterval = sampleInterval
+        self.startTime = time.perf_counter()
+        self.lock = threading.Lock()
+        self.stack = []
+        self.stages = {}
+        self.timeline = []
+        tracemalloc.start()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+        self.sampler.start()
+        atexit.register(self.save)
+
+    def sample(self):
+        while True:
+            rss = residentBytes()
+            with self.lock:
+                for entry in self.stack:
+                    entry['peakRss'] = max(entry['peakRss'], rss)
+                stageName = self.stack[-1]['name'] if self.stack else None
+                if (
+                    not self.timeline or
+                    self.timeline[-1][2] != stageName or
+                    abs(self.timeline[-1][1] - rss) >= TIMELINE_RESOLUTION
+                ):
+                    self.timeline.append((
+                        time.perf_counter() - self.startTime,
+                        rss,
+                        stageName,
+                    ))
+            time.sleep(self.sampleInterval)
+
+    @contextmanager
+    def stage(self, name):
+        rss = residentBytes()
+        with self.lock:
+            traced, tracedPeak = tracemalloc.get_traced_memory()
+            if self.stack:
+                parent = self.stack[-1]
+                parent['peakTraced'] = max(parent['peakTraced'], tracedPeak)
+            tracemalloc.reset_peak()
+            entry = {
+                'name': name,
+                'start': time.perf_counter(),
+                'startTraced': traced,
+                'peakTraced': traced,
+                'startRss': rss,
+                'peakRss': rss,
+            }
+            self.stack.append(entry)
+        try:
+            yield
+        finally:
+            rss = residentBytes()
+            with self.lock:
+                traced, tracedPeak = tracemalloc.get_traced_memory()
+                entry['peakTraced'] = max(entry['peakTraced'], tracedPeak)
+                entry['peakRss'] = max(entry['peakRss'], rss)
+                self.stack.pop()
+                if self.stack:
+                    parent = self.stack[-1]
+                    parent['peakTraced'] = max(
+                        parent['peakTraced'],
+                        entry['peakTraced'],
+                    )
+                self.record(entry, traced, rss)
+            if not self.stack:
+                self.save()
+
+    def record(self, entry, traced, rss):
+        stage = self.stages.setdefault(entry['name'], {
+            'calls': 0,
+            'seconds': 0,
+            'peakTracedBytes': 0,
+            'retainedTracedBytes': 0,
+            'peakRssBytes': 0,
+            'rssGrowthBytes': 0,
+        })
+        stage['calls'] += 1
+        stage['seconds'] += time.perf_counter() - entry['start']
+        stage['peakTracedBytes'] = max(
+            stage['peakTracedBytes'],
+            entry['peakTraced'] - entry['startTraced'],
+        )
+        stage['retainedTracedBytes'] += traced - entry['startTraced']
+        stage['peakRssBytes'] = max(stage['peakRssBytes'], entry['peakRss'])
+        stage['rssGrowthBytes'] = max(
+            stage['rssGrowthBytes'],
+            entry['peakRss'] - entry['startRss'],
+        )
+
+    def save(self):
+        with self.lock:
+            report = {
+                'stages': self.stages,
+                'rssTimeline': self.timeline,
+            }
+            # a worker killed mid-write must not leave a truncated report,
+            # so the new one replaces the old only once it is complete
+            descriptor, temporaryFile = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.reportFile)),
+                suffix='.tmp',
+            )
+            try:
+                with os.fdopen(descriptor, 'w') as reportFile:
+                    json.dump(report, reportFile, indent=2)
+                os.replace(temporaryFile, self.reportFile)
+            except BaseException:
+                os.remove(temporaryFile)
+                raise
+
+
+def processReportFile(reportFile):
+    # spawned workers inherit the variable, so each writes its own report
+    # next to the first profiled process's instead of overwriting it
+    owner = os.environ.setdefault(
+        MEMORY_PROFILE_OWNER_VARIABLE,
+        str(os.getpid()),
+    )
+    if owner == str(os.getpid()):
+        return reportFile
+    base, extension = os.path.splitext(reportFile)
+    return '{}.{}{}'.format(base, os.getpid(), extension)
+
+
+def memoryProfiler():
+    global activeProfiler
+    reportFile = os.environ.get(MEMORY_PROFILE_VARIABLE)
+    if activeProfiler is None and reportFile:
+        activeProfiler = MemoryProfiler(processReportFile(reportFile))
+    return activeProfiler
+
+
+def profiledStage(name):
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = memoryProfiler()
+            if profiler is None:
+                return function(*args, **kwargs)
+            with profiler.stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def megabytes(byteCount):
+    return byteCount / (1 << 20)
+
+
+def main(report, baseline=None):
+    with open(report) as reportFile:
+        stages = json.load(reportFile)['stages']
+    baselineStages = {}
+    if baseline is not None:
+        with open(baseline) as baselineFile:
+            baselineStages = json.load(baselineFile)['stages']
+
+    print('{:24s}\t{:>6s}\t{:>10s}\t{:>12s}\t{:>10s}\t{:>10s}'.format(
+        'stage',
+        'calls',
+        'seconds',
+        'traced MB',
+        'rss MB',
+        'rss delta',
+    ))
+    for name, stage in sorted(
+        stages.items(),
+        key=lambda item: item[1]['peakRssBytes'],
+        reverse=True,
+    ):
+        rssDelta = ''
+        if name in baselineStages:
+            rssDelta = '{:+.1f}'.format(megabytes(
+                stage['peakRssBytes'] - baselineStages[name]['peakRssBytes']
+            ))
+        print('{:24s}\t{:>6d}\t{:>10.2f}\t{:>12.1f}\t{:>10.1f}\t{:>10s}'
+              .format(
+                  name,
+                  stage['calls'],
+                  stage['seconds'],
+                  megabytes(stage['peakTracedBytes']),
+                  megabytes(stage['peakRssBytes']),
+                  rssDelta,
+              ))
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description='Print a per-stage peak memory report',
+    )
+    parser.add_argument('report', type=userPath)
+    parser.add_argument('--baseline', type=userPath)
+    args = parser.parse_args(argv)
+    return {'report': args.report, 'baseline': args.baseline}
+
+
+if __name__ == "__main__":
+    main(**parseArguments(sys.argv[1:]))
@@ -0,0 +1,107 @@
+import argparse
+import ast
+import importlib
+import os
+import sys
+import time
+from commandLine import ML_DIRECTORY, TIMING_LOG_VARIABLE
+from memoryProfiler import MEMORY_PROFILE_VARIABLE, profiledStage
+
+START_TIME = time.perf_counter()
+COMMANDS = [
+    'trackEncoder',
+    'albumTracksEncoder',
+    'artistTracksEncoder',
+    'albumEncoder',
+    'artistEncoder',
+    'multiArtistEncoder',
+    'tasteLearner',
+    'tasteMapper',
+    'tasteNormalizer',
+    'encoderEvaluation',
+    'inferenceServer',
+    'embeddingStore',
+    'tasteReport',
+    'memoryProfiler',
+    'syntheticData',
+    'benchmark',
+    'regressionGate',
+    'distillTracksEncoder',
+    'pipeline',
+]
+
+
+def parseSetting(setting):
+    name, _, value = setting.partition('=')
+    try:
+        return name, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name, value
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run an ml stage, importing only what it needs',
+    )
+    parser.add_argument('command', choices=COMMANDS)
+    parser.add_argument(
+        '--set',
+        action='append',
+        default=[],
+        metavar='NAME=VALUE',
+        help='keyword argument passed to the command\'s main()',
+    )
+    parser.add_argument(
+        '--timing',
+        action='store_true',
+        help='report import and run time',
+    )
+    parser.add_argument(
+        '--timing-log',
+        metavar='PATH',
+        help='append per-epoch and per-run training timings as JSON lines',
+    )
+    parser.add_argument(
+        '--memory-profile',
+        metavar='PATH',
+        help='write per-stage peak memory to a JSON report',
+    )
+    args, commandArgs = parser.parse_known_args()
+
+    if args.timing_log:
+        os.environ[TIMING_LOG_VARIABLE] = os.path.abspath(args.timing_log)
+    if args.memory_profile:
+        os.environ[MEMORY_PROFILE_VARIABLE] = os.path.abspath(
+            args.memory_profile,
+        )
+    if ML_DIRECTORY not in sys.path:
+        sys.path.insert(0, ML_DIRECTORY)
+
+    importStart = time.perf_counter()
+    command = importlib.import_module(args.command)
+    importSeconds = time.perf_counter() - importStart
+
+    # commands resolve typed paths while parsing, so parse before moving
+    # to ml/, which their default paths are relative to
+    kwargs = dict(parseSetting(setting) for setting in args.set)
+    if hasattr(command, 'parseArguments'):
+        kwargs.update(command.parseArguments(commandArgs))
+    elif commandArgs:
+        parser.error('unrecognized arguments: {}'.format(
+            ' '.join(commandArgs),
+        ))
+    os.chdir(ML_DIRECTORY)
+
+    runStart = time.perf_counter()
+    result = profiledStage(args.command)(command.main)(**kwargs)
+    if args.timing:
+        print('startup: {:.3f}s\timport: {:.3f}s\trun: {:.3f}s'.format(
+            importStart - START_TIME,
+            importSeconds,
+            time.perf_counter() - runStart,
+        ), file=sys.stderr)
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import tensorflow as tf
+import tensorflowjs as tfjs
+from tensorflowjs.converters import common, keras_h5_conversion
+
+QUANTIZATION_DTYPES = ['float16', 'uint8']
+
+
+def pruneWeights(model, pruneFraction):
+    if pruneFraction <= 0:
+        return
+    for layer in model.layers:
+        weights = layer.get_weights()
+        if not weights:
+            continue
+        prunedWeights = []
+        for weight in weights:
+            # biases are tiny and carry offsets, so only kernels are pruned
+            if weight.ndim > 1:
+                threshold = np.quantile(np.abs(weight), pruneFraction)
+                weight = np.where(np.abs(weight) < threshold, 0, weight)
+            prunedWeights.append(weight)
+        layer.set_weights(prunedWeights)
+
+
+def quantizeArray(weight, quantization):
+    if quantization == 'float16':
+        return weight.astype(np.float16).astype(np.float32)
+    if quantization == 'uint8':
+        low = weight.min()
+        scale = (weight.max() - low) / 255
+        if scale == 0:
+            return weight
+        return (np.round((weight - low) / scale) * scale + low).astype(
+            np.float32,
+        )
+    return weight
+
+
+def quantizedCopy(model, quantization):
+    copy = tf.keras.models.clone_model(model)
+    copy.set_weights([
+        quantizeArray(weight, quantization)
+        for weight in model.get_weights()
+    ])
+    return copy
+
+
+def predictionError(model, features, labels, batchSize=4096):
+    predictions = model.predict(features, batch_size=batchSize)
+    return float(np.mean((predictions - labels) ** 2))
+
+
+def artifactSize(directory):
+    return sum(
+        os.path.getsize(os.path.join(directory, filename))
+        for filename in os.listdir(directory)
+    )
+
+
+def loadSharedModel(directory, customObjects=None):
+    with tf.keras.utils.custom_object_scope(customObjects or {}):
+        return tfjs.converters.load_keras_model(
+            os.path.join(directory, 'model.json'),
+        )
+
+
+def loadTime(directory, customObjects=None):
+    startTime = time.perf_counter()
+    loadSharedModel(directory, customObjects)
+    return time.perf_counter() - startTime
+
+
+def layerWeightGroups(model):
+    h5Path = os.path.join(tempfile.mkdtemp(), 'model.h5')
+    model.save(h5Path)
+    toTfjsFormat = keras_h5_conversion.h5_merged_saved_model_to_tfjs_format
+    topology, groups = toTfjsFormat(h5Path, split_by_layer=True)
+    shutil.rmtree(os.path.dirname(h5Path))
+    return topology, groups
+
+
+def groupKey(group):
+    digest = hashlib.sha256()
+    for weight in group:
+        digest.update(weight['name'].encode())
+        digest.update(np.ascontiguousarray(weight['data']).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def saveSharedModels(models, quantization=None):
+    sharedDirectory = os.path.join(
+        os.path.commonpath([os.path.abspath(path) for path in models]),
+        'shared',
+    )
+    if os.path.isdir(sharedDirectory):
+        shutil.rmtree(sharedDirectory)
+
+    writtenGroups = {}
+    for savePath, model in models.items():
+        topology, groups = layerWeightGroups(model)
+        manifest = []
+        for group in groups:
+            key = groupKey(group)
+            if key not in writtenGroups:
+                groupDirectory = os.path.join(sharedDirectory, key)
+                os.makedirs(groupDirectory)
+                writtenGroups[key] = tfjs.write_weights.write_weights(
+                    [group],
+                    groupDirectory,
+                    write_manifest=False,
+                    quantization_dtype_map=(
+                        None if quantization is None
+                        else {quantization: True}
+                    ),
+                )[0]
+            relativeDirectory = os.path.relpath(
+                os.path.join(sharedDirectory, key),
+                os.path.abspath(savePath),
+            )
+            entry = dict(writtenGroups[key])
+            entry['paths'] = [
+                '/'.join([relativeDirectory.replace(os.sep, '/'), path])
+                for path in entry['paths']
+            ]
+            manifest.append(entry)
+
+        os.makedirs(savePath, exist_ok=True)
+        for filename in os.listdir(savePath):
+            if filename.endswith('.bin'):
+                os.remove(os.path.join(savePath, filename))
+        generatedBy = 'keras v{}'.format(topology.get('keras_version'))
+        with open(os.path.join(savePath, 'model.json'), 'w') as modelFile:
+            json.dump({
+                'format': 'layers-model',
+                'generatedBy': generatedBy,
+                'convertedBy': common.get_converted_by(),
+                'modelTopology': topology,
+                'weightsManifest': manifest,
+            }, modelFile)
+    return sharedDirectory
+
+
+def exportModels(
+    models,
+    quantization=None,
+    pruneFraction=0,
+    evaluationModel=None,
+    evaluationFeatures=None,
+    evaluationLabels=None,
+    customObjects=None,
+    sharedWeights=False,
+    verbose=1,
+):
+    if quantization is not None and quantization not in QUANTIZATION_DTYPES:
+        raise ValueError('unknown quantization {}'.format(quantization))
+
+    report = {'quantization': quantization, 'pruneFraction': pruneFraction}
+    evaluate = evaluationModel is not None and evaluationFeatures is not None
+    if evaluate:
+        report['error'] = predictionError(
+            evaluationModel,
+            evaluationFeatures,
+            evaluationLabels,
+        )
+
+    # exported models share layers, so pruning one prunes them all
+    for model in models.values():
+        pruneWeights(model, pruneFraction)
+
+    if evaluate:
+        compressedModel = (
+            evaluationModel if quantization is None
+            else quantizedCopy(evaluationModel, quantization)
+        )
+        report['compressedError'] = predictionError(
+            compressedModel,
+            evaluationFeatures,
+            evaluationLabels,
+        )
+
+    report['artifacts'] = {}
+    if sharedWeights:
+        sharedDirectory = saveSharedModels(models, quantization)
+        report['artifacts'][sharedDirectory] = {
+            'bytes': sum(
+                artifactSize(os.path.join(sharedDirectory, key))
+                for key in os.listdir(sharedDirectory)
+            ),
+            'loadSeconds': None,
+        }
+    for savePath, model in models.items():
+        if not sharedWeights:
+            tfjs.converters.save_keras_model(
+                model,
+                savePath,
+                quantization_dtype_map=(
+                    None if quantization is None else {quantization: True}
+                ),
+            )
+        report['artifacts'][savePath] = {
+            'bytes': artifactSize(savePath),
+            'loadSeconds': loadTime(savePath, customObjects),
+        }
+
+    if verbose > 0:
+        if evaluate:
+            print('error: {:.6f}\tcompressed error: {:.6f}\tdelta: {:+.6f}'
+                  .format(
+                      report['error'],
+                      report['compressedError'],
+                      report['compressedError'] - report['error'],
+                  ))
+        for savePath, artifact in report['artifacts'].items():
+            print('{}\t{:.1f}KB\tload: {}'.format(
+                savePath,
+                artifact['bytes'] / 1024,
+                '-' if artifact['loadSeconds'] is None
+                else '{:.3f}s'.format(artifact['loadSeconds']),
+            ))
+    return report
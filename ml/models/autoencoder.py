@@ -1,6 +1,10 @@
 from tensorflow.keras import layers, optimizers, regularizers, Model
+from memoryProfiler import profiledStage
+from models.jitCompilation import checkJitCompilation
+from models.trainingTimer import TrainingTimer
 
 
+@profiledStage('autoencoder')
 def autoencoder(
     trainingData,
     validationData,
@@ -18,6 +22,8 @@ def autoencoder(
     testingData=None,
     validationSteps=3,
     regularizationRate=0,
+    timingLog=None,
+    jitCompile=False,
 ):
     inputDimension = len(trainingData[0])
     inputData = layers.Input(shape=(inputDimension,))
@@ -56,11 +62,20 @@ def autoencoder(
         optimizer=optimizers.Nadam(learningRate),
         loss=lossFunction,
         metrics=metrics,
+        jit_compile=jitCompile,
     )
     if trainingLabels is None:
         trainingLabels = trainingData
     if validationLabels is None:
         validationLabels = validationData
+    if jitCompile:
+        checkJitCompilation(
+            autoencoder,
+            lossFunction,
+            validationData,
+            validationLabels,
+        )
+    timer = TrainingTimer('autoencoder', len(trainingData), timingLog)
     autoencoder.fit(
         trainingData,
         trainingLabels,
@@ -69,5 +84,7 @@ def autoencoder(
         shuffle=True,
         validation_data=(validationData, validationLabels),
         validation_steps=validationSteps,
+        callbacks=timer.callbacks(),
     )
+    timer.finish()
     return autoencoder, encoder, decoder
@@ -0,0 +1,59 @@
+import numpy as np
+import tensorflow as tf
+from dataHelpers import bucketBatches, shardBatches
+
+
+def workerShard(strategy):
+    resolver = getattr(strategy, 'cluster_resolver', None)
+    if resolver is None or resolver.task_id is None:
+        return 0, 1
+    workers = resolver.cluster_spec().as_dict().get('worker', [])
+    return resolver.task_id, max(len(workers), 1)
+
+
+def bucketedDataset(
+    sequences,
+    batchSize,
+    labels=None,
+    bucketWidth=1,
+    shuffle=True,
+    shardIndex=0,
+    shardCount=1,
+    seed=0,
+):
+    featureCount = len(sequences[0][0])
+    labelShape = (
+        (None, None, featureCount) if labels is None
+        else (None, len(labels[0]))
+    )
+    epochs = [0]
+
+    def generator():
+        # every worker seeds the same way, so they agree on the batches
+        # before each takes its own shard of them
+        batches = bucketBatches(
+            sequences,
+            batchSize,
+            labels=labels,
+            bucketWidth=bucketWidth,
+            shuffle=shuffle,
+            generator=np.random.default_rng([seed, epochs[0]]),
+        )
+        epochs[0] += 1
+        for batch in shardBatches(batches, shardIndex, shardCount):
+            yield batch
+
+    dataset = tf.data.Dataset.from_generator(
+        generator,
+        output_signature=(
+            tf.TensorSpec(shape=(None, None, featureCount), dtype=tf.float32),
+            tf.TensorSpec(shape=labelShape, dtype=tf.float32),
+        ),
+    )
+    if shardCount > 1:
+        options = tf.data.Options()
+        options.experimental_distribute.auto_shard_policy = (
+            tf.data.experimental.AutoShardPolicy.OFF
+        )
+        dataset = dataset.with_options(options)
+    return dataset.prefetch(2)
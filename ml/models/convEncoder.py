@@ -0,0 +1,70 @@
+import tensorflow as tf
+from tensorflow.keras import layers, Model
+from memoryProfiler import profiledStage
+from models.jitCompilation import checkJitCompilation
+from models.trainingTimer import TrainingTimer
+
+
+@profiledStage('convEncoder')
+def convEncoder(
+    trainFeatures,
+    trainCodes,
+    validationFeatures,
+    validationCodes,
+    filters=64,
+    kernelSize=3,
+    activation='relu',
+    batchSize=256,
+    epochs=200,
+    learningRate=0.001,
+    lossFunction='mse',
+    metrics=['mae'],
+    validationSteps=3,
+    timingLog=None,
+    jitCompile=False,
+):
+    sequenceLength = len(trainFeatures[0])
+    featureCount = len(trainFeatures[0][0])
+    encodingDimension = len(trainCodes[0])
+    inputs = tf.keras.Input(shape=(sequenceLength, featureCount))
+    x = layers.Conv1D(
+        filters,
+        kernelSize,
+        padding='same',
+        activation=activation,
+    )(inputs)
+    x = layers.Flatten()(x)
+    # LSTM codes are bounded by the output gate's tanh, so match that range
+    x = layers.Dense(
+        encodingDimension,
+        activation='tanh',
+    )(x)
+
+    model = Model(inputs, x)
+
+    model.compile(
+        optimizer=tf.optimizers.Nadam(learningRate),
+        loss=lossFunction,
+        metrics=metrics,
+        jit_compile=jitCompile,
+    )
+    if jitCompile:
+        checkJitCompilation(
+            model,
+            lossFunction,
+            validationFeatures,
+            validationCodes,
+        )
+    timer = TrainingTimer('convEncoder', len(trainFeatures), timingLog)
+    model.fit(
+        trainFeatures,
+        trainCodes,
+        batch_size=batchSize,
+        epochs=epochs,
+        validation_data=(validationFeatures, validationCodes),
+        validation_steps=validationSteps,
+        shuffle=True,
+        callbacks=timer.callbacks(),
+    )
+    timer.finish()
+    return model
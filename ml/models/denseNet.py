@@ -1,7 +1,102 @@
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras import layers, Model
+from memoryProfiler import profiledStage
+from models.jitCompilation import checkJitCompilation
+from models.trainingTimer import TrainingTimer
 
 
+def memberGlorotUniform(shape, dtype=None):
+    # glorot over the stacked kernel would count every member in its fans,
+    # so each member is drawn with the limits of its own Dense kernel
+    limit = np.sqrt(6 / (shape[-2] + shape[-1]))
+    return tf.random.uniform(shape, -limit, limit, dtype=dtype or tf.float32)
+
+
+# one stacked kernel per ensemble member, so every member trains in the
+# same matmul; outputs are (batch, members, units)
+class EnsembleDense(layers.Layer):
+    def __init__(
+        self,
+        members,
+        units,
+        activation=None,
+        kernel_regularizer=None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.members = members
+        self.units = units
+        self.activation = tf.keras.activations.get(activation)
+        self.kernel_regularizer = tf.keras.regularizers.get(
+            kernel_regularizer,
+        )
+
+    def build(self, inputShape):
+        self.kernel = self.add_weight(
+            name='kernel',
+            shape=(self.members, inputShape[-1], self.units),
+            initializer=memberGlorotUniform,
+            regularizer=self.kernel_regularizer,
+        )
+        self.bias = self.add_weight(
+            name='bias',
+            shape=(self.members, self.units),
+            initializer='zeros',
+        )
+
+    def call(self, inputs):
+        if len(inputs.shape) == 2:
+            outputs = tf.einsum('bi,miu->bmu', inputs, self.kernel)
+        else:
+            outputs = tf.einsum('bmi,miu->bmu', inputs, self.kernel)
+        return self.activation(outputs + self.bias)
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({
+            'members': self.members,
+            'units': self.units,
+            'activation': tf.keras.activations.serialize(self.activation),
+            'kernel_regularizer': tf.keras.regularizers.serialize(
+                self.kernel_regularizer,
+            ) if self.kernel_regularizer else None,
+        })
+        return config
+
+
+def memberModels(ensemble):
+    ensembleLayers = [
+        layer for layer in ensemble.layers if isinstance(layer, EnsembleDense)
+    ]
+    members = []
+    for member in range(ensembleLayers[0].members):
+        inputs = tf.keras.Input(shape=ensemble.input_shape[1:])
+        x = inputs
+        for ensembleLayer in ensembleLayers:
+            kernel, bias = ensembleLayer.get_weights()
+            dense = layers.Dense(
+                ensembleLayer.units,
+                activation=ensembleLayer.activation,
+            )
+            x = dense(x)
+            dense.set_weights([kernel[member], bias[member]])
+        members.append(Model(inputs, x))
+    return members
+
+
+def averagedModel(members):
+    inputs = tf.keras.Input(shape=members[0].input_shape[1:])
+    outputs = []
+    for member in members:
+        x = inputs
+        for layer in member.layers[1:]:
+            x = layer(x)
+        outputs.append(x)
+    return Model(inputs, layers.Average()(outputs))
+
+
+@profiledStage('denseNet')
 def denseNet(
     trainFeatures,
     trainLabels,
@@ -18,21 +113,48 @@ def denseNet(
     testingData=None,
     validationSteps=3,
     regularizationRate=0.1,
+    timingLog=None,
+    ensembleSize=1,
+    jitCompile=False,
 ):
     inputDimension = len(trainFeatures[0])
     outputDimension = len(trainLabels[0])
     inputs = tf.keras.Input(shape=(inputDimension,))
     x = inputs
-    for dimension in intermediateDimensions:
+    if ensembleSize > 1:
+        # member losses are averaged, so scale the summed penalty to match
+        for dimension in intermediateDimensions:
+            x = EnsembleDense(
+                ensembleSize,
+                dimension,
+                activation=activation,
+            )(x)
+        x = layers.Dropout(dropoutRate)(x)
+        x = EnsembleDense(
+            ensembleSize,
+            outputDimension,
+            kernel_regularizer=tf.keras.regularizers.l2(
+                regularizationRate / ensembleSize,
+            ),
+        )(x)
+        # every member is fit against the same labels
+        trainLabels = np.repeat(trainLabels[:, None], ensembleSize, 1)
+        validationLabels = np.repeat(
+            validationLabels[:, None],
+            ensembleSize,
+            1,
+        )
+    else:
+        for dimension in intermediateDimensions:
+            x = layers.Dense(
+                dimension,
+                activation=activation,
+            )(x)
+        x = layers.Dropout(dropoutRate)(x)
         x = layers.Dense(
-            dimension,
-            activation=activation,
+            outputDimension,
+            kernel_regularizer=tf.keras.regularizers.l2(regularizationRate),
         )(x)
-    x = layers.Dropout(dropoutRate)(x)
-    x = layers.Dense(
-        outputDimension,
-        kernel_regularizer=tf.keras.regularizers.l2(regularizationRate),
-    )(x)
 
     model = Model(inputs, x)
 
@@ -40,7 +162,16 @@ def denseNet(
         optimizer=tf.optimizers.Nadam(learningRate),
         loss=lossFunction,
         metrics=metrics,
+        jit_compile=jitCompile,
     )
+    if jitCompile:
+        checkJitCompilation(
+            model,
+            lossFunction,
+            validationFeatures,
+            validationLabels,
+        )
+    timer = TrainingTimer('denseNet', len(trainFeatures), timingLog)
     model.fit(
         trainFeatures,
         trainLabels,
@@ -49,5 +180,7 @@ def denseNet(
         validation_data=(validationFeatures, validationLabels),
         validation_steps=validationSteps,
         shuffle=True,
+        callbacks=timer.callbacks(),
     )
+    timer.finish()
     return model
@@ -0,0 +1,172 @@
+import numpy as np
+import tensorflow as tf
+from dataHelpers import padSequences
+
+JIT_TOLERANCE = 1e-4
+JIT_CHECK_ROWS = 64
+JIT_CHECK_STEPS = 5
+JIT_CHECK_LEARNING_RATE = 0.01
+
+
+def paddedRowCount(rowCount):
+    return 1 << max(rowCount - 1, 0).bit_length()
+
+
+# an XLA compiled stand-in for model.predict_on_batch; batches are padded
+# up to a power of two rows, so varying batch sizes only compile a few
+# shapes
+def jitPredictor(model):
+    compiled = tf.function(
+        lambda inputs: model(inputs, training=False),
+        jit_compile=True,
+    )
+
+    def predict(inputs):
+        inputs = np.asarray(inputs, dtype=np.float32)
+        rowCount = len(inputs)
+        padding = paddedRowCount(rowCount) - rowCount
+        if padding:
+            inputs = np.concatenate([
+                inputs,
+                np.zeros((padding,) + inputs.shape[1:], dtype=np.float32),
+            ])
+        return compiled(inputs).numpy()[:rowCount]
+    return predict
+
+
+# inputs to check a loaded model with when no samples are at hand
+def randomInputs(model, rows=JIT_CHECK_ROWS, sequenceLength=8):
+    shape = [
+        sequenceLength if dimension is None else dimension
+        for dimension in model.input_shape[1:]
+    ]
+    return np.random.default_rng(0).normal(
+        size=[rows] + shape,
+    ).astype(np.float32)
+
+
+def checkRows(values):
+    values = values[:JIT_CHECK_ROWS]
+    if not isinstance(values, np.ndarray):
+        # variable length sequences are compared padded to a common length
+        values = padSequences(
+            values,
+            max(len(sequence) for sequence in values),
+        )
+    return values.astype(np.float32)
+
+
+def relativeDifference(values, expected):
+    values = np.asarray(values, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    return float(np.max(
+        np.abs(values - expected) / np.maximum(np.abs(expected), 1),
+    ))
+
+
+def checkTolerance(difference, tolerance, compared):
+    if difference > tolerance:
+        raise ValueError(
+            'XLA {} differ by {:.2e}, above {:.0e}'.format(
+                compared,
+                difference,
+                tolerance,
+            ),
+        )
+
+
+def checkJitPredictions(model, features, tolerance=JIT_TOLERANCE):
+    if len(features) == 0:
+        return 0.0
+    features = checkRows(features)
+    expected = model(features, training=False).numpy()
+    difference = relativeDifference(jitPredictor(model)(features), expected)
+    checkTolerance(difference, tolerance, 'predictions')
+    return difference
+
+
+def descend(
+    model,
+    lossFunction,
+    features,
+    labels,
+    jitCompile,
+    steps=JIT_CHECK_STEPS,
+    learningRate=JIT_CHECK_LEARNING_RATE,
+):
+    loss = tf.keras.losses.get(lossFunction)
+
+    # plain gradient descent keeps no optimizer state, and dropout stays
+    # off, so both runs take the same steps unless XLA changes the numbers
+    @tf.function(jit_compile=jitCompile)
+    def step():
+        with tf.GradientTape() as tape:
+            value = tf.reduce_mean(
+                loss(labels, model(features, training=False)),
+            )
+            value = tf.add_n([value] + model.losses)
+        gradients = tape.gradient(value, model.trainable_variables)
+        for variable, gradient in zip(model.trainable_variables, gradients):
+            if gradient is not None:
+                variable.assign_sub(learningRate * gradient)
+        return value
+
+    losses = [float(step()) for _ in range(steps)]
+    return losses, model(features, training=False).numpy()
+
+
+def checkJitTraining(
+    model,
+    lossFunction,
+    features,
+    labels=None,
+    tolerance=JIT_TOLERANCE,
+):
+    # trains from the same weights with and without XLA, then restores them
+    if len(features) == 0:
+        return 0.0
+    features = checkRows(features)
+    labels = features if labels is None else checkRows(labels)
+    if labels.ndim < len(model.output_shape):
+        # fit expands scalar labels to the output's shape, so do the same
+        labels = labels[..., None]
+    weights = model.get_weights()
+    try:
+        jitLosses, jitPredictions = descend(
+            model,
+            lossFunction,
+            features,
+            labels,
+            True,
+        )
+        model.set_weights(weights)
+        losses, predictions = descend(
+            model,
+            lossFunction,
+            features,
+            labels,
+            False,
+        )
+    finally:
+        model.set_weights(weights)
+    difference = max(
+        relativeDifference(jitLosses, losses),
+        relativeDifference(jitPredictions, predictions),
+    )
+    checkTolerance(difference, tolerance, 'trained models')
+    return difference
+
+
+# runs before fitting, so a mismatch fails fast instead of discarding a
+# finished training run
+def checkJitCompilation(
+    model,
+    lossFunction,
+    features,
+    labels=None,
+    tolerance=JIT_TOLERANCE,
+):
+    return max(
+        checkJitPredictions(model, features, tolerance),
+        checkJitTraining(model, lossFunction, features, labels, tolerance),
+    )
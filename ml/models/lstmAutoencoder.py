@@ -1,89 +1,88 @@
+from contextlib import nullcontext
+from functools import partial
 import tensorflow as tf
 from tensorflow.keras import layers, Model
+from models.bucketedDataset import bucketedDataset, workerShard
+from memoryProfiler import profiledStage
+from models.jitCompilation import checkJitCompilation
+from models.trainingTimer import TrainingTimer
 
 
-def lstmAutoencoder(
-    trainingData,
-    validationData,
-    sequenceLength,
-    featureCount,
-    encodingDimension,
-    hiddenDimension=None,
-    batchSize=256,
-    epochs=200,
-    learningRate=0.0002,
-    lossFunction='mse',
-    metrics=['mae', 'mse'],
-    validationSteps=3,
-):
-    inputData = layers.Input(shape=(sequenceLength, featureCount))
-    encoded = inputData
-
-    if hiddenDimension is not None:
-        encoded = layers.LSTM(
-            hiddenDimension,
-            activation='tanh',
-            recurrent_activation='sigmoid',
-            recurrent_dropout=0,
-            return_sequences=True,
-            unroll=False,
-            use_bias=True,
-        )(encoded)
-    encoded = layers.LSTM(
-        encodingDimension,
+def recurrentLayer(units, returnSequences):
+    return layers.LSTM(
+        units,
         activation='tanh',
         recurrent_activation='sigmoid',
         recurrent_dropout=0,
-        return_sequences=False,
+        return_sequences=returnSequences,
         unroll=False,
         use_bias=True,
-    )(encoded)
+    )
 
-    x = layers.RepeatVector(
-        sequenceLength,
-        name='repeat-layer',
-    )(encoded)
 
-    x = layers.LSTM(
-        encodingDimension,
-        activation='tanh',
-        recurrent_activation='sigmoid',
-        recurrent_dropout=0,
-        return_sequences=True,
-        unroll=False,
-        use_bias=True,
-    )(x)
-    if hiddenDimension is not None:
-        x = layers.LSTM(
-            hiddenDimension,
-            activation='tanh',
-            recurrent_activation='sigmoid',
-            recurrent_dropout=0,
-            return_sequences=True,
-            unroll=False,
-            use_bias=True,
-        )(x)
+def buildLstmAutoencoder(
+    sequenceLength,
+    featureCount,
+    encodingDimension,
+    hiddenDimension,
+    learningRate,
+    lossFunction,
+    metrics,
+    variableLength=False,
+    jitCompile=False,
+):
+    if variableLength:
+        inputData = layers.Input(shape=(None, featureCount))
+        maskedData = layers.Masking(mask_value=0.0)(inputData)
+    else:
+        inputData = layers.Input(shape=(sequenceLength, featureCount))
+        maskedData = inputData
+    encoded = maskedData
 
-    decoded = layers.TimeDistributed(layers.Dense(featureCount))(x)
+    if hiddenDimension is not None:
+        encoded = recurrentLayer(hiddenDimension, True)(encoded)
+    encoded = recurrentLayer(encodingDimension, False)(encoded)
 
-    autoencoder = Model(inputData, decoded)
-    encodedInput = layers.Input(shape=(encodingDimension,))
-    repeatLayer = autoencoder.get_layer('repeat-layer')
-    decoderLayer = None
+    decoderLayers = [recurrentLayer(encodingDimension, True)]
     if hiddenDimension is not None:
-        decoderLayer = autoencoder.layers[-1](
-            autoencoder.layers[-2](
-                autoencoder.layers[-3](
-                    repeatLayer(encodedInput)
-                )
-            )
+        decoderLayers.append(recurrentLayer(hiddenDimension, True))
+    decoderLayers.append(layers.TimeDistributed(layers.Dense(featureCount)))
+
+    # variable length inputs decode back to the length of each batch, while
+    # the standalone decoder always emits sequenceLength steps. Adding the
+    # encoding to zeros shaped like the batch repeats it with built-in
+    # layers, which tfjs can load, and keeps the input mask.
+    if variableLength:
+        steps = layers.Dense(
+            encodingDimension,
+            use_bias=False,
+            kernel_initializer='zeros',
+            trainable=False,
+            name='length-layer',
+        )(maskedData)
+        x = layers.Add(name='repeat-layer')([steps, encoded])
+        decoderRepeatLayer = layers.RepeatVector(
+            sequenceLength,
+            name='decoder-repeat-layer',
         )
     else:
-        decoderLayer = autoencoder.layers[-1](
-            autoencoder.layers[-2](
-                repeatLayer(encodedInput)
-            )
-        )
+        x = layers.RepeatVector(
+            sequenceLength,
+            name='repeat-layer',
+        )(encoded)
+        decoderRepeatLayer = None
+
+    for layer in decoderLayers:
+        x = layer(x)
+    decoded = x
+
+    autoencoder = Model(inputData, decoded)
+    encodedInput = layers.Input(shape=(encodingDimension,))
+    decoderLayer = (
+        decoderRepeatLayer or autoencoder.get_layer('repeat-layer')
+    )(encodedInput)
+    for layer in decoderLayers:
+        decoderLayer = layer(decoderLayer)
     encoder = Model(inputData, encoded)
     decoder = Model(encodedInput, decoderLayer)
 
@@ -91,14 +90,86 @@ def lstmAutoencoder(
         optimizer=tf.keras.optimizers.Nadam(learningRate),
         loss=lossFunction,
         metrics=metrics,
-    )
-    autoencoder.fit(
-        trainingData,
-        trainingData,
-        batch_size=batchSize,
-        epochs=epochs,
-        validation_data=(validationData, validationData),
-        validation_steps=validationSteps,
-        shuffle=True,
+        jit_compile=jitCompile,
     )
     return autoencoder, encoder, decoder
+
+
+@profiledStage('lstmAutoencoder')
+def lstmAutoencoder(
+    trainingData,
+    validationData,
+    sequenceLength,
+    featureCount,
+    encodingDimension,
+    hiddenDimension=None,
+    batchSize=256,
+    epochs=200,
+    learningRate=0.0002,
+    lossFunction='mse',
+    metrics=['mae', 'mse'],
+    validationSteps=3,
+    strategy=None,
+    variableLength=False,
+    bucketWidth=1,
+    timingLog=None,
+    jitCompile=False,
+):
+    build = partial(
+        buildLstmAutoencoder,
+        sequenceLength,
+        featureCount,
+        encodingDimension,
+        hiddenDimension,
+        learningRate,
+        lossFunction,
+        metrics,
+        variableLength=variableLength,
+        jitCompile=jitCompile,
+    )
+    with strategy.scope() if strategy is not None else nullcontext():
+        auto, encoder, decoder = build()
+    if jitCompile:
+        checkJitCompilation(auto, lossFunction, validationData)
+    timer = TrainingTimer('lstmAutoencoder', len(trainingData), timingLog)
+    if variableLength:
+        shardIndex, shardCount = workerShard(strategy)
+        auto.fit(
+            bucketedDataset(
+                trainingData,
+                batchSize,
+                bucketWidth=bucketWidth,
+                shardIndex=shardIndex,
+                shardCount=shardCount,
+            ),
+            epochs=epochs,
+            validation_data=bucketedDataset(
+                validationData,
+                batchSize,
+                bucketWidth=bucketWidth,
+                shardIndex=shardIndex,
+                shardCount=shardCount,
+            ),
+            validation_steps=validationSteps,
+            callbacks=timer.callbacks(),
+        )
+    else:
+        auto.fit(
+            trainingData,
+            trainingData,
+            batch_size=batchSize,
+            epochs=epochs,
+            validation_data=(validationData, validationData),
+            validation_steps=validationSteps,
+            shuffle=True,
+            callbacks=timer.callbacks(),
+        )
+    timer.finish()
+    if strategy is not None:
+        # predict on a strategy's model gathers from every worker, so a
+        # chief evaluating alone would hang; callers get copies built
+        # outside the scope instead
+        trained = auto
+        auto, encoder, decoder = build()
+        auto.set_weights(trained.get_weights())
+    return auto, encoder, decoder
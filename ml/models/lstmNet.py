@@ -1,7 +1,12 @@
 import tensorflow as tf
 from tensorflow.keras import layers, Model
+from models.bucketedDataset import bucketedDataset
+from memoryProfiler import profiledStage
+from models.jitCompilation import checkJitCompilation
+from models.trainingTimer import TrainingTimer
 
 
+@profiledStage('lstmNet')
 def lstmNet(
     trainFeatures,
     trainLabels,
@@ -17,11 +22,20 @@ def lstmNet(
     metrics=['mae', 'mse'],
     regularlizationFactor=0.01,
     validationSteps=3,
+    variableLength=False,
+    bucketWidth=1,
+    timingLog=None,
+    jitCompile=False,
 ):
     featureCount = len(trainFeatures[0][0])
     labelDimensions = len(trainLabels[0])
-    sequenceLength = len(trainFeatures[0])
-    inputData = layers.Input(shape=(sequenceLength, featureCount))
+    if variableLength:
+        inputData = layers.Input(shape=(None, featureCount))
+        x = layers.Masking(mask_value=0.0)(inputData)
+    else:
+        sequenceLength = len(trainFeatures[0])
+        inputData = layers.Input(shape=(sequenceLength, featureCount))
+        x = inputData
     x = layers.LSTM(
         labelDimensions,
         dropout=dropoutRate,
@@ -31,8 +45,8 @@ def lstmNet(
         recurrent_dropout=recurrentDropoutRate,
         return_sequences=False,
         return_state=False,
-        unroll=True,
-    )(inputData)
+        unroll=not variableLength,
+    )(x)
 
     model = Model(inputData, x)
 
@@ -40,7 +54,37 @@ def lstmNet(
         optimizer=tf.keras.optimizers.Nadam(learningRate),
         loss=lossFunction,
         metrics=metrics,
+        jit_compile=jitCompile,
     )
+    if jitCompile:
+        checkJitCompilation(
+            model,
+            lossFunction,
+            validationFeatures,
+            validationLabels,
+        )
+    timer = TrainingTimer('lstmNet', len(trainFeatures), timingLog)
+    if variableLength:
+        model.fit(
+            bucketedDataset(
+                trainFeatures,
+                batchSize,
+                labels=trainLabels,
+                bucketWidth=bucketWidth,
+            ),
+            epochs=epochs,
+            validation_data=bucketedDataset(
+                validationFeatures,
+                batchSize,
+                labels=validationLabels,
+                bucketWidth=bucketWidth,
+            ),
+            validation_steps=validationSteps,
+            callbacks=timer.callbacks(),
+        )
+        timer.finish()
+        return model
+
     model.fit(
         trainFeatures,
         trainLabels,
@@ -49,5 +93,7 @@ def lstmNet(
         validation_data=(validationFeatures, validationLabels),
         validation_steps=validationSteps,
         shuffle=True,
+        callbacks=timer.callbacks(),
     )
+    timer.finish()
     return model
@@ -0,0 +1,100 @@
+import os
+import time
+import tensorflow as tf
+from commandLine import TIMING_LOG_VARIABLE
+from dataHelpers import appendJsonLine
+
+
+class TrainingTimer(tf.keras.callbacks.Callback):
+    def __init__(self, builder, sampleCount, timingLog=None):
+        super().__init__()
+        self.builder = builder
+        self.sampleCount = sampleCount
+        self.timingLog = timingLog or os.environ.get(TIMING_LOG_VARIABLE)
+        self.runStart = time.perf_counter()
+        self.lastEpochEnd = self.runStart
+        self.epochs = 0
+        self.epochSeconds = 0
+        self.validationSeconds = 0
+        self.retraces = 0
+        self.trainFunction = None
+        self.tracingCount = 0
+
+    def callbacks(self):
+        return [self] if self.timingLog else []
+
+    def countRetraces(self):
+        trainFunction = getattr(self.model, 'train_function', None)
+        getCount = getattr(
+            trainFunction,
+            'experimental_get_tracing_count',
+            None,
+        )
+        if getCount is None:
+            return
+        # recompiling replaces train_function, which then traces afresh
+        if trainFunction is not self.trainFunction:
+            self.trainFunction = trainFunction
+            self.tracingCount = 0
+        count = getCount()
+        self.retraces += count - self.tracingCount
+        self.tracingCount = count
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epochStart = time.perf_counter()
+        self.epochValidationSeconds = 0
+
+    # fit runs validation inside the epoch, so it is timed apart and left
+    # out of the training throughput
+    def on_test_begin(self, logs=None):
+        self.validationStart = time.perf_counter()
+
+    def on_test_end(self, logs=None):
+        self.epochValidationSeconds += (
+            time.perf_counter() - self.validationStart
+        )
+
+    def on_epoch_end(self, epoch, logs=None):
+        epochEnd = time.perf_counter()
+        validationSeconds = self.epochValidationSeconds
+        epochSeconds = epochEnd - self.epochStart - validationSeconds
+        wallSeconds = epochEnd - self.lastEpochEnd
+        self.lastEpochEnd = epochEnd
+        self.epochs += 1
+        self.epochSeconds += epochSeconds
+        self.validationSeconds += validationSeconds
+        self.countRetraces()
+        appendJsonLine(self.timingLog, {
+            'type': 'epoch',
+            'builder': self.builder,
+            'epoch': self.epochs,
+            'wallSeconds': wallSeconds,
+            'epochSeconds': epochSeconds,
+            'validationSeconds': validationSeconds,
+            'overheadSeconds': wallSeconds - epochSeconds - validationSeconds,
+            'samplesPerSecond': self.sampleCount / epochSeconds,
+            'retraces': self.retraces,
+            'loss': (logs or {}).get('loss'),
+        })
+
+    def finish(self):
+        if not self.timingLog:
+            return
+        wallSeconds = time.perf_counter() - self.runStart
+        appendJsonLine(self.timingLog, {
+            'type': 'run',
+            'builder': self.builder,
+            'epochs': self.epochs,
+            'sampleCount': self.sampleCount,
+            'wallSeconds': wallSeconds,
+            'epochSeconds': self.epochSeconds,
+            'validationSeconds': self.validationSeconds,
+            'overheadSeconds': (
+                wallSeconds - self.epochSeconds - self.validationSeconds
+            ),
+            'samplesPerSecond': (
+                self.sampleCount * self.epochs / self.epochSeconds
+                if self.epochSeconds else 0
+            ),
+            'retraces': self.retraces,
+        })
@@ -1,5 +1,22 @@
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras import layers, Model
+from memoryProfiler import profiledStage
+from models.jitCompilation import checkJitCompilation
+from models.trainingTimer import TrainingTimer
+
+
+# L2 penalty on the distance from prior weights rather than from 0
+class PriorL2(tf.keras.regularizers.Regularizer):
+    def __init__(self, factor, prior):
+        self.factor = factor
+        self.prior = np.asarray(prior, dtype=np.float32).reshape(-1, 1)
+
+    def __call__(self, weights):
+        return self.factor * tf.reduce_sum(tf.square(weights - self.prior))
+
+    def get_config(self):
+        return {'factor': self.factor, 'prior': self.prior.ravel().tolist()}
 
 
 def getPerceptronWeights(model, layerName):
@@ -94,6 +111,7 @@ def histIsImprovement(oldHist, newHist):
     return False
 
 
+@profiledStage('variableEpochPerceptron')
 def variableEpochPerceptron(
     trainFeatures,
     trainLabels,
@@ -111,6 +129,10 @@ def variableEpochPerceptron(
     dropoutRate=0.3,
     verbose=0,
     useBias=True,
+    timingLog=None,
+    initialWeights=None,
+    priorWeights=None,
+    jitCompile=False,
 ):
     inputDimension = len(trainFeatures[0])
     inputs = tf.keras.Input(shape=(inputDimension,))
@@ -118,11 +140,32 @@ def variableEpochPerceptron(
     predictions = layers.Dense(
         1,
         name='perceptron-weights',
-        kernel_regularizer=tf.keras.regularizers.l2(regularlizationFactor),
+        kernel_regularizer=(
+            tf.keras.regularizers.l2(regularlizationFactor)
+            if priorWeights is None
+            else PriorL2(regularlizationFactor, priorWeights)
+        ),
         use_bias=useBias,
     )(dropout)
 
     perceptron = Model(inputs=inputs, outputs=predictions)
+    if initialWeights is not None:
+        perceptronLayer = perceptron.get_layer('perceptron-weights')
+        weights = perceptronLayer.get_weights()
+        weights[0] = np.reshape(initialWeights, weights[0].shape)
+        perceptronLayer.set_weights(weights)
+    if jitCompile:
+        checkJitCompilation(
+            perceptron,
+            lossFunction,
+            validationFeatures,
+            validationLabels,
+        )
+    timer = TrainingTimer(
+        'variableEpochPerceptron',
+        len(trainFeatures),
+        timingLog,
+    )
 
     outerPocketWeights = None
     outerPocketHist = None
@@ -131,6 +174,7 @@ def variableEpochPerceptron(
             optimizer=tf.optimizers.Nadam(learningRate),
             loss=lossFunction,
             metrics=metrics,
+            jit_compile=jitCompile,
         )
         currentEpoch = 0
         pocketWeights = None
@@ -151,6 +195,7 @@ def variableEpochPerceptron(
                 validation_data=(validationFeatures, validationLabels),
                 validation_steps=validationSteps,
                 verbose=0,
+                callbacks=timer.callbacks(),
             )
             currentEpoch += epochsPerTrain
             newHist = historyDict(
@@ -187,6 +232,7 @@ def variableEpochPerceptron(
         ):
             outerPocketWeights = pocketWeights
             outerPocketHist = pocketHist
+    timer.finish()
     return (
         outerPocketWeights,
         outerPocketHist,
@@ -1,46 +1,83 @@
+from functools import partial
 from models.lstmAutoencoder import lstmAutoencoder
+from batchSizeTuner import tuneBatchSize
 from dataHelpers import fromCsvFiles
-import tensorflowjs as tfjs
+from modelExport import exportModels
 
 MODEL_SAVE_PATH = "../resources/models/artist/multi/"
 ARTISTS_DATA_FILES = "../resources/data/profile/artists/"
+MODEL_PARAMETERS = {
+    'sequenceLength': 5,
+    'featureCount': 16,
+    'encodingDimension': 20,
+    'batchSize': 1,
+    'epochs': 750,
+    'hiddenDimension': 28,
+    'learningRate': 0.0002,
+}
+TUNING_EPOCHS = 75
 
 
-def main():
-    train, validation, test = fromCsvFiles(
+def loadData():
+    return fromCsvFiles(
         ARTISTS_DATA_FILES,
         20,
         20,
         skipHeader=0,
     )
 
-    (
-        auto,
-        encoder,
-        decoder
-    ) = lstmAutoencoder(
-        train,
+
+def tunedParameters(train, validation, batchSizes):
+    fixedParameters = {
+        name: value for name, value in MODEL_PARAMETERS.items()
+        if name not in ('batchSize', 'learningRate', 'epochs')
+    }
+    best, _ = tuneBatchSize(
+        partial(lstmAutoencoder, train, validation, **fixedParameters),
+        validation,
         validation,
-        sequenceLength=5,
-        featureCount=16,
-        encodingDimension=20,
-        batchSize=1,
-        epochs=750,
-        hiddenDimension=28,
-        learningRate=0.0002,
+        len(train),
+        MODEL_PARAMETERS['batchSize'],
+        MODEL_PARAMETERS['learningRate'],
+        batchSizes=batchSizes,
+        epochs=TUNING_EPOCHS,
+    )
+    return dict(
+        MODEL_PARAMETERS,
+        batchSize=best['batchSize'],
+        learningRate=best['learningRate'],
     )
 
-    tfjs.converters.save_keras_model(
+
+def main(
+    quantization=None,
+    pruneFraction=0,
+    sharedWeights=False,
+    tuneBatchSizes=None,
+):
+    train, validation, test = loadData()
+    parameters = MODEL_PARAMETERS
+    if tuneBatchSizes:
+        parameters = tunedParameters(train, validation, tuneBatchSizes)
+
+    (
         auto,
-        MODEL_SAVE_PATH + 'auto',
-    )
-    tfjs.converters.save_keras_model(
         encoder,
-        MODEL_SAVE_PATH + 'encoder',
-    )
-    tfjs.converters.save_keras_model(
-        decoder,
-        MODEL_SAVE_PATH + 'decoder',
+        decoder
+    ) = lstmAutoencoder(train, validation, **parameters)
+
+    exportModels(
+        {
+            MODEL_SAVE_PATH + 'auto': auto,
+            MODEL_SAVE_PATH + 'encoder': encoder,
+            MODEL_SAVE_PATH + 'decoder': decoder,
+        },
+        quantization=quantization,
+        pruneFraction=pruneFraction,
+        evaluationModel=auto,
+        evaluationFeatures=test,
+        evaluationLabels=test,
+        sharedWeights=sharedWeights,
     )
 
 
@@ -0,0 +1,349 @@
+import argparse
+import ast
+import hashlib
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from os import listdir, walk
+from os.path import (
+    abspath,
+    dirname,
+    exists,
+    isfile,
+    join,
+    normpath,
+    relpath,
+)
+
+ML_DIRECTORY = dirname(abspath(__file__))
+CACHE_FILE = "../resources/.pipelineCache.json"
+STAGES = [
+    {
+        'name': 'trackEncoder',
+        'inputs': ["../resources/data/track/all.csv"],
+        'outputs': [
+            "../resources/models/track/auto/",
+            "../resources/models/track/encoder/",
+            "../resources/models/track/decoder/",
+            "../resources/models/track/shared/",
+        ],
+    },
+    {
+        'name': 'albumTracksEncoder',
+        'inputs': [
+            "../resources/data/album/*",
+            "../resources/models/track/encoder/",
+        ],
+        'outputs': [
+            "../resources/models/album/tracks/auto/",
+            "../resources/models/album/tracks/encoder/",
+            "../resources/models/album/tracks/decoder/",
+            "../resources/models/album/tracks/shared/",
+        ],
+    },
+    {
+        'name': 'artistTracksEncoder',
+        'inputs': [
+            "../resources/data/artist/*",
+            "../resources/models/track/encoder/",
+        ],
+        'outputs': [
+            "../resources/models/artist/tracks/auto/",
+            "../resources/models/artist/tracks/encoder/",
+            "../resources/models/artist/tracks/decoder/",
+            "../resources/models/artist/tracks/shared/",
+        ],
+    },
+    {
+        'name': 'albumEncoder',
+        'inputs': [
+            "../resources/data/album/all/data.csv",
+            "../resources/models/album/tracks/encoder/",
+        ],
+        'outputs': [
+            "../resources/models/album/auto/",
+            "../resources/models/album/encoder/",
+            "../resources/models/album/decoder/",
+            "../resources/models/album/shared/",
+        ],
+    },
+    {
+        'name': 'artistEncoder',
+        'inputs': [
+            "../resources/data/artist/all/data.csv",
+            "../resources/models/artist/tracks/encoder/",
+        ],
+        'outputs': [
+            "../resources/models/artist/auto/",
+            "../resources/models/artist/encoder/",
+            "../resources/models/artist/decoder/",
+            "../resources/models/artist/shared/",
+        ],
+    },
+    {
+        'name': 'multiArtistEncoder',
+        'inputs': [
+            "../resources/data/profile/artists/*",
+            "../resources/models/album/encoder/",
+            "../resources/models/artist/encoder/",
+        ],
+        'outputs': [
+            "../resources/models/artist/multi/auto/",
+            "../resources/models/artist/multi/encoder/",
+            "../resources/models/artist/multi/decoder/",
+            "../resources/models/artist/multi/shared/",
+        ],
+    },
+    {
+        'name': 'tasteLearner',
+        'inputs': [
+            "../resources/data/profile/reviews/*",
+            "../resources/models/artist/multi/encoder/",
+        ],
+        'outputs': ["../resources/data/profile/taste/"],
+    },
+    {
+        'name': 'tasteMapper',
+        'inputs': [
+            "../resources/data/profile/encodedArtists/*",
+            "../resources/data/profile/taste/",
+        ],
+        'outputs': ["../resources/models/taste/"],
+    },
+    {
+        'name': 'encoderEvaluation',
+        'inputs': [
+            "../resources/models/track/auto/",
+            "../resources/models/album/tracks/auto/",
+            "../resources/models/artist/tracks/auto/",
+            "../resources/models/album/auto/",
+            "../resources/models/artist/auto/",
+            "../resources/models/artist/multi/auto/",
+        ],
+        'outputs': ["../resources/evaluation/"],
+    },
+]
+
+
+def resolvePath(path):
+    return normpath(join(ML_DIRECTORY, path.rstrip('*')))
+
+
+def hashFile(digest, fileName):
+    with open(fileName, 'rb') as dataFile:
+        for block in iter(lambda: dataFile.read(1 << 20), b''):
+            digest.update(block)
+
+
+def hashPaths(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.encode())
+        resolved = resolvePath(path)
+        if not exists(resolved):
+            digest.update(b'missing')
+        elif isfile(resolved):
+            hashFile(digest, resolved)
+        elif path.endswith('*'):
+            for filename in sorted(listdir(resolved)):
+                if isfile(join(resolved, filename)):
+                    digest.update(filename.encode())
+                    hashFile(digest, join(resolved, filename))
+        else:
+            for root, directories, filenames in walk(resolved):
+                directories.sort()
+                for filename in sorted(filenames):
+                    fileName = join(root, filename)
+                    digest.update(relpath(fileName, resolved).encode())
+                    hashFile(digest, fileName)
+    return digest.hexdigest()
+
+
+def overlaps(firstPath, secondPath):
+    first = resolvePath(firstPath)
+    second = resolvePath(secondPath)
+    return (
+        first == second or
+        first.startswith(second + '/') or
+        second.startswith(first + '/')
+    )
+
+
+def moduleFile(moduleName):
+    path = join(ML_DIRECTORY, *moduleName.split('.'))
+    for candidate in (path + '.py', join(path, '__init__.py')):
+        if isfile(candidate):
+            return relpath(candidate, ML_DIRECTORY)
+    return None
+
+
+def importedNames(fileName):
+    with open(join(ML_DIRECTORY, fileName)) as sourceFile:
+        tree = ast.parse(sourceFile.read(), fileName)
+    names = []
+    # ast.walk also finds the lazy imports inside functions
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names.append(node.module)
+            names.extend(
+                '{}.{}'.format(node.module, alias.name)
+                for alias in node.names
+            )
+    return names
+
+
+def localModules(fileName):
+    found = set()
+    pending = [fileName]
+    while pending:
+        fileName = pending.pop()
+        if fileName in found:
+            continue
+        found.add(fileName)
+        for name in importedNames(fileName):
+            local = moduleFile(name)
+            if local is not None and local not in found:
+                pending.append(local)
+    return sorted(found)
+
+
+def stageInputs(stage):
+    # a stage's code includes every ml module it imports, directly or not
+    return localModules(stage['name'] + '.py') + stage['inputs']
+
+
+def upstreamStages(stage):
+    return [
+        upstream['name'] for upstream in STAGES
+        if upstream is not stage and any(
+            overlaps(inputPath, outputPath)
+            for inputPath in stage['inputs']
+            for outputPath in upstream['outputs']
+        )
+    ]
+
+
+def selectStages(targets):
+    stages = {stage['name']: stage for stage in STAGES}
+    if not targets:
+        return list(stages)
+    selected = []
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in stages:
+            raise ValueError('unknown stage {}'.format(name))
+        if name not in selected:
+            selected.append(name)
+            pending.extend(upstreamStages(stages[name]))
+    return [stage['name'] for stage in STAGES if stage['name'] in selected]
+
+
+def loadCache():
+    cacheFile = resolvePath(CACHE_FILE)
+    if not isfile(cacheFile):
+        return {}
+    with open(cacheFile) as cache:
+        return json.load(cache)
+
+
+def saveCache(cache):
+    with open(resolvePath(CACHE_FILE), 'w') as cacheFile:
+        json.dump(cache, cacheFile, indent=2, sort_keys=True)
+
+
+def runStage(stage):
+    return subprocess.run(
+        [sys.executable, 'ml.py', stage['name']],
+        cwd=ML_DIRECTORY,
+    ).returncode
+
+
+def main(targets=None, force=False, jobs=2, dryRun=False):
+    stages = {stage['name']: stage for stage in STAGES}
+    pending = selectStages(targets)
+    cache = loadCache()
+    finished = set()
+    failed = set()
+    rebuilt = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            for name in list(pending):
+                upstream = upstreamStages(stages[name])
+                if any(dependency in failed for dependency in upstream):
+                    print('{:20s}\tskipped, upstream failed'.format(name))
+                    pending.remove(name)
+                    failed.add(name)
+                    continue
+                if not all(dependency in finished for dependency in upstream):
+                    continue
+                pending.remove(name)
+
+                stage = stages[name]
+                record = {
+                    'inputs': hashPaths(stageInputs(stage)),
+                    'outputs': hashPaths(stage['outputs']),
+                }
+                # a dry run cannot know what rebuilt upstream outputs will
+                # hash to, so it assumes they change
+                upstreamRebuilt = dryRun and any(
+                    dependency in rebuilt for dependency in upstream
+                )
+                if not force and not upstreamRebuilt and (
+                    cache.get(name) == record
+                ):
+                    print('{:20s}\tup to date'.format(name))
+                    finished.add(name)
+                    continue
+                if dryRun:
+                    print('{:20s}\twould rebuild'.format(name))
+                    finished.add(name)
+                    rebuilt.add(name)
+                    continue
+                print('{:20s}\trebuilding'.format(name))
+                running[executor.submit(runStage, stage)] = name
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if future.result() != 0:
+                    print('{:20s}\tfailed'.format(name))
+                    failed.add(name)
+                    continue
+                stage = stages[name]
+                cache[name] = {
+                    'inputs': hashPaths(stageInputs(stage)),
+                    'outputs': hashPaths(stage['outputs']),
+                }
+                saveCache(cache)
+                print('{:20s}\tdone'.format(name))
+                finished.add(name)
+                rebuilt.add(name)
+    return 1 if failed else 0
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description='Rebuild stale ml stages in dependency order',
+    )
+    parser.add_argument('targets', nargs='*')
+    parser.add_argument('--force', action='store_true')
+    parser.add_argument('--jobs', type=int, default=2)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args(argv)
+    return {
+        'targets': args.targets,
+        'force': args.force,
+        'jobs': args.jobs,
+        'dryRun': args.dry_run,
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(main(**parseArguments(sys.argv[1:])))
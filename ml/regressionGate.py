@@ -0,0 +1,240 @@
+import argparse
+import json
+import re
+import sys
+from os import makedirs
+from os.path import isfile, join
+import numpy as np
+from commandLine import mlPath, userPath
+import benchmark
+
+BASELINE_DIRECTORY = '../resources/benchmarks/'
+# repeats from one session miss the drift between sessions, so changes
+# smaller than this never count
+TOLERANCE = 0.10
+METRICS = [
+    # (metric, run field, whether a larger value is better, smallest
+    # absolute change that counts)
+    ('throughput', 'samplesPerSecond', True, 0),
+    ('peakMemory', 'peakRssBytes', False, 64 << 20),
+]
+EXIT_CODES = {'baselined': 0, 'pass': 0, 'fail': 1, 'error': 2}
+
+
+def machineKey(machine):
+    key = '{}-{}-{}cpu-py{}'.format(
+        machine['node'],
+        machine['machine'],
+        machine['cpus'],
+        machine['python'],
+    )
+    return re.sub(r'[^A-Za-z0-9.]+', '_', key)
+
+
+def baselineFile(baselineDirectory, machine, scale):
+    return join(
+        baselineDirectory,
+        '{}-{}.json'.format(machineKey(machine), scale),
+    )
+
+
+def ratioInterval(
+    baseline,
+    current,
+    confidence=0.95,
+    resamples=2000,
+    seed=0,
+):
+    # bootstrap interval for median(current) / median(baseline)
+    generator = np.random.default_rng(seed)
+    baseline = np.asarray(baseline, dtype=float)
+    current = np.asarray(current, dtype=float)
+    ratios = (
+        np.median(generator.choice(current, (resamples, len(current))), 1) /
+        np.median(generator.choice(baseline, (resamples, len(baseline))), 1)
+    )
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(ratios, [tail, 100 - tail])
+    return float(np.median(current) / np.median(baseline)), low, high
+
+
+def relativeSpread(values):
+    values = np.asarray(values, dtype=float)
+    return float((values.max() - values.min()) / np.median(values))
+
+
+def compareMetric(
+    baselineValues,
+    currentValues,
+    largerIsBetter,
+    tolerance=TOLERANCE,
+    confidence=0.95,
+    absoluteFloor=0,
+):
+    ratio, low, high = ratioInterval(
+        baselineValues,
+        currentValues,
+        confidence,
+    )
+    # the interval must clear both the tolerance and the baseline's own
+    # spread before a change counts
+    threshold = max(tolerance, relativeSpread(baselineValues))
+    difference = abs(np.median(currentValues) - np.median(baselineValues))
+    if difference <= absoluteFloor:
+        worse = better = False
+    elif largerIsBetter:
+        worse, better = high < 1 - threshold, low > 1 + threshold
+    else:
+        worse, better = low > 1 + threshold, high < 1 - threshold
+    return {
+        'ratio': ratio,
+        'interval': [float(low), float(high)],
+        'threshold': threshold,
+        'verdict': (
+            'regression' if worse
+            else 'improvement' if better
+            else 'unchanged'
+        ),
+    }
+
+
+def compareSuites(
+    baseline,
+    current,
+    tolerance=TOLERANCE,
+    confidence=0.95,
+):
+    comparisons = {}
+    for name, runs in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        comparisons[name] = {}
+        for metric, field, largerIsBetter, absoluteFloor in METRICS:
+            comparisons[name][metric] = compareMetric(
+                [run[field] for run in baseline['results'][name]],
+                [run[field] for run in runs],
+                largerIsBetter,
+                tolerance,
+                confidence,
+                absoluteFloor,
+            )
+    return comparisons
+
+
+def main(
+    directory='../resources/synthetic/',
+    scale='small',
+    names=None,
+    repeats=5,
+    baselineDirectory=BASELINE_DIRECTORY,
+    updateBaseline=False,
+    tolerance=TOLERANCE,
+    confidence=0.95,
+    output=None,
+):
+    current = benchmark.runSuite(directory, scale, names, repeats)
+    makedirs(baselineDirectory, exist_ok=True)
+    baselinePath = baselineFile(baselineDirectory, current['machine'], scale)
+
+    verdict = {
+        'machine': machineKey(current['machine']),
+        'scale': scale,
+        'baseline': baselinePath,
+        'tolerance': tolerance,
+        'confidence': confidence,
+    }
+    baseline = None
+    if not updateBaseline and isfile(baselinePath):
+        with open(baselinePath) as baselineInput:
+            baseline = json.load(baselineInput)
+    if baseline is None:
+        with open(baselinePath, 'w') as baselineOutput:
+            json.dump(current, baselineOutput, indent=2)
+        verdict['status'] = 'baselined'
+        verdict['benchmarks'] = {}
+    elif baseline['sizes'] != current['sizes']:
+        # CI reads the verdict, so a mismatch is reported there too
+        verdict['status'] = 'error'
+        verdict['error'] = (
+            'baseline sizes {} differ from current sizes {}'.format(
+                baseline['sizes'],
+                current['sizes'],
+            )
+        )
+        verdict['benchmarks'] = {}
+    else:
+        verdict['benchmarks'] = compareSuites(
+            baseline,
+            current,
+            tolerance,
+            confidence,
+        )
+        verdict['unbaselined'] = sorted(
+            set(current['results']) - set(baseline['results']),
+        )
+        regressed = any(
+            comparison['verdict'] == 'regression'
+            for metrics in verdict['benchmarks'].values()
+            for comparison in metrics.values()
+        )
+        verdict['status'] = 'fail' if regressed else 'pass'
+
+    report = json.dumps(verdict, indent=2)
+    print(report)
+    if output is not None:
+        with open(output, 'w') as outputFile:
+            outputFile.write(report)
+    return EXIT_CODES[verdict['status']]
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description='Fail when benchmarks regress against this machine\'s '
+                    'stored baseline',
+    )
+    parser.add_argument(
+        'names',
+        nargs='*',
+        help=', '.join(benchmark.BENCHMARKS),
+    )
+    parser.add_argument(
+        '--directory',
+        type=userPath,
+        default=mlPath('../resources/synthetic/'),
+    )
+    parser.add_argument(
+        '--scale',
+        default='small',
+        choices=list(benchmark.syntheticData.SCALES),
+    )
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument(
+        '--baseline-directory',
+        type=userPath,
+        default=mlPath(BASELINE_DIRECTORY),
+    )
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=TOLERANCE,
+        help='smallest relative change that counts',
+    )
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--output', type=userPath)
+    args = parser.parse_args(argv)
+    return {
+        'directory': args.directory,
+        'scale': args.scale,
+        'names': args.names or None,
+        'repeats': args.repeats,
+        'baselineDirectory': args.baseline_directory,
+        'updateBaseline': args.update_baseline,
+        'tolerance': args.tolerance,
+        'confidence': args.confidence,
+        'output': args.output,
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(main(**parseArguments(sys.argv[1:])))
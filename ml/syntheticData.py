@@ -0,0 +1,216 @@
+import json
+import shutil
+from os import makedirs, remove
+from os.path import join, isfile
+import numpy as np
+
+TRACK_FIELDS = [
+    'acousticness',
+    'danceability',
+    'duration',
+    'energy',
+    'explicit',
+    'instrumentalness',
+    'liveness',
+    'loudness',
+    'mode',
+    'popularity',
+    'speechiness',
+    'tempo',
+    'timeSignature',
+    'trackNumber',
+    'valence',
+]
+ENCODED_TRACK_DIMENSION = 13
+ALBUM_SEQUENCE_LENGTH = 6
+ARTIST_SEQUENCE_LENGTH = 5
+ALBUM_FEATURE_COUNT = 35
+ARTIST_FEATURE_COUNT = 29
+TASTE_DIMENSION = 16
+ENCODED_ARTISTS_DIMENSION = 20
+TASTE_BUCKETS = ['1', '2', '3', '4', '5', '6']
+GENERATED_DIRECTORIES = ['track', 'album', 'artist', 'profile']
+CHUNK_ROWS = 100000
+SCALES = {
+    'small': {
+        'tracks': 20000,
+        'albums': 2000,
+        'artists': 1000,
+        'profiles': 40,
+        'reviewsPerProfile': 200,
+    },
+    'medium': {
+        'tracks': 400000,
+        'albums': 20000,
+        'artists': 10000,
+        'profiles': 200,
+        'reviewsPerProfile': 800,
+    },
+    'large': {
+        'tracks': 2000000,
+        'albums': 100000,
+        'artists': 50000,
+        'profiles': 1000,
+        'reviewsPerProfile': 2000,
+    },
+}
+
+
+def writeRows(fileName, rowCount, columnCount, header=None, seed=0):
+    generator = np.random.default_rng(seed)
+    with open(fileName, 'w') as dataFile:
+        if header is not None:
+            dataFile.write(','.join(header) + '\n')
+        for start in range(0, rowCount, CHUNK_ROWS):
+            rows = generator.random(
+                (min(CHUNK_ROWS, rowCount - start), columnCount),
+            )
+            np.savetxt(dataFile, rows, fmt='%.6f', delimiter=',')
+
+
+def writeSequenceFiles(
+    directory,
+    fileCount,
+    sequenceLength,
+    featureCount,
+    minimumLength=None,
+    seed=0,
+):
+    generator = np.random.default_rng(seed)
+    makedirs(directory, exist_ok=True)
+    for fileIndex in range(fileCount):
+        sequence = generator.random((sequenceLength, featureCount))
+        if minimumLength is not None:
+            length = generator.integers(minimumLength, sequenceLength + 1)
+            sequence[length:] = 0
+        np.savetxt(
+            join(directory, '{}.csv'.format(fileIndex)),
+            sequence,
+            fmt='%.6f',
+            delimiter=',',
+        )
+
+
+def writeProfiles(
+    directory,
+    profileCount,
+    reviewsPerProfile,
+    seed=0,
+):
+    generator = np.random.default_rng(seed)
+    reviewsDirectory = join(directory, 'profile', 'reviews')
+    artistsDirectory = join(directory, 'profile', 'artists')
+    encodedArtistsDirectory = join(directory, 'profile', 'encodedArtists')
+    tasteDirectory = join(directory, 'profile', 'taste')
+    for profileDirectory in [
+        reviewsDirectory,
+        artistsDirectory,
+        encodedArtistsDirectory,
+    ] + [join(tasteDirectory, bucket) for bucket in ['all'] + TASTE_BUCKETS]:
+        makedirs(profileDirectory, exist_ok=True)
+
+    for profileIndex in range(profileCount):
+        filename = '{}.csv'.format(profileIndex)
+        # ratings follow a hidden linear taste so the perceptron can learn
+        taste = generator.normal(0, 0.3, TASTE_DIMENSION)
+        features = generator.random((reviewsPerProfile, TASTE_DIMENSION))
+        ratings = np.clip(
+            features @ taste + generator.normal(0, 0.05, reviewsPerProfile),
+            0,
+            1,
+        )
+        np.savetxt(
+            join(reviewsDirectory, filename),
+            np.column_stack([ratings, features]),
+            fmt='%.6f',
+            delimiter=',',
+        )
+        np.savetxt(
+            join(artistsDirectory, filename),
+            generator.random((ARTIST_SEQUENCE_LENGTH, TASTE_DIMENSION)),
+            fmt='%.6f',
+            delimiter=',',
+        )
+        np.savetxt(
+            join(encodedArtistsDirectory, filename),
+            [generator.random(ENCODED_ARTISTS_DIMENSION)],
+            fmt='%.6f',
+            delimiter=',',
+        )
+        for bucket in ['all', TASTE_BUCKETS[profileIndex % 6]]:
+            np.savetxt(
+                join(tasteDirectory, bucket, filename),
+                [taste],
+                fmt='%.10f',
+                delimiter=',',
+            )
+
+
+def generate(directory, scale='small', seed=0, **sizes):
+    sizes = dict(SCALES[scale], **sizes)
+    markerFile = join(directory, 'sizes.json')
+    if isfile(markerFile):
+        with open(markerFile) as marker:
+            if json.load(marker) == dict(sizes, seed=seed):
+                return sizes
+        remove(markerFile)
+
+    # files left by a larger scale or another seed would be loaded too
+    for generated in GENERATED_DIRECTORIES:
+        shutil.rmtree(join(directory, generated), ignore_errors=True)
+    makedirs(join(directory, 'track'), exist_ok=True)
+    writeRows(
+        join(directory, 'track', 'all.csv'),
+        sizes['tracks'],
+        len(TRACK_FIELDS),
+        header=TRACK_FIELDS,
+        seed=seed,
+    )
+    writeSequenceFiles(
+        join(directory, 'album'),
+        sizes['albums'],
+        ALBUM_SEQUENCE_LENGTH,
+        ENCODED_TRACK_DIMENSION,
+        minimumLength=2,
+        seed=seed + 1,
+    )
+    writeSequenceFiles(
+        join(directory, 'artist'),
+        sizes['artists'],
+        ARTIST_SEQUENCE_LENGTH,
+        ENCODED_TRACK_DIMENSION,
+        minimumLength=1,
+        seed=seed + 2,
+    )
+    makedirs(join(directory, 'album', 'all'), exist_ok=True)
+    writeRows(
+        join(directory, 'album', 'all', 'data.csv'),
+        sizes['albums'],
+        ALBUM_FEATURE_COUNT,
+        seed=seed + 3,
+    )
+    makedirs(join(directory, 'artist', 'all'), exist_ok=True)
+    writeRows(
+        join(directory, 'artist', 'all', 'data.csv'),
+        sizes['artists'],
+        ARTIST_FEATURE_COUNT,
+        seed=seed + 4,
+    )
+    writeProfiles(
+        directory,
+        sizes['profiles'],
+        sizes['reviewsPerProfile'],
+        seed=seed + 5,
+    )
+
+    with open(markerFile, 'w') as marker:
+        json.dump(dict(sizes, seed=seed), marker)
+    return sizes
+
+
+def main(directory='../resources/synthetic/', scale='small', seed=0):
+    print(generate(directory, scale, seed))
+
+
+if __name__ == "__main__":
+    main()
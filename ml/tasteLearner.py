@@ -1,11 +1,13 @@
-from os import listdir
-from os.path import join, exists
+import time
+from os import listdir, remove
+from os.path import getmtime, join, exists
 import numpy as np
 from models.variableEpochPerceptron import (
     variableEpochPerceptron,
     summary,
 )
-from dataHelpers import pairsFromCsv
+from dataHelpers import appendJsonLine, pairsFromCsv
+from tasteNormalizer import tastePrior
 
 BUCKET_1_MAE_CAP = 0.05
 BUCKET_2_MAE_CAP = 0.10
@@ -21,16 +23,77 @@ BUCKET_4_SAVE_PATH = BASE_SAVE_PATH + '4/'
 BUCKET_5_SAVE_PATH = BASE_SAVE_PATH + '5/'
 BUCKET_6_SAVE_PATH = BASE_SAVE_PATH + '6/'
 PROFILE_REVIEWS_PATH = "../resources/data/profile/reviews/"
+TELEMETRY_LOG = "../resources/data/profile/tasteTelemetry.jsonl"
+BUCKETS = [
+    (BUCKET_1_MAE_CAP, BUCKET_1_SAVE_PATH),
+    (BUCKET_2_MAE_CAP, BUCKET_2_SAVE_PATH),
+    (BUCKET_3_MAE_CAP, BUCKET_3_SAVE_PATH),
+    (BUCKET_4_MAE_CAP, BUCKET_4_SAVE_PATH),
+    (BUCKET_5_MAE_CAP, BUCKET_5_SAVE_PATH),
+]
 
 
-def main():
+def maeBucket(mae):
+    for bucket, (maeCap, savePath) in enumerate(BUCKETS):
+        if mae < maeCap:
+            return bucket + 1, savePath
+    return len(BUCKETS) + 1, BUCKET_6_SAVE_PATH
+
+
+def bucketSavePaths():
+    return [savePath for maeCap, savePath in BUCKETS] + [BUCKET_6_SAVE_PATH]
+
+
+def previousBucket(filename):
+    for bucket, savePath in enumerate(bucketSavePaths()):
+        if exists(join(savePath, filename)):
+            return bucket + 1
+    return None
+
+
+def loadPriors(prior):
+    priors = {}
+    if prior is None:
+        return priors
+    priors['population'] = tastePrior(tasteDirectory=BASE_SAVE_PATH)
+    if prior == 'bucket':
+        for bucket in range(1, len(bucketSavePaths()) + 1):
+            priors[bucket] = tastePrior([str(bucket)], BASE_SAVE_PATH)
+    return priors
+
+
+def needsLearning(filename, relearnUpdated=False):
+    reviewsFile = join(PROFILE_REVIEWS_PATH, filename)
+    tasteFile = join(ALL_SAVE_PATH, filename)
+    if not exists(reviewsFile):
+        return False
+    if not exists(tasteFile):
+        return True
+    return relearnUpdated and getmtime(reviewsFile) > getmtime(tasteFile)
+
+
+def profilePrior(filename, priors):
+    # only profiles learned before have a previous bucket, so bucket
+    # priors apply when relearnUpdated retrains them
+    bucket = previousBucket(filename)
+    if priors.get(bucket) is not None:
+        return priors[bucket], 'bucket'
+    if priors.get('population') is not None:
+        return priors['population'], 'population'
+    return None, 'cold'
+
+
+def main(prior=None, regularizeToPrior=False, relearnUpdated=False):
+    if prior not in [None, 'population', 'bucket']:
+        raise ValueError('unknown prior {}'.format(prior))
     allHist = []
+    # priors are fixed from the previous run's tastes before any relearning
+    priors = loadPriors(prior)
     for filename in listdir(PROFILE_REVIEWS_PATH):
         profileReviewsFile = join(PROFILE_REVIEWS_PATH, filename)
-        profileTasteFile = join(ALL_SAVE_PATH, filename)
-        if not exists(profileReviewsFile):
-            continue
-        if exists(profileTasteFile):
+        # relearnUpdated retrains profiles whose reviews changed since
+        # their taste was saved, which is where bucket priors apply
+        if not needsLearning(filename, relearnUpdated):
             continue
 
         (
@@ -48,11 +111,14 @@ def main():
             skipHeader=0,
         )
 
+        startTime = time.perf_counter()
         print('\nBeginning training for user {} ({} reviews)'.format(
             filename,
             trainingExampleCount,
         ))
 
+        priorWeights, priorMode = profilePrior(filename, priors)
+
         learningRates = [0.002]
         if trainingExampleCount < 2000:
             learningRates.append(0.02)
@@ -72,20 +138,12 @@ def main():
             dropoutRate=0.1,
             regularlizationFactor=0.01,
             useBias=False,
+            initialWeights=priorWeights,
+            priorWeights=priorWeights if regularizeToPrior else None,
         )
 
         savePath = join(ALL_SAVE_PATH, filename)
-        bucketSavePath = BUCKET_6_SAVE_PATH
-        if histDict['mae'] < BUCKET_1_MAE_CAP:
-            bucketSavePath = BUCKET_1_SAVE_PATH
-        elif histDict['mae'] < BUCKET_2_MAE_CAP:
-            bucketSavePath = BUCKET_2_SAVE_PATH
-        elif histDict['mae'] < BUCKET_3_MAE_CAP:
-            bucketSavePath = BUCKET_3_SAVE_PATH
-        elif histDict['mae'] < BUCKET_4_MAE_CAP:
-            bucketSavePath = BUCKET_4_SAVE_PATH
-        elif histDict['mae'] < BUCKET_5_MAE_CAP:
-            bucketSavePath = BUCKET_5_SAVE_PATH
+        bucket, bucketSavePath = maeBucket(histDict['mae'])
         bucketSavePath = join(bucketSavePath, filename)
 
         np.savetxt(
@@ -100,6 +158,28 @@ def main():
             fmt="%.10f",
             delimiter=',',
         )
+        # a relearned profile may have moved, and loaders take the first
+        # bucket they find it in
+        for otherSavePath in bucketSavePaths():
+            staleFile = join(otherSavePath, filename)
+            if staleFile != bucketSavePath and exists(staleFile):
+                remove(staleFile)
+
+        appendJsonLine(TELEMETRY_LOG, {
+            'profile': filename,
+            'reviews': trainingExampleCount,
+            'epochs': int(histDict['epochs']),
+            'learningRate': float(histDict['lr']),
+            'wallSeconds': time.perf_counter() - startTime,
+            'mae': float(histDict['mae']),
+            'valMae': float(histDict['val_mae']),
+            'bucket': bucket,
+            'prior': priorMode,
+            'regularizeToPrior': bool(
+                regularizeToPrior and priorWeights is not None
+            ),
+            'finishedAt': time.time(),
+        })
 
         allHist.append(histDict)
         summary(
@@ -1,13 +1,123 @@
-from models.denseNet import denseNet
+from functools import partial
+from models.denseNet import averagedModel, denseNet, memberModels
+from batchSizeTuner import tuneBatchSize
+from crossValidation import crossValidate
 from dataHelpers import pairsFromCsvFiles
-import tensorflowjs as tfjs
+from modelExport import exportModels
 
 PROFILE_TASTE_BUCKETS_PATH = "../resources/data/profile/taste/"
 PROFILE_ENCODED_ARTISTS_PATH = "../resources/data/profile/encodedArtists/"
+DATASET_CACHE_FILE = "../resources/data/profile/tasteMapperPairs.npz"
 MODEL_SAVE_PATH = "../resources/models/taste"
+LABEL_BUCKETS = ['1', '2', '4', '5', '6', '3']
+TEST_SIZE = 10
+VALIDATION_SIZE = 10
+MODEL_PARAMETERS = {
+    'activation': 'relu',
+    'batchSize': 2,
+    'dropoutRate': 0,
+    'epochs': 2000,
+    'learningRate': 0.0002,
+    'regularizationRate': 0.25,
+    'intermediateDimensions': [17, 19],
+}
+TUNING_EPOCHS = 200
 
 
-def main():
+def loadData(testSize=TEST_SIZE, validationSize=VALIDATION_SIZE):
+    return pairsFromCsvFiles(
+        PROFILE_ENCODED_ARTISTS_PATH,
+        PROFILE_TASTE_BUCKETS_PATH,
+        testSize,
+        validationSize,
+        skipHeader=0,
+        labelBuckets=LABEL_BUCKETS,
+        cacheFile=DATASET_CACHE_FILE,
+    )
+
+
+def crossValidateMapper(
+    folds,
+    workerCount=None,
+    threadsPerWorker=0,
+    ensembleSize=1,
+):
+    # loading everything as training data fills the cache the folds read
+    features = loadData(0, 0)[0]
+    foldScores, summary = crossValidate(
+        DATASET_CACHE_FILE,
+        # the test profiles stay held out of every fold
+        list(range(TEST_SIZE, len(features))),
+        folds,
+        workerCount,
+        threadsPerWorker,
+        ensembleSize=ensembleSize,
+        **MODEL_PARAMETERS,
+    )
+    for fold, scores in enumerate(foldScores):
+        print('fold {}\t{}'.format(fold, '\t'.join(
+            '{}: {:.6f}'.format(metric, score)
+            for metric, score in scores.items()
+        )))
+    for metric, statistics in summary.items():
+        print('{}\tmean: {:.6f}\tstd: {:.6f}\tstandard error: {:.6f}'.format(
+            metric,
+            statistics['mean'],
+            statistics['std'],
+            statistics['standardError'],
+        ))
+    return summary
+
+
+def tunedParameters(
+    trainFeatures,
+    trainLabels,
+    validationFeatures,
+    validationLabels,
+    batchSizes,
+):
+    fixedParameters = {
+        name: value for name, value in MODEL_PARAMETERS.items()
+        if name not in ('batchSize', 'learningRate', 'epochs')
+    }
+    best, _ = tuneBatchSize(
+        partial(
+            denseNet,
+            trainFeatures,
+            trainLabels,
+            validationFeatures,
+            validationLabels,
+            **fixedParameters,
+        ),
+        validationFeatures,
+        validationLabels,
+        len(trainFeatures),
+        MODEL_PARAMETERS['batchSize'],
+        MODEL_PARAMETERS['learningRate'],
+        batchSizes=batchSizes,
+        epochs=TUNING_EPOCHS,
+    )
+    return dict(
+        MODEL_PARAMETERS,
+        batchSize=best['batchSize'],
+        learningRate=best['learningRate'],
+    )
+
+
+def main(
+    quantization=None,
+    pruneFraction=0,
+    folds=0,
+    workerCount=None,
+    threadsPerWorker=0,
+    ensembleSize=1,
+    exportMembers=False,
+    tuneBatchSizes=None,
+):
+    if folds > 1:
+        crossValidateMapper(folds, workerCount, threadsPerWorker, ensembleSize)
+        return
+
     (
         trainFeatures,
         trainLabels,
@@ -15,31 +125,43 @@ def main():
         validationLabels,
         testFeatures,
         testLabels,
-    ) = pairsFromCsvFiles(
-        PROFILE_ENCODED_ARTISTS_PATH,
-        PROFILE_TASTE_BUCKETS_PATH,
-        10,
-        10,
-        skipHeader=0,
-        labelBuckets=['1', '2', '4', '5', '6', '3'],
-    )
+    ) = loadData()
+    parameters = MODEL_PARAMETERS
+    if tuneBatchSizes:
+        parameters = tunedParameters(
+            trainFeatures,
+            trainLabels,
+            validationFeatures,
+            validationLabels,
+            tuneBatchSizes,
+        )
     model = denseNet(
         trainFeatures,
         trainLabels,
         validationFeatures,
         validationLabels,
-        activation='relu',
-        batchSize=2,
-        dropoutRate=0,
-        epochs=2000,
-        learningRate=0.0002,
-        regularizationRate=0.25,
-        intermediateDimensions=[17, 19],
+        ensembleSize=ensembleSize,
+        **parameters,
     )
+    models = {MODEL_SAVE_PATH: model}
+    if ensembleSize > 1:
+        # the export is built from plain Dense layers so tfjs can load it
+        members = memberModels(model)
+        model = averagedModel(members)
+        models = {MODEL_SAVE_PATH: model}
+        if exportMembers:
+            models = {
+                '{}/member{}'.format(MODEL_SAVE_PATH, i): member
+                for i, member in enumerate(members)
+            }
 
-    tfjs.converters.save_keras_model(
-        model,
-        MODEL_SAVE_PATH,
+    exportModels(
+        models,
+        quantization=quantization,
+        pruneFraction=pruneFraction,
+        evaluationModel=model,
+        evaluationFeatures=testFeatures,
+        evaluationLabels=testLabels,
     )
 
 
@@ -1,9 +1,32 @@
-from dataHelpers import pairsFromCsvFiles
+from os.path import exists, join
+from dataHelpers import fromCsvBuckets, pairsFromCsvFiles
 import numpy as np
 
 PROFILE_TASTE_BUCKETS_PATH = "../resources/data/profile/taste/"
 PROFILE_ENCODED_ARTISTS_PATH = "../resources/data/profile/encodedArtists/"
 MODEL_SAVE_PATH = "../resources/models/taste"
+TASTE_BUCKETS = ['1', '2', '3', '4', '5', '6']
+
+
+def tastePrior(
+    buckets=TASTE_BUCKETS,
+    tasteDirectory=PROFILE_TASTE_BUCKETS_PATH,
+):
+    # None when every bucket is empty
+    buckets = [
+        bucket for bucket in buckets
+        if exists(join(tasteDirectory, bucket))
+    ]
+    tastes, _, _ = fromCsvBuckets(
+        tasteDirectory,
+        buckets,
+        0,
+        0,
+        skipHeader=0,
+    )
+    if len(tastes) == 0:
+        return None
+    return tastes.mean(axis=0)
 
 
 def main():
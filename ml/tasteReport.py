@@ -0,0 +1,132 @@
+from os import listdir
+from os.path import join, exists
+import numpy as np
+from dataHelpers import readJsonLines
+
+ALL_SAVE_PATH = "../resources/data/profile/taste/all/"
+PROFILE_REVIEWS_PATH = "../resources/data/profile/reviews/"
+TELEMETRY_LOG = "../resources/data/profile/tasteTelemetry.jsonl"
+PERCENTILES = [50, 90, 99]
+SLOWEST_PROFILE_COUNT = 5
+
+
+def trainingReviewCount(rowCount):
+    # tasteLearner holds out a tenth of each profile's rows for validation,
+    # and telemetry counts only the training rows
+    return rowCount - rowCount // 10
+
+
+def remainingReviewCounts():
+    counts = []
+    for filename in listdir(PROFILE_REVIEWS_PATH):
+        if exists(join(ALL_SAVE_PATH, filename)):
+            continue
+        with open(join(PROFILE_REVIEWS_PATH, filename)) as reviewsFile:
+            counts.append(trainingReviewCount(
+                sum(1 for line in reviewsFile if line.strip()),
+            ))
+    return counts
+
+
+def printPercentiles(name, values, formatString):
+    print('{:12s}\t'.format(name) + '\t'.join(
+        ('p{}: ' + formatString).format(percentile, value)
+        for percentile, value in zip(
+            PERCENTILES,
+            np.percentile(values, PERCENTILES),
+        )
+    ))
+
+
+def printPriorComparison(records, secondsPerReview):
+    # records from before warm starts existed were all cold starts
+    modes = {}
+    for index, record in enumerate(records):
+        mode = record.get('prior', 'cold')
+        if record.get('regularizeToPrior'):
+            mode += ' (regularized)'
+        modes.setdefault(mode, []).append(index)
+    if len(modes) < 2 and 'cold' in modes:
+        return
+
+    epochs = np.array([record['epochs'] for record in records])
+    maes = np.array([record['mae'] for record in records])
+    coldEpochs = np.median(epochs[modes['cold']]) if 'cold' in modes else None
+    print('\n{:28s}\tprofiles\tepochs\ts/review\tmae\tepochs vs cold'
+          .format('start'))
+    for mode, indices in sorted(modes.items()):
+        medianEpochs = np.median(epochs[indices])
+        print('{:28s}\t{:<8d}\t{:.0f}\t{:.4f}\t\t{:.4f}\t{}'.format(
+            mode,
+            len(indices),
+            medianEpochs,
+            np.median(secondsPerReview[indices]),
+            np.median(maes[indices]),
+            '-' if not coldEpochs
+            else '{:.2f}x'.format(medianEpochs / coldEpochs),
+        ))
+
+
+def main(telemetryLog=TELEMETRY_LOG):
+    records = readJsonLines(telemetryLog) if exists(telemetryLog) else []
+    if not records:
+        print('no taste learning records in {}'.format(telemetryLog))
+        return
+
+    wallSeconds = np.array([record['wallSeconds'] for record in records])
+    reviews = np.array([record['reviews'] for record in records])
+    secondsPerReview = wallSeconds / np.maximum(reviews, 1)
+    print('{} profiles, {:.1f}h total'.format(
+        len(records),
+        wallSeconds.sum() / 3600,
+    ))
+    printPercentiles('seconds', wallSeconds, '{:.1f}')
+    printPercentiles(
+        'epochs',
+        [record['epochs'] for record in records],
+        '{:.0f}',
+    )
+    printPercentiles('reviews', reviews, '{:.0f}')
+    printPercentiles('s/review', secondsPerReview, '{:.4f}')
+
+    buckets = {}
+    for record in records:
+        buckets[record['bucket']] = buckets.get(record['bucket'], 0) + 1
+    print('buckets\t\t' + '\t'.join(
+        '{}: {}'.format(bucket, count)
+        for bucket, count in sorted(buckets.items())
+    ))
+    learningRates = {}
+    for record in records:
+        learningRate = record['learningRate']
+        learningRates[learningRate] = learningRates.get(learningRate, 0) + 1
+    print('learning rates\t' + '\t'.join(
+        '{}: {}'.format(learningRate, count)
+        for learningRate, count in sorted(learningRates.items())
+    ))
+
+    printPriorComparison(records, secondsPerReview)
+
+    print('\nslowest profiles per review')
+    for index in np.argsort(secondsPerReview)[::-1][:SLOWEST_PROFILE_COUNT]:
+        record = records[index]
+        print('{:20s}\t{:.1f}s\t{} reviews\t{} epochs\tmae: {:.4f}'.format(
+            record['profile'],
+            record['wallSeconds'],
+            record['reviews'],
+            record['epochs'],
+            record['mae'],
+        ))
+
+    remaining = remainingReviewCounts()
+    etaSeconds = (
+        sum(remaining) * wallSeconds.sum() / max(reviews.sum(), 1)
+    )
+    print('\n{} profiles remaining, ETA {:.1f}h'.format(
+        len(remaining),
+        etaSeconds / 3600,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+ML_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ML_DIRECTORY not in sys.path:
+    sys.path.insert(0, ML_DIRECTORY)
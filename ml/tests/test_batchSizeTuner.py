@@ -0,0 +1,94 @@
+import numpy as np
+from batchSizeTuner import (
+    epochsToTarget,
+    scaledLearningRate,
+    tuneBatchSize,
+)
+
+
+class FakeHistory:
+    def __init__(self, curve):
+        self.history = {'val_loss': curve}
+
+
+class FakeModel:
+    def __init__(self, curve, finalLoss):
+        self.history = FakeHistory(curve)
+        self.finalLoss = finalLoss
+        self.evaluated = []
+
+    def evaluate(self, features, labels, batch_size, verbose):
+        self.evaluated.append((features, labels, batch_size))
+        return [self.finalLoss, 0]
+
+
+def test_scaledLearningRate():
+    assert scaledLearningRate(0.1, 2, 8, 'linear') == 0.4
+    assert np.isclose(scaledLearningRate(0.1, 2, 8, 'sqrt'), 0.2)
+    assert scaledLearningRate(0.1, 2, 8, None) == 0.1
+
+
+def test_epochsToTarget():
+    assert epochsToTarget([3, 2, 1], 2) == 2
+    assert epochsToTarget([3, 2, 1], 0.5) is None
+
+
+def test_candidatesValidateOnTheSameFullSet():
+    features = np.zeros((10, 3))
+    labels = np.zeros((10, 1))
+    calls = []
+    models = []
+    curves = {
+        2: [0.5, 0.3, 0.2],
+        8: [0.4, 0.2, 0.2],
+        32: [0.9, 0.8, 0.7],
+    }
+
+    def train(batchSize, learningRate, epochs, validationSteps):
+        calls.append((batchSize, validationSteps))
+        models.append(FakeModel(curves[batchSize], min(curves[batchSize])))
+        return models[-1]
+
+    best, results = tuneBatchSize(
+        train,
+        features,
+        labels,
+        sampleCount=10,
+        baseBatchSize=2,
+        baseLearningRate=0.01,
+        batchSizes=[8, 32],
+        epochs=3,
+        verbose=0,
+    )
+    assert [batchSize for batchSize, _ in calls] == [2, 8, 32]
+    assert all(steps is None for _, steps in calls)
+    for model in models:
+        (evaluatedFeatures, evaluatedLabels, batchSize), = model.evaluated
+        assert evaluatedFeatures is features
+        assert evaluatedLabels is labels
+        assert batchSize == models[0].evaluated[0][2]
+    assert best['batchSize'] in (2, 8)
+    assert results[2]['epochsToTarget'] is None
+    assert all('model' not in result for result in results)
+
+
+def test_divergedBaseKeepsTheBaseBatchSize():
+    features = np.zeros((10, 3))
+    labels = np.zeros((10, 1))
+
+    def train(batchSize, learningRate, epochs, validationSteps):
+        return FakeModel([float('nan')] * epochs, float('nan'))
+
+    best, results = tuneBatchSize(
+        train,
+        features,
+        labels,
+        sampleCount=10,
+        baseBatchSize=4,
+        baseLearningRate=0.01,
+        batchSizes=[8, 16],
+        epochs=2,
+        verbose=0,
+    )
+    assert best is results[0]
+    assert best['batchSize'] == 4
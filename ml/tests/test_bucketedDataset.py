@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from dataHelpers import (
+    bucketBatches,
+    padSequences,
+    shardBatches,
+    trueSequenceLength,
+)
+
+
+def sequences(lengths, featureCount=2):
+    return [
+        np.full((length, featureCount), i + 1, dtype=np.float32)
+        for i, length in enumerate(lengths)
+    ]
+
+
+def batchRows(batches):
+    return sorted(
+        int(row[0, 0]) for features, _ in batches for row in features
+    )
+
+
+def test_padSequences():
+    padded = padSequences(sequences([1, 3]), 2)
+    assert padded.shape == (2, 2, 2)
+    assert np.all(padded[0, 1] == 0)
+    assert np.all(padded[1] == 2)
+
+
+def test_trueSequenceLength():
+    sequence = np.array([[1, 2], [3, 0], [0, 0]])
+    assert trueSequenceLength(sequence) == 2
+
+
+def test_bucketBatchesGroupLengths():
+    data = sequences([2, 2, 5, 5, 5, 9])
+    batches = bucketBatches(data, 2, shuffle=False)
+    for features, labels in batches:
+        assert features is labels
+        assert np.all(features[:, -1] != 0)
+    assert batchRows(batches) == [1, 2, 3, 4, 5, 6]
+
+
+def test_bucketBatchesSeededShuffleAgrees():
+    data = sequences([2, 3, 3, 4, 4, 4, 4, 5, 5, 6])
+    first = bucketBatches(data, 2, generator=np.random.default_rng([0, 1]))
+    second = bucketBatches(data, 2, generator=np.random.default_rng([0, 1]))
+    assert [batchRows([batch]) for batch in first] == [
+        batchRows([batch]) for batch in second
+    ]
+
+
+@pytest.mark.parametrize('shardCount', [2, 3])
+def test_shardBatchesSplitEveryBatch(shardCount):
+    data = sequences([4] * 7 + [6] * 5)
+    batches = bucketBatches(data, 4, shuffle=False)
+    shards = [
+        shardBatches(batches, shardIndex, shardCount)
+        for shardIndex in range(shardCount)
+    ]
+    # every worker runs the same number of steps on disjoint rows
+    assert len(set(len(shard) for shard in shards)) == 1
+    rows = [batchRows(shard) for shard in shards]
+    allRows = sum(rows, [])
+    assert len(allRows) == len(set(allRows))
+    kept = [
+        batch for batch in batches if len(batch[0]) >= shardCount
+    ]
+    assert sorted(allRows) == batchRows(kept)
+
+
+def test_variableLengthAutoencoderUsesBuiltInLayers():
+    pytest.importorskip('tensorflow')
+    from models.lstmAutoencoder import buildLstmAutoencoder
+    auto, encoder, decoder = buildLstmAutoencoder(
+        6,
+        3,
+        2,
+        None,
+        0.001,
+        'mse',
+        [],
+        variableLength=True,
+    )
+    assert 'RepeatToLength' not in auto.to_json()
+    batch = padSequences(sequences([4, 2], 3), 4)
+    assert auto.predict_on_batch(batch).shape == (2, 4, 3)
+    assert decoder.output_shape == (None, 6, 3)
@@ -0,0 +1,104 @@
+import os
+import numpy as np
+import pytest
+from crossValidation import crossValidate, foldIndices, summarizeFolds
+from dataHelpers import loadCachedArrays, pairsFromCsvFiles
+
+
+def test_foldIndicesPartitionSamples():
+    folds = foldIndices(list(range(10, 33)), 4, seed=1)
+    assert len(folds) == 4
+    assert sorted(np.concatenate(folds)) == list(range(10, 33))
+    assert max(map(len, folds)) - min(map(len, folds)) <= 1
+    again = foldIndices(list(range(10, 33)), 4, seed=1)
+    assert all(np.array_equal(a, b) for a, b in zip(folds, again))
+
+
+def test_summarizeFolds():
+    summary = summarizeFolds([{'mae': 1.0}, {'mae': 3.0}])
+    assert summary['mae']['mean'] == 2
+    assert np.isclose(summary['mae']['std'], np.sqrt(2))
+    assert np.isclose(summary['mae']['standardError'], 1)
+    assert isinstance(summary['mae']['standardError'], float)
+    assert summarizeFolds([{'mae': 1.0}])['mae']['std'] == 0
+
+
+def writePairs(directory, count):
+    features = directory / 'features'
+    labels = directory / 'labels'
+    features.mkdir()
+    labels.mkdir()
+    generator = np.random.default_rng(0)
+    for i in range(count):
+        np.savetxt(
+            features / '{}.csv'.format(i),
+            generator.random((1, 4)),
+            delimiter=',',
+        )
+        np.savetxt(
+            labels / '{}.csv'.format(i),
+            generator.random((1, 2)),
+            delimiter=',',
+        )
+    return str(features), str(labels)
+
+
+def test_pairsCacheRoundTrip(tmp_path):
+    features, labels = writePairs(tmp_path, 6)
+    cacheFile = str(tmp_path / 'pairs.npz')
+    first = pairsFromCsvFiles(features, labels, 1, 1, cacheFile=cacheFile)
+    assert os.path.isfile(cacheFile)
+    second = pairsFromCsvFiles(features, labels, 1, 1, cacheFile=cacheFile)
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+
+    sourceFiles = [
+        os.path.join(directory, name)
+        for name in os.listdir(features)
+        for directory in (features, labels)
+    ]
+    settings = repr((',', 0, 0, False))
+    cached = loadCachedArrays(cacheFile, sourceFiles, settings)
+    assert isinstance(cached, dict)
+    assert cached['features'].shape == (6, 4)
+    assert loadCachedArrays(cacheFile, sourceFiles, 'other') is None
+
+
+def test_staleCacheIsIgnored(tmp_path):
+    features, labels = writePairs(tmp_path, 4)
+    cacheFile = str(tmp_path / 'pairs.npz')
+    pairsFromCsvFiles(features, labels, 0, 0, cacheFile=cacheFile)
+    changedFile = os.path.join(features, '0.csv')
+    np.savetxt(changedFile, np.full((1, 4), 7.0), delimiter=',')
+    later = os.path.getmtime(cacheFile) + 10
+    os.utime(changedFile, (later, later))
+    trainFeatures = pairsFromCsvFiles(
+        features,
+        labels,
+        0,
+        0,
+        cacheFile=cacheFile,
+    )[0]
+    assert np.any(np.all(trainFeatures == 7.0, axis=-1))
+
+
+def test_crossValidateRunsEveryFold(tmp_path):
+    pytest.importorskip('tensorflow')
+    generator = np.random.default_rng(0)
+    datasetFile = str(tmp_path / 'dataset.npz')
+    np.savez(
+        datasetFile,
+        features=generator.random((12, 4)),
+        labels=generator.random((12, 2)),
+    )
+    foldScores, summary = crossValidate(
+        datasetFile,
+        list(range(12)),
+        folds=3,
+        workerCount=3,
+        threadsPerWorker=1,
+        epochs=1,
+        batchSize=4,
+    )
+    assert len(foldScores) == 3
+    assert 'loss' in summary
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+from models.denseNet import (  # noqa: E402
+    EnsembleDense,
+    averagedModel,
+    memberGlorotUniform,
+    memberModels,
+)
+
+
+def test_memberInitMatchesDense():
+    kernel = memberGlorotUniform((8, 64, 32)).numpy()
+    limit = np.sqrt(6 / (64 + 32))
+    assert np.abs(kernel).max() <= limit
+    # a uniform draw over +-limit has standard deviation limit / sqrt(3)
+    for member in kernel:
+        assert np.isclose(member.std(), limit / np.sqrt(3), rtol=0.1)
+    assert not np.allclose(kernel[0], kernel[1])
+
+
+def test_membersReproduceTheEnsemble():
+    inputs = tf.keras.Input(shape=(5,))
+    x = EnsembleDense(3, 4, activation='relu')(inputs)
+    x = EnsembleDense(3, 2)(x)
+    ensemble = tf.keras.Model(inputs, x)
+    features = np.random.default_rng(0).random((7, 5)).astype(np.float32)
+
+    outputs = ensemble.predict_on_batch(features)
+    members = memberModels(ensemble)
+    assert len(members) == 3
+    for member, model in enumerate(members):
+        np.testing.assert_allclose(
+            model.predict_on_batch(features),
+            outputs[:, member],
+            rtol=1e-5,
+            atol=1e-6,
+        )
+    np.testing.assert_allclose(
+        averagedModel(members).predict_on_batch(features),
+        outputs.mean(axis=1),
+        rtol=1e-5,
+        atol=1e-6,
+    )
@@ -0,0 +1,41 @@
+import numpy as np
+from distillTracksEncoder import codeMse, neighbourAgreement
+
+
+def test_codeMse():
+    teacher = np.array([[0.0, 1.0], [2.0, 3.0]])
+    assert codeMse(teacher, teacher) == 0
+    assert codeMse(teacher, teacher + 2) == 4
+
+
+def test_identicalCodesAgreeCompletely():
+    codes = np.random.default_rng(0).normal(size=(50, 4))
+    assert neighbourAgreement(codes, codes, neighbours=5) == 1
+
+
+def test_distancePreservingCodesAgree():
+    codes = np.random.default_rng(0).normal(size=(50, 4))
+    rotation, _ = np.linalg.qr(
+        np.random.default_rng(1).normal(size=(4, 4)),
+    )
+    shifted = codes @ rotation * 3 + 7
+    assert neighbourAgreement(codes, shifted, neighbours=5) == 1
+
+
+def test_agreementCountsSharedNeighbours():
+    # on a line each interior point's two nearest neighbours are its sides
+    teacher = np.arange(6, dtype=float)[:, None]
+    student = teacher.copy()
+    student[[0, 5]] = student[[5, 0]]
+    agreement = neighbourAgreement(teacher, student, neighbours=2)
+    assert 0 < agreement < 1
+    # mirroring the line moves every point but keeps its neighbours
+    assert neighbourAgreement(teacher, 5 - teacher, neighbours=2) == 1
+
+
+def test_unrelatedCodesAgreeRarely():
+    generator = np.random.default_rng(0)
+    teacher = generator.normal(size=(200, 8))
+    student = generator.normal(size=(200, 8))
+    # random neighbour sets overlap in about neighbours / (rows - 1)
+    assert neighbourAgreement(teacher, student, neighbours=10) < 0.2
@@ -0,0 +1,74 @@
+import json
+import os
+from functools import partial
+import numpy as np
+import pytest
+from distributedTraining import clusterConfig, freePorts, trainDataParallel
+
+SEQUENCE_LENGTH = 4
+FEATURE_COUNT = 3
+
+
+def loadData():
+    generator = np.random.default_rng(0)
+    data = generator.normal(
+        size=(32, SEQUENCE_LENGTH, FEATURE_COUNT),
+    ).astype(np.float32)
+    return data[:24], data[24:28], data[28:]
+
+
+def savePredictions(directory, auto, encoder, decoder, evaluationData=None):
+    # predicting on the chief alone hangs if the model is still mirrored
+    np.save(
+        os.path.join(directory, 'predictions.npy'),
+        auto.predict(evaluationData, batch_size=2),
+    )
+
+
+def saveWorkerWeights(directory, workerIndex, auto):
+    np.savez(
+        os.path.join(directory, 'worker{}.npz'.format(workerIndex)),
+        *auto.get_weights(),
+    )
+
+
+def test_clusterConfig():
+    config = json.loads(clusterConfig([1001, 1002], 1))
+    assert config['cluster']['worker'] == [
+        'localhost:1001',
+        'localhost:1002',
+    ]
+    assert config['task'] == {'type': 'worker', 'index': 1}
+
+
+def test_freePorts():
+    ports = freePorts(3)
+    assert len(set(ports)) == 3
+
+
+def test_workersStayInSyncAndChiefExports(tmp_path):
+    pytest.importorskip('tensorflow')
+    trainDataParallel(
+        loadData,
+        partial(savePredictions, str(tmp_path)),
+        2,
+        threadsPerWorker=1,
+        inspectWorker=partial(saveWorkerWeights, str(tmp_path)),
+        sequenceLength=SEQUENCE_LENGTH,
+        featureCount=FEATURE_COUNT,
+        encodingDimension=2,
+        hiddenDimension=4,
+        batchSize=8,
+        epochs=1,
+        validationSteps=None,
+    )
+    chief = np.load(tmp_path / 'worker0.npz')
+    worker = np.load(tmp_path / 'worker1.npz')
+    assert len(chief.files) > 0
+    assert np.load(tmp_path / 'predictions.npy').shape == (
+        4,
+        SEQUENCE_LENGTH,
+        FEATURE_COUNT,
+    )
+    for name in chief.files:
+        np.testing.assert_allclose(chief[name], worker[name], rtol=1e-6)
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from embeddingStore import (
+    EmbeddingStore,
+    encodeProducts,
+    kMeans,
+    pairCodes,
+    pairTables,
+    recall,
+    saveStore,
+    scalarQuantize,
+    trainCodebooks,
+)
+
+
+def embeddings(count=2000, dimension=8, seed=0):
+    return np.random.default_rng(seed).normal(
+        size=(count, dimension),
+    ).astype(np.float32)
+
+
+def test_kMeansFindsSeparatedClusters():
+    generator = np.random.default_rng(0)
+    centers = np.array([[0, 0], [10, 10], [-10, 10]], dtype=np.float32)
+    points = np.concatenate([
+        center + generator.normal(0, 0.1, (50, 2)) for center in centers
+    ]).astype(np.float32)
+    found = kMeans(points, 3)
+    for center in centers:
+        assert np.min(np.linalg.norm(found - center, axis=1)) < 0.5
+
+
+def test_encodeProductsPicksNearestCentroids():
+    data = embeddings(500)
+    codebooks = trainCodebooks(data, subspaces=4, centroids=16)
+    codes = encodeProducts(data, codebooks)
+    assert codes.shape == (500, 4)
+    for subspace in range(4):
+        columns = data[:, subspace * 2:(subspace + 1) * 2]
+        distances = np.linalg.norm(
+            columns[:, None] - codebooks[subspace][None],
+            axis=2,
+        )
+        np.testing.assert_array_equal(
+            codes[:, subspace],
+            np.argmin(distances, axis=1),
+        )
+
+
+def test_trainCodebooksRejectsUnevenSubspaces():
+    with pytest.raises(ValueError):
+        trainCodebooks(embeddings(dimension=6), subspaces=4)
+
+
+@pytest.mark.parametrize('subspaces', [4, 5])
+def test_pairedLookupsMatchPerSubspaceSums(subspaces):
+    generator = np.random.default_rng(0)
+    codes = generator.integers(0, 256, (100, subspaces)).astype(np.uint8)
+    table = generator.random((subspaces, 256)).astype(np.float32)
+    expected = table[np.arange(subspaces), codes].sum(axis=1)
+    paired = pairCodes(codes)
+    tables = pairTables(table)
+    scores = sum(
+        tables[pair].take(paired[:, pair]) for pair in range(len(tables))
+    )
+    np.testing.assert_allclose(scores, expected, rtol=1e-5)
+
+
+def test_pqScoresMatchReconstructedVectors(tmp_path):
+    data = embeddings()
+    saveStore(str(tmp_path), data, 'pq', subspaces=4)
+    store = EmbeddingStore(str(tmp_path), scorer='compressed')
+    assert store.bytesPerItem() == 4
+    codebooks = np.load(tmp_path / 'codebooks.npy')
+    codes = np.load(tmp_path / 'codes.npy')
+    reconstructed = np.concatenate(
+        [codebooks[subspace][codes[:, subspace]] for subspace in range(4)],
+        axis=1,
+    )
+    taste = embeddings(1, seed=1)[0]
+    np.testing.assert_allclose(
+        store.approximateScores(taste),
+        reconstructed @ taste,
+        rtol=1e-4,
+        atol=1e-4,
+    )
+
+
+def test_int8StoreIsFourTimesSmaller(tmp_path):
+    data = embeddings()
+    codes, (low, scale) = scalarQuantize(data)
+    np.testing.assert_allclose(codes * scale + low, data, atol=scale.max())
+    saveStore(str(tmp_path), data, 'int8')
+    store = EmbeddingStore(str(tmp_path), scorer='compressed')
+    assert data.shape[1] * 4 / store.bytesPerItem() == 4
+    taste = embeddings(1, seed=1)[0]
+    np.testing.assert_allclose(
+        store.approximateScores(taste),
+        data @ taste,
+        atol=0.1,
+    )
+    assert recall(store, embeddings(5, seed=2)) > 0.95
+
+
+def test_scorersAgreeOnTopItems(tmp_path):
+    data = embeddings()
+    saveStore(str(tmp_path), data, 'pq', subspaces=4)
+    taste = embeddings(1, seed=1)[0]
+    exactItems, exactScores = EmbeddingStore(
+        str(tmp_path),
+        scorer='exact',
+    ).topScores(taste, 10)
+    expected = np.argsort(-(data @ taste))[:10]
+    np.testing.assert_array_equal(exactItems, expected)
+    np.testing.assert_allclose(exactScores, (data @ taste)[expected])
+
+    compressed = EmbeddingStore(str(tmp_path), scorer='compressed')
+    items, _ = compressed.topScores(taste, 10, candidates=len(data))
+    np.testing.assert_array_equal(items, expected)
+    assert EmbeddingStore(str(tmp_path)).scorer == 'compressed'
+    with pytest.raises(ValueError):
+        EmbeddingStore(str(tmp_path), scorer='fast')
+
+
+def test_bytesPerItemFollowsTheScorer(tmp_path):
+    saveStore(str(tmp_path), embeddings(), 'int8')
+    assert EmbeddingStore(str(tmp_path)).bytesPerItem() == 8
+    assert EmbeddingStore(str(tmp_path), 'exact').bytesPerItem() == 32
@@ -0,0 +1,75 @@
+import types
+import numpy as np
+import encoderEvaluation
+from dataHelpers import fromCsvFiles
+from encoderEvaluation import (
+    evaluationData,
+    reconstructionErrors,
+    sampleNames,
+    saveErrorIndex,
+    worstSamples,
+)
+
+
+class ShiftModel:
+    # reconstructs every value off by its row's shift
+    def __init__(self, shifts):
+        self.shifts = shifts
+        self.batches = []
+
+    def predict_on_batch(self, batch):
+        start = sum(len(seen) for seen in self.batches)
+        self.batches.append(batch)
+        shifts = self.shifts[start:start + len(batch)]
+        return batch + shifts.reshape((-1,) + (1,) * (batch.ndim - 1))
+
+
+def test_reconstructionErrorsPerSample():
+    data = np.random.default_rng(0).normal(size=(10, 3, 2))
+    shifts = np.arange(10, dtype=np.float32) / 10
+    model = ShiftModel(shifts)
+    errors = reconstructionErrors(model, data, batchSize=4)
+    assert [len(batch) for batch in model.batches] == [4, 4, 2]
+    np.testing.assert_allclose(errors, shifts ** 2, rtol=1e-5, atol=1e-7)
+
+
+def test_errorIndexListsWorstFirst(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        encoderEvaluation,
+        'EVALUATION_DIRECTORY',
+        str(tmp_path),
+    )
+    names = ['a', 'b,with comma', 'c', 'd']
+    errors = np.array([0.2, 0.9, 0.1, 0.5])
+    saveErrorIndex('album', names, errors)
+    assert worstSamples('album', 3) == [
+        ('b,with comma', 0.9),
+        ('d', 0.5),
+        ('a', 0.2),
+    ]
+    assert len(worstSamples('album', 10)) == 4
+
+
+def test_sampleNamesFollowTheSplitOrder(tmp_path):
+    # each file's rows hold its own number, so names can be checked
+    # against the data the loader returned for them
+    for number in range(7):
+        np.savetxt(
+            tmp_path / 'sample{}.csv'.format(number),
+            np.full((3, 2), number),
+            delimiter=',',
+        )
+    (tmp_path / 'nested').mkdir()
+    script = types.SimpleNamespace(
+        loadData=lambda: fromCsvFiles(str(tmp_path), 2, 2, skipHeader=0),
+    )
+    for split, count in (('test', 2), ('all', 7)):
+        data = evaluationData(script, split)
+        names = sampleNames(str(tmp_path), len(data))
+        assert len(data) == len(names) == count
+        for name, sample in zip(names, data):
+            assert name == 'sample{}.csv'.format(int(sample[0, 0]))
+
+
+def test_rowNamesForSingleFiles(tmp_path):
+    assert sampleNames(str(tmp_path / 'data.csv'), 3) == ['0', '1', '2']
@@ -0,0 +1,99 @@
+import numpy as np
+from encodingCache import EncodingCache, modelWeightHash
+
+
+class DoublingModel:
+    output_shape = (None, 3)
+
+    def __init__(self, scale=2):
+        self.scale = scale
+        self.predicted = 0
+
+    def predict(self, inputs, batch_size):
+        self.predicted += len(inputs)
+        return inputs * self.scale
+
+    def to_json(self):
+        return '{"name": "doubling"}'
+
+    def get_weights(self):
+        return [np.full(3, self.scale, dtype=np.float32)]
+
+
+def rows(count, start=0):
+    return np.arange(start * 3, (start + count) * 3, dtype=np.float32).reshape(
+        count,
+        3,
+    )
+
+
+def test_predictionsMatchTheModel(tmp_path):
+    cache = EncodingCache(str(tmp_path / 'cache.sqlite'))
+    model = DoublingModel()
+    inputs = rows(5)
+    assert np.array_equal(cache.predict(model, inputs), inputs * 2)
+    assert np.array_equal(cache.predict(model, inputs), inputs * 2)
+    assert model.predicted == 5
+    assert cache.rowKeys('hash', inputs[:0]) == []
+
+
+def test_hitCounters(tmp_path):
+    cacheFile = str(tmp_path / 'cache.sqlite')
+    model = DoublingModel()
+    cache = EncodingCache(cacheFile)
+    cache.predict(model, rows(4))
+    cache.predict(model, rows(6))
+    assert cache.stats['misses'] == 6
+    assert cache.stats['memoryHits'] == 4
+    cache.close()
+
+    # a new cache starts with an empty memory tier and reads from disk
+    cache = EncodingCache(cacheFile)
+    cache.predict(model, rows(6))
+    assert cache.stats['diskHits'] == 6
+    assert cache.stats['misses'] == 0
+    assert cache.hitRate() == 1
+    assert model.predicted == 6
+
+
+def test_memoryKeepsTheMostRecentlyUsed(tmp_path):
+    cache = EncodingCache(str(tmp_path / 'cache.sqlite'), memoryEntries=2)
+    model = DoublingModel()
+    first, second, third = rows(1), rows(1, 1), rows(1, 2)
+    cache.predict(model, first)
+    cache.predict(model, second)
+    cache.predict(model, first)
+    cache.predict(model, third)
+    modelHash = modelWeightHash(model)
+    assert list(cache.memory) == [
+        cache.rowKeys(modelHash, row)[0] for row in (first, third)
+    ]
+
+
+def test_diskEvictsLeastRecentlyUsedBelowTheLimit(tmp_path):
+    cache = EncodingCache(str(tmp_path / 'cache.sqlite'), memoryEntries=0)
+    model = DoublingModel()
+    cache.predict(model, rows(10))
+    entryBytes = cache.storedBytes // 10
+    cache.diskBytes = entryBytes * 12
+    cache.predict(model, rows(5, 10))
+    assert cache.stats['diskEvictions'] > 0
+    assert cache.storedBytes <= cache.diskBytes
+    assert cache.storedBytes == cache.diskSize()
+    # the newest rows survive, the oldest are recomputed
+    predicted = model.predicted
+    cache.predict(model, rows(5, 10))
+    assert model.predicted == predicted
+    cache.predict(model, rows(1))
+    assert model.predicted == predicted + 1
+
+
+def test_changedWeightsMissOldEntries(tmp_path):
+    cache = EncodingCache(str(tmp_path / 'cache.sqlite'))
+    inputs = rows(4)
+    cache.predict(DoublingModel(), inputs)
+    retrained = DoublingModel(scale=3)
+    assert modelWeightHash(retrained) != modelWeightHash(DoublingModel())
+    assert np.array_equal(cache.predict(retrained, inputs), inputs * 3)
+    assert retrained.predicted == 4
+    assert cache.stats['misses'] == 8
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+import pytest
+from inferenceServer import InferenceHandler, InferenceServer, MicroBatcher
+
+
+class FakeModel:
+    def __init__(self, inputShape):
+        self.input_shape = (None,) + inputShape
+        self.batches = []
+
+    def predict_on_batch(self, inputs):
+        self.batches.append(inputs.shape)
+        return inputs.sum(axis=tuple(range(1, inputs.ndim)))[:, None]
+
+
+def test_concurrentRequestsShareABatch():
+    model = FakeModel((3,))
+    batcher = MicroBatcher(model, maxBatchSize=64, maxDelay=0.2)
+    futures = [batcher.submit(np.full((2, 3), i)) for i in range(5)]
+    results = [future.result(timeout=5) for future in futures]
+    for i, result in enumerate(results):
+        np.testing.assert_allclose(result, [[3 * i], [3 * i]])
+    assert model.batches == [(10, 3)]
+    metrics = batcher.metrics()
+    assert metrics['requests'] == 5
+    assert metrics['meanBatchRows'] == 10
+
+
+def test_singleItemAndShapeValidation():
+    batcher = MicroBatcher(FakeModel((3,)), maxDelay=0)
+    assert batcher.submit([1, 2, 3]).result(timeout=5).shape == (1, 1)
+    with pytest.raises(ValueError):
+        batcher.submit(np.zeros((2, 4)))
+
+
+def test_variableLengthRequestsAreGroupedByShape():
+    model = FakeModel((None, 2))
+    batcher = MicroBatcher(model, maxBatchSize=64, maxDelay=0.2)
+    futures = [
+        batcher.submit(np.ones((1, length, 2)))
+        for length in [3, 5, 3, 4]
+    ]
+    results = [future.result(timeout=5) for future in futures]
+    assert [float(result[0, 0]) for result in results] == [6, 10, 6, 8]
+    assert sorted(model.batches) == [(1, 4, 2), (1, 5, 2), (2, 3, 2)]
+
+
+def test_batchIsCutAtMaxBatchSize():
+    model = FakeModel((1,))
+    batcher = MicroBatcher(model, maxBatchSize=4, maxDelay=0.5)
+    startTime = time.perf_counter()
+    futures = [batcher.submit(np.zeros((2, 1))) for _ in range(2)]
+    for future in futures:
+        future.result(timeout=5)
+    assert time.perf_counter() - startTime < 0.4
+    assert model.batches == [(4, 1)]
+
+
+@pytest.fixture
+def server():
+    InferenceHandler.batchers = {
+        'fake': MicroBatcher(FakeModel((2,)), maxDelay=0),
+    }
+    httpServer = InferenceServer(('127.0.0.1', 0), InferenceHandler)
+    thread = threading.Thread(target=httpServer.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(httpServer.server_address[1])
+    httpServer.shutdown()
+    httpServer.server_close()
+    InferenceHandler.batchers = {}
+
+
+def post(url, body):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={'Content-Type': 'application/json'},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, json.load(error)
+
+
+def test_predictEndpoint(server):
+    status, body = post(server + '/predict/fake', {'inputs': [[1, 2]]})
+    assert status == 200
+    assert body == {'outputs': [[3.0]]}
+    assert post(server + '/predict/other', {'inputs': [[1, 2]]})[0] == 404
+
+
+@pytest.mark.parametrize('body', [[1, 2], 'inputs', {'rows': []}, {
+    'inputs': [[1, 2, 3]],
+}])
+def test_badBodiesGet400(server, body):
+    status, response = post(server + '/predict/fake', body)
+    assert status == 400
+    assert 'error' in response
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+from models.jitCompilation import (  # noqa: E402
+    checkJitCompilation,
+    checkJitPredictions,
+    checkJitTraining,
+    checkTolerance,
+    jitPredictor,
+    paddedRowCount,
+    relativeDifference,
+)
+
+
+def denseModel(outputs=2):
+    inputs = tf.keras.Input(shape=(4,))
+    x = tf.keras.layers.Dense(8, activation='relu')(inputs)
+    x = tf.keras.layers.Dropout(0.5)(x)
+    x = tf.keras.layers.Dense(
+        outputs,
+        kernel_regularizer=tf.keras.regularizers.l2(0.01),
+    )(x)
+    return tf.keras.Model(inputs, x)
+
+
+def rows(count, width=4, seed=0):
+    return np.random.default_rng(seed).normal(
+        size=(count, width),
+    ).astype(np.float32)
+
+
+def test_paddedRowCountRoundsUpToPowersOfTwo():
+    assert [paddedRowCount(count) for count in (0, 1, 2, 3, 5, 64, 65)] == [
+        1, 1, 2, 4, 8, 64, 128,
+    ]
+
+
+def test_jitPredictorTrimsPadding():
+    model = denseModel()
+    features = rows(5)
+    predictions = jitPredictor(model)(features)
+    assert predictions.shape == (5, 2)
+    np.testing.assert_allclose(
+        predictions,
+        model(features, training=False).numpy(),
+        rtol=1e-4,
+        atol=1e-5,
+    )
+
+
+def test_emptyValidationDataIsSkipped():
+    model = denseModel()
+    empty = np.zeros((0, 4), dtype=np.float32)
+    assert checkJitPredictions(model, empty) == 0
+    assert checkJitCompilation(model, 'mse', empty, empty) == 0
+
+
+def test_trainingCheckRestoresWeights():
+    model = denseModel()
+    weights = model.get_weights()
+    difference = checkJitTraining(model, 'mse', rows(16), rows(16, 2, 1))
+    assert difference <= 1e-4
+    for before, after in zip(weights, model.get_weights()):
+        np.testing.assert_array_equal(before, after)
+
+
+def test_trainingCheckExpandsScalarLabels():
+    model = denseModel(outputs=1)
+    labels = np.random.default_rng(1).normal(size=16).astype(np.float32)
+    assert checkJitTraining(model, 'mse', rows(16), labels) <= 1e-4
+
+
+def test_trainingCheckDefaultsToReconstruction():
+    model = denseModel(outputs=4)
+    assert checkJitCompilation(model, 'mse', rows(16)) <= 1e-4
+
+
+def test_toleranceIsRelativeToLargeValues():
+    assert relativeDifference([1000.0], [1000.05]) < 1e-4
+    assert relativeDifference([0.0], [0.5]) == 0.5
+    checkTolerance(1e-5, 1e-4, 'predictions')
+    with pytest.raises(ValueError, match='trained models'):
+        checkTolerance(1e-3, 1e-4, 'trained models')
@@ -0,0 +1,74 @@
+import json
+import multiprocessing
+import os
+import memoryProfiler
+from memoryProfiler import (
+    MEMORY_PROFILE_OWNER_VARIABLE,
+    MEMORY_PROFILE_VARIABLE,
+    MemoryProfiler,
+    processReportFile,
+)
+
+
+def profiledChild():
+    profiler = memoryProfiler.memoryProfiler()
+    with profiler.stage('child'):
+        pass
+    return profiler.reportFile
+
+
+def test_ownerKeepsReportFile(monkeypatch):
+    monkeypatch.delenv(MEMORY_PROFILE_OWNER_VARIABLE, raising=False)
+    assert processReportFile('/tmp/report.json') == '/tmp/report.json'
+    assert os.environ[MEMORY_PROFILE_OWNER_VARIABLE] == str(os.getpid())
+
+
+def test_childWritesItsOwnReport(monkeypatch):
+    monkeypatch.setenv(MEMORY_PROFILE_OWNER_VARIABLE, '1')
+    assert processReportFile('/tmp/report.json') == (
+        '/tmp/report.{}.json'.format(os.getpid())
+    )
+
+
+def test_spawnedWorkersDoNotOverwrite(tmp_path, monkeypatch):
+    reportFile = str(tmp_path / 'report.json')
+    monkeypatch.setenv(MEMORY_PROFILE_VARIABLE, reportFile)
+    monkeypatch.setenv(MEMORY_PROFILE_OWNER_VARIABLE, str(os.getpid()))
+    context = multiprocessing.get_context('spawn')
+    pool = context.Pool(2)
+    childReports = [pool.apply_async(profiledChild) for _ in range(2)]
+    childReports = [childReport.get() for childReport in childReports]
+    # workers save again at exit, so let them finish rather than terminate
+    pool.close()
+    pool.join()
+    assert reportFile not in childReports
+    assert not any(name.endswith('.tmp') for name in os.listdir(tmp_path))
+    for childReport in childReports:
+        with open(childReport) as report:
+            assert 'child' in json.load(report)['stages']
+
+
+def test_stageRecordsPeaks(tmp_path):
+    profiler = MemoryProfiler(str(tmp_path / 'report.json'), 10)
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            data = bytearray(1 << 22)
+        del data
+    with open(tmp_path / 'report.json') as report:
+        stages = json.load(report)['stages']
+    assert stages['inner']['calls'] == 1
+    assert stages['inner']['peakTracedBytes'] >= 1 << 22
+    assert stages['outer']['peakTracedBytes'] >= 1 << 22
+    # the buffer outlives inner but is freed before outer ends
+    assert stages['inner']['retainedTracedBytes'] >= 1 << 22
+    assert stages['outer']['retainedTracedBytes'] < 1 << 20
+
+
+def test_saveReplacesTheReportWhole(tmp_path):
+    reportFile = tmp_path / 'report.json'
+    reportFile.write_text('stale')
+    profiler = MemoryProfiler(str(reportFile), 10)
+    with profiler.stage('load'):
+        pass
+    assert 'load' in json.loads(reportFile.read_text())['stages']
+    assert os.listdir(tmp_path) == ['report.json']
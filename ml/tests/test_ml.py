@@ -0,0 +1,92 @@
+import json
+import os
+import subprocess
+import sys
+import ml
+from commandLine import ML_DIRECTORY, mlPath, userPath
+
+ML_SCRIPT = os.path.join(ML_DIRECTORY, 'ml.py')
+
+
+def runMl(arguments, cwd):
+    return subprocess.run(
+        [sys.executable, ML_SCRIPT] + arguments,
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+
+
+def writeReport(fileName, peakRssBytes):
+    with open(fileName, 'w') as reportFile:
+        json.dump({'stages': {'load': {
+            'calls': 1,
+            'seconds': 0.5,
+            'peakTracedBytes': 1 << 20,
+            'retainedTracedBytes': 0,
+            'peakRssBytes': peakRssBytes,
+            'rssGrowthBytes': 0,
+        }}}, reportFile)
+
+
+def test_parseSetting():
+    assert ml.parseSetting('epochs=3') == ('epochs', 3)
+    assert ml.parseSetting('sizes=[8, 16]') == ('sizes', [8, 16])
+    assert ml.parseSetting('name=album') == ('name', 'album')
+    assert ml.parseSetting('path=a=b') == ('path', 'a=b')
+
+
+def test_pathHelpers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert userPath('report.json') == str(tmp_path / 'report.json')
+    assert mlPath('../resources') == os.path.join(
+        os.path.dirname(ML_DIRECTORY),
+        'resources',
+    )
+
+
+def test_relativePathsResolveFromTheCallersDirectory(tmp_path):
+    writeReport(tmp_path / 'report.json', 3 << 20)
+    writeReport(tmp_path / 'baseline.json', 1 << 20)
+    result = runMl(
+        ['memoryProfiler', 'report.json', '--baseline', 'baseline.json'],
+        tmp_path,
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'load' in result.stdout
+    assert '+2.0' in result.stdout
+
+
+def test_setPassesKeywordArguments(tmp_path):
+    missing = str(tmp_path / 'missing.jsonl')
+    result = runMl(
+        ['tasteReport', '--set', 'telemetryLog={}'.format(missing)],
+        tmp_path,
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'no taste learning records in {}'.format(missing) in (
+        result.stdout
+    )
+
+
+def test_timingReportsToStderr(tmp_path):
+    result = runMl(
+        [
+            'tasteReport',
+            '--timing',
+            '--set',
+            'telemetryLog={}'.format(tmp_path / 'missing.jsonl'),
+        ],
+        tmp_path,
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'startup:' in result.stderr
+    assert 'import:' in result.stderr
+    assert 'run:' in result.stderr
+    assert 'startup:' not in result.stdout
+
+
+def test_unknownArgumentsAreRejected(tmp_path):
+    result = runMl(['tasteReport', '--bogus'], tmp_path)
+    assert result.returncode != 0
+    assert 'unrecognized arguments' in result.stderr
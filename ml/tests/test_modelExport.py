@@ -0,0 +1,176 @@
+import os
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+pytest.importorskip('tensorflowjs')
+import modelExport  # noqa: E402
+from modelExport import (  # noqa: E402
+    exportModels,
+    loadSharedModel,
+    pruneWeights,
+    quantizeArray,
+    quantizedCopy,
+    saveSharedModels,
+)
+
+
+def denseModel(seed=0):
+    tf.random.set_seed(seed)
+    inputs = tf.keras.Input(shape=(6,))
+    x = tf.keras.layers.Dense(8, activation='relu')(inputs)
+    x = tf.keras.layers.Dense(3)(x)
+    model = tf.keras.Model(inputs, x)
+    # non-zero biases show that pruning leaves them alone
+    model.set_weights([
+        weight + 0.5 if weight.ndim == 1 else weight
+        for weight in model.get_weights()
+    ])
+    return model
+
+
+def evaluationRows(seed=0):
+    generator = np.random.default_rng(seed)
+    return (
+        generator.normal(size=(20, 6)).astype(np.float32),
+        generator.normal(size=(20, 3)).astype(np.float32),
+    )
+
+
+def test_pruneWeightsZeroesSmallKernelEntries():
+    model = denseModel()
+    before = model.get_weights()
+    pruneWeights(model, 0.5)
+    for original, pruned in zip(before, model.get_weights()):
+        if original.ndim == 1:
+            np.testing.assert_array_equal(pruned, original)
+            continue
+        zeroed = pruned == 0
+        assert np.isclose(zeroed.mean(), 0.5, atol=0.1)
+        largest = np.abs(original[zeroed]).max()
+        assert largest <= np.abs(original[~zeroed]).min()
+        np.testing.assert_array_equal(pruned[~zeroed], original[~zeroed])
+
+
+def test_pruneWeightsNothingAtZero():
+    model = denseModel()
+    before = model.get_weights()
+    pruneWeights(model, 0)
+    for original, pruned in zip(before, model.get_weights()):
+        np.testing.assert_array_equal(pruned, original)
+
+
+def test_quantizeArray():
+    weight = np.random.default_rng(0).normal(size=(40, 30)).astype(
+        np.float32,
+    )
+    assert quantizeArray(weight, None) is weight
+    np.testing.assert_allclose(
+        quantizeArray(weight, 'float16'),
+        weight,
+        rtol=1e-3,
+    )
+    quantized = quantizeArray(weight, 'uint8')
+    assert quantized.dtype == np.float32
+    assert len(np.unique(quantized)) <= 256
+    step = (weight.max() - weight.min()) / 255
+    assert np.abs(quantized - weight).max() <= step / 2 + 1e-6
+    constant = np.full((3, 3), 2.0, dtype=np.float32)
+    np.testing.assert_array_equal(quantizeArray(constant, 'uint8'), constant)
+
+
+def test_quantizedCopyLeavesTheOriginal():
+    model = denseModel()
+    before = model.get_weights()
+    copy = quantizedCopy(model, 'uint8')
+    for original, kept, quantized in zip(
+        before,
+        model.get_weights(),
+        copy.get_weights(),
+    ):
+        np.testing.assert_array_equal(kept, original)
+        np.testing.assert_array_equal(
+            quantized,
+            quantizeArray(original, 'uint8'),
+        )
+
+
+def test_exportReport(tmp_path):
+    model = denseModel()
+    features, labels = evaluationRows()
+    expectedError = float(np.mean(
+        (model.predict(features, verbose=0) - labels) ** 2,
+    ))
+    savePath = str(tmp_path / 'dense')
+    report = exportModels(
+        {savePath: model},
+        quantization='uint8',
+        evaluationModel=model,
+        evaluationFeatures=features,
+        evaluationLabels=labels,
+        verbose=0,
+    )
+    assert report['quantization'] == 'uint8'
+    assert np.isclose(report['error'], expectedError, rtol=1e-5)
+    assert np.isclose(report['compressedError'], report['error'], rtol=0.1)
+    artifact = report['artifacts'][savePath]
+    assert artifact['bytes'] > 0
+    assert artifact['loadSeconds'] >= 0
+    assert (tmp_path / 'dense' / 'model.json').is_file()
+
+
+def test_exportRejectsUnknownQuantization(tmp_path):
+    with pytest.raises(ValueError):
+        exportModels({str(tmp_path): denseModel()}, quantization='int4')
+
+
+def autoencoderTriple():
+    inputs = tf.keras.Input(shape=(6,))
+    encoding = tf.keras.layers.Dense(2, activation='tanh')
+    decoding = tf.keras.layers.Dense(6)
+    auto = tf.keras.Model(inputs, decoding(encoding(inputs)))
+    codes = tf.keras.Input(shape=(2,))
+    return auto, tf.keras.Model(inputs, encoding(inputs)), tf.keras.Model(
+        codes,
+        decoding(codes),
+    )
+
+
+def test_sharedModelsRoundTrip(tmp_path, monkeypatch):
+    writes = []
+    writeWeights = modelExport.tfjs.write_weights.write_weights
+
+    def countedWrite(groups, directory, **kwargs):
+        writes.append(directory)
+        return writeWeights(groups, directory, **kwargs)
+
+    monkeypatch.setattr(
+        modelExport.tfjs.write_weights,
+        'write_weights',
+        countedWrite,
+    )
+    auto, encoder, decoder = autoencoderTriple()
+    models = {
+        str(tmp_path / 'auto'): auto,
+        str(tmp_path / 'encoder'): encoder,
+        str(tmp_path / 'decoder'): decoder,
+    }
+    sharedDirectory = saveSharedModels(models)
+
+    # the encoder and decoder layers live inside the autoencoder, so each
+    # of the two shards is written once
+    assert sharedDirectory == str(tmp_path / 'shared')
+    assert len(writes) == len(set(writes)) == 2
+    assert sorted(writes) == sorted(
+        str(tmp_path / 'shared' / key) for key in os.listdir(sharedDirectory)
+    )
+    for savePath, model in models.items():
+        assert not any(
+            filename.endswith('.bin') for filename in os.listdir(savePath)
+        )
+        loaded = loadSharedModel(savePath)
+        for original, restored in zip(
+            model.get_weights(),
+            loaded.get_weights(),
+        ):
+            np.testing.assert_array_equal(original, restored)
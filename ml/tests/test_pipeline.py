@@ -0,0 +1,81 @@
+import os
+import pipeline
+
+
+def writeModules(directory, modules):
+    for fileName, source in modules.items():
+        path = directory / fileName
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+
+
+def test_localModulesFollowsImports(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, 'ML_DIRECTORY', str(tmp_path))
+    writeModules(tmp_path, {
+        'stage.py': 'import numpy\nfrom helpers import load\n',
+        'helpers.py': 'def load():\n    from models.net import net\n',
+        'models/net.py': 'import models.layers\n',
+        'models/layers.py': 'import os\n',
+        'unused.py': '',
+    })
+    assert pipeline.localModules('stage.py') == [
+        'helpers.py',
+        'models/layers.py',
+        'models/net.py',
+        'stage.py',
+    ]
+
+
+def test_importedModuleChangeInvalidatesStage(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, 'ML_DIRECTORY', str(tmp_path))
+    writeModules(tmp_path, {
+        'stage.py': 'from models.net import net\n',
+        'models/net.py': 'units = 1\n',
+    })
+    stage = {'name': 'stage', 'inputs': [], 'outputs': []}
+    before = pipeline.hashPaths(pipeline.stageInputs(stage))
+    assert pipeline.hashPaths(pipeline.stageInputs(stage)) == before
+    (tmp_path / 'models' / 'net.py').write_text('units = 2\n')
+    assert pipeline.hashPaths(pipeline.stageInputs(stage)) != before
+
+
+def test_hashPathsDirectoryContents(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, 'ML_DIRECTORY', str(tmp_path))
+    writeModules(tmp_path, {'data/a.csv': '1\n', 'data/b.csv': '2\n'})
+    before = pipeline.hashPaths(['data/*'])
+    (tmp_path / 'data' / 'b.csv').write_text('3\n')
+    assert pipeline.hashPaths(['data/*']) != before
+    assert pipeline.hashPaths(['missing/']) != pipeline.hashPaths(['data/'])
+
+
+def test_overlaps():
+    assert pipeline.overlaps('../a/b/', '../a/')
+    assert pipeline.overlaps('../a/*', '../a/b/c')
+    assert not pipeline.overlaps('../a/b', '../a/bc')
+
+
+def test_selectStagesIncludesUpstream():
+    selected = pipeline.selectStages(['albumEncoder'])
+    assert selected == [
+        'trackEncoder',
+        'albumTracksEncoder',
+        'albumEncoder',
+    ]
+    assert pipeline.selectStages(None) == [
+        stage['name'] for stage in pipeline.STAGES
+    ]
+
+
+def test_sharedWeightDirectoriesAreOutputs():
+    # saveSharedModels writes shards next to the models it exports
+    for stage in pipeline.STAGES:
+        models = [
+            pipeline.resolvePath(path) for path in stage['outputs']
+            if path.rstrip('/').endswith(('auto', 'encoder', 'decoder'))
+        ]
+        if not models:
+            continue
+        shared = os.path.join(os.path.commonpath(models), 'shared')
+        assert shared in [
+            pipeline.resolvePath(path) for path in stage['outputs']
+        ]
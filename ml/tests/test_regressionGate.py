@@ -0,0 +1,143 @@
+import json
+import numpy as np
+import regressionGate
+from regressionGate import (
+    baselineFile,
+    compareMetric,
+    compareSuites,
+    machineKey,
+    ratioInterval,
+    relativeSpread,
+)
+
+MEGABYTE = 1 << 20
+
+
+def suite(results):
+    return {
+        'results': {
+            name: [
+                {'samplesPerSecond': throughput, 'peakRssBytes': memory}
+                for throughput, memory in runs
+            ]
+            for name, runs in results.items()
+        },
+    }
+
+
+def test_machineKey():
+    key = machineKey({
+        'node': 'my host',
+        'machine': 'x86_64',
+        'cpus': 8,
+        'python': '3.11.4',
+    })
+    assert key == 'my_host_x86_64_8cpu_py3.11.4'
+
+
+def test_ratioIntervalCoversRatio():
+    ratio, low, high = ratioInterval([10, 11, 9, 10], [20, 21, 19, 20])
+    assert ratio == 2
+    assert low <= ratio <= high
+
+
+def test_relativeSpread():
+    assert relativeSpread([9, 10, 11]) == 0.2
+
+
+def test_narrowIntervalInsideToleranceIsUnchanged():
+    # tight repeats from two sessions can differ by more than the interval
+    result = compareMetric(
+        [100 * MEGABYTE] * 4,
+        [107 * MEGABYTE] * 4,
+        largerIsBetter=False,
+        tolerance=0.10,
+    )
+    assert result['interval'][0] > 1.05
+    assert result['verdict'] == 'unchanged'
+
+
+def test_smallAbsoluteMemoryChangeIsUnchanged():
+    result = compareMetric(
+        [100 * MEGABYTE] * 4,
+        [128 * MEGABYTE] * 4,
+        largerIsBetter=False,
+        tolerance=0.10,
+        absoluteFloor=64 * MEGABYTE,
+    )
+    assert result['verdict'] == 'unchanged'
+
+
+def test_baselineSpreadWidensThreshold():
+    result = compareMetric([80, 100, 120], [75, 78, 76], largerIsBetter=True)
+    assert result['threshold'] == 0.4
+    assert result['verdict'] == 'unchanged'
+
+
+def test_clearChangesAreFlagged():
+    assert compareMetric(
+        [100, 101, 99, 100],
+        [70, 71, 69, 70],
+        largerIsBetter=True,
+        tolerance=0.10,
+    )['verdict'] == 'regression'
+    assert compareMetric(
+        [100, 101, 99, 100],
+        [150, 151, 149, 150],
+        largerIsBetter=True,
+        tolerance=0.10,
+    )['verdict'] == 'improvement'
+
+
+def test_compareSuitesSkipsUnbaselined():
+    generator = np.random.default_rng(0)
+    baseline = suite({
+        'load': [(100 + generator.normal(), 500 * MEGABYTE)] * 5,
+    })
+    current = suite({
+        'load': [(100 + generator.normal(), 900 * MEGABYTE)] * 5,
+        'new': [(1, 1)] * 5,
+    })
+    comparisons = compareSuites(baseline, current)
+    assert set(comparisons) == {'load'}
+    assert comparisons['load']['throughput']['verdict'] == 'unchanged'
+    assert comparisons['load']['peakMemory']['verdict'] == 'regression'
+
+
+def test_toleranceBelowTheDefaultTakesEffect():
+    baseline, current = [100, 100.5, 99.5, 100], [93, 93.5, 92.5, 93]
+    assert compareMetric(
+        baseline,
+        current,
+        largerIsBetter=True,
+    )['verdict'] == 'unchanged'
+    result = compareMetric(baseline, current, True, tolerance=0.02)
+    assert result['threshold'] == 0.02
+    assert result['verdict'] == 'regression'
+
+
+def test_sizeMismatchIsAnErrorVerdict(tmp_path, monkeypatch, capsys):
+    machine = {'node': 'host', 'machine': 'x86_64', 'cpus': 2, 'python': '3'}
+    current = dict(
+        suite({'load': [(100, MEGABYTE)] * 3}),
+        machine=machine,
+        sizes={'tracks': 20},
+    )
+    baseline = dict(current, sizes={'tracks': 10})
+    with open(baselineFile(str(tmp_path), machine, 'small'), 'w') as output:
+        json.dump(baseline, output)
+    monkeypatch.setattr(
+        regressionGate.benchmark,
+        'runSuite',
+        lambda *args: current,
+    )
+    outputFile = tmp_path / 'verdict.json'
+    exitCode = regressionGate.main(
+        baselineDirectory=str(tmp_path),
+        output=str(outputFile),
+    )
+    verdict = json.loads(outputFile.read_text())
+    assert exitCode == 2
+    assert verdict['status'] == 'error'
+    assert 'differ' in verdict['error']
+    assert json.loads(capsys.readouterr().out) == verdict
@@ -0,0 +1,45 @@
+from os import listdir
+import numpy as np
+import syntheticData
+from dataHelpers import fromCsvFiles
+
+SIZES = {
+    'tracks': 30,
+    'albums': 12,
+    'artists': 8,
+    'profiles': 6,
+    'reviewsPerProfile': 20,
+}
+
+
+def test_generateWritesRequestedSizes(tmp_path):
+    sizes = syntheticData.generate(str(tmp_path), **SIZES)
+    assert sizes == SIZES
+    tracks = np.genfromtxt(
+        tmp_path / 'track' / 'all.csv',
+        delimiter=',',
+        skip_header=1,
+    )
+    assert tracks.shape == (30, len(syntheticData.TRACK_FIELDS))
+    assert len(listdir(tmp_path / 'profile' / 'reviews')) == 6
+    train, _, _ = fromCsvFiles(str(tmp_path / 'album'), 0, 0, skipHeader=0)
+    assert len(train) == 12
+
+
+def test_smallerRunRemovesStaleFiles(tmp_path):
+    syntheticData.generate(str(tmp_path), **SIZES)
+    smaller = dict(SIZES, albums=5, artists=3, profiles=2)
+    syntheticData.generate(str(tmp_path), **smaller)
+    train, _, _ = fromCsvFiles(str(tmp_path / 'album'), 0, 0, skipHeader=0)
+    assert len(train) == 5
+    assert len(listdir(tmp_path / 'profile' / 'reviews')) == 2
+    assert len(listdir(tmp_path / 'profile' / 'taste' / 'all')) == 2
+
+
+def test_seedChangeRegenerates(tmp_path):
+    syntheticData.generate(str(tmp_path), seed=0, **SIZES)
+    first = (tmp_path / 'track' / 'all.csv').read_text()
+    syntheticData.generate(str(tmp_path), seed=0, **SIZES)
+    assert (tmp_path / 'track' / 'all.csv').read_text() == first
+    syntheticData.generate(str(tmp_path), seed=1, **SIZES)
+    assert (tmp_path / 'track' / 'all.csv').read_text() != first
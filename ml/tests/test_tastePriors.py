@@ -0,0 +1,73 @@
+import os
+import numpy as np
+import pytest
+from tasteNormalizer import tastePrior
+
+
+def writeTaste(directory, bucket, filename, taste):
+    bucketDirectory = directory / bucket
+    bucketDirectory.mkdir(parents=True, exist_ok=True)
+    np.savetxt(bucketDirectory / filename, [taste], delimiter=',')
+
+
+def test_tastePriorAveragesBuckets(tmp_path):
+    writeTaste(tmp_path, '1', 'a.csv', [1.0, 2.0])
+    writeTaste(tmp_path, '2', 'b.csv', [3.0, 4.0])
+    writeTaste(tmp_path, '3', 'c.csv', [9.0, 9.0])
+    np.testing.assert_allclose(
+        tastePrior(['1', '2', '4'], str(tmp_path)),
+        [2.0, 3.0],
+    )
+    assert tastePrior(['5'], str(tmp_path)) is None
+
+
+@pytest.fixture
+def tasteLearner(tmp_path, monkeypatch):
+    pytest.importorskip('tensorflow')
+    import tasteLearner
+    reviews = tmp_path / 'reviews'
+    reviews.mkdir()
+    monkeypatch.setattr(tasteLearner, 'PROFILE_REVIEWS_PATH', str(reviews))
+    monkeypatch.setattr(
+        tasteLearner,
+        'ALL_SAVE_PATH',
+        str(tmp_path / 'taste' / 'all'),
+    )
+    monkeypatch.setattr(
+        tasteLearner,
+        'BASE_SAVE_PATH',
+        str(tmp_path / 'taste'),
+    )
+    monkeypatch.setattr(tasteLearner, 'BUCKETS', [
+        (maeCap, str(tmp_path / 'taste' / str(bucket + 1)))
+        for bucket, (maeCap, _) in enumerate(tasteLearner.BUCKETS)
+    ])
+    monkeypatch.setattr(
+        tasteLearner,
+        'BUCKET_6_SAVE_PATH',
+        str(tmp_path / 'taste' / '6'),
+    )
+    return tasteLearner
+
+
+def test_updatedReviewsAreRelearnedWithBucketPrior(tmp_path, tasteLearner):
+    (tmp_path / 'reviews' / 'p.csv').write_text('1,0.5\n')
+    assert tasteLearner.needsLearning('p.csv')
+
+    writeTaste(tmp_path / 'taste', 'all', 'p.csv', [0.1])
+    writeTaste(tmp_path / 'taste', '2', 'p.csv', [0.1])
+    writeTaste(tmp_path / 'taste', '2', 'q.csv', [0.3])
+    assert not tasteLearner.needsLearning('p.csv', relearnUpdated=True)
+
+    later = os.path.getmtime(tmp_path / 'taste' / 'all' / 'p.csv') + 10
+    os.utime(tmp_path / 'reviews' / 'p.csv', (later, later))
+    assert not tasteLearner.needsLearning('p.csv')
+    assert tasteLearner.needsLearning('p.csv', relearnUpdated=True)
+
+    priors = tasteLearner.loadPriors('bucket')
+    weights, mode = tasteLearner.profilePrior('p.csv', priors)
+    assert mode == 'bucket'
+    np.testing.assert_allclose(weights, [0.2])
+    weights, mode = tasteLearner.profilePrior('new.csv', priors)
+    assert mode == 'population'
+    assert tasteLearner.profilePrior('p.csv', {}) == (None, 'cold')
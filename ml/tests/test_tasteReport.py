@@ -0,0 +1,40 @@
+import json
+import tasteReport
+
+
+def test_missingLogPrintsNoRecords(tmp_path, capsys):
+    telemetryLog = tmp_path / 'missing.jsonl'
+    tasteReport.main(str(telemetryLog))
+    assert 'no taste learning records' in capsys.readouterr().out
+
+
+def test_trainingReviewCountMatchesLearnerSplit():
+    assert tasteReport.trainingReviewCount(9) == 9
+    assert tasteReport.trainingReviewCount(100) == 90
+    assert tasteReport.trainingReviewCount(105) == 95
+
+
+def test_etaUsesTrainingReviews(tmp_path, monkeypatch, capsys):
+    reviews = tmp_path / 'reviews'
+    learned = tmp_path / 'all'
+    reviews.mkdir()
+    learned.mkdir()
+    (reviews / 'done.csv').write_text('1,2\n' * 100)
+    (learned / 'done.csv').write_text('0.1\n')
+    (reviews / 'todo.csv').write_text('1,2\n' * 100)
+    monkeypatch.setattr(tasteReport, 'PROFILE_REVIEWS_PATH', str(reviews))
+    monkeypatch.setattr(tasteReport, 'ALL_SAVE_PATH', str(learned))
+
+    telemetryLog = tmp_path / 'telemetry.jsonl'
+    telemetryLog.write_text(json.dumps({
+        'profile': 'done.csv',
+        'reviews': 90,
+        'epochs': 10,
+        'learningRate': 0.002,
+        'wallSeconds': 3600,
+        'mae': 0.1,
+        'bucket': 2,
+    }) + '\n')
+    tasteReport.main(str(telemetryLog))
+    # the remaining profile is the same size, so it takes the same hour
+    assert '1 profiles remaining, ETA 1.0h' in capsys.readouterr().out
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+from dataHelpers import readJsonLines  # noqa: E402
+from models.trainingTimer import TrainingTimer  # noqa: E402
+from models.variableEpochPerceptron import (  # noqa: E402
+    variableEpochPerceptron,
+)
+
+EPOCH_FIELDS = {
+    'type',
+    'builder',
+    'epoch',
+    'wallSeconds',
+    'epochSeconds',
+    'validationSeconds',
+    'overheadSeconds',
+    'samplesPerSecond',
+    'retraces',
+    'loss',
+}
+RUN_FIELDS = {
+    'type',
+    'builder',
+    'epochs',
+    'sampleCount',
+    'wallSeconds',
+    'epochSeconds',
+    'validationSeconds',
+    'overheadSeconds',
+    'samplesPerSecond',
+    'retraces',
+}
+
+
+def regressionRows(count=64, seed=0):
+    generator = np.random.default_rng(seed)
+    features = generator.normal(size=(count, 4)).astype(np.float32)
+    return features, features.sum(axis=1)
+
+
+def test_timerLogsEpochsAndRun(tmp_path):
+    timingLog = str(tmp_path / 'timing.jsonl')
+    features, labels = regressionRows()
+    inputs = tf.keras.Input(shape=(4,))
+    model = tf.keras.Model(inputs, tf.keras.layers.Dense(1)(inputs))
+    model.compile(optimizer='sgd', loss='mse')
+    timer = TrainingTimer('dense', len(features), timingLog)
+    model.fit(
+        features,
+        labels,
+        batch_size=16,
+        epochs=3,
+        validation_data=regressionRows(32, 1),
+        verbose=0,
+        callbacks=timer.callbacks(),
+    )
+    timer.finish()
+
+    records = readJsonLines(timingLog)
+    epochs = [record for record in records if record['type'] == 'epoch']
+    run, = [record for record in records if record['type'] == 'run']
+    assert [record['epoch'] for record in epochs] == [1, 2, 3]
+    for record in epochs:
+        assert set(record) == EPOCH_FIELDS
+        assert record['builder'] == 'dense'
+        assert record['validationSeconds'] > 0
+        # throughput counts training time only, not validation
+        assert np.isclose(
+            record['samplesPerSecond'],
+            len(features) / record['epochSeconds'],
+        )
+        assert record['wallSeconds'] >= (
+            record['epochSeconds'] + record['validationSeconds']
+        )
+    assert set(run) == RUN_FIELDS
+    assert run['epochs'] == 3
+    assert run['sampleCount'] == len(features)
+    assert np.isclose(
+        run['epochSeconds'],
+        sum(record['epochSeconds'] for record in epochs),
+    )
+    assert np.isclose(
+        run['validationSeconds'],
+        sum(record['validationSeconds'] for record in epochs),
+    )
+    assert np.isclose(
+        run['samplesPerSecond'],
+        len(features) * 3 / run['epochSeconds'],
+    )
+    assert run['retraces'] >= 1
+    assert run['retraces'] == epochs[-1]['retraces']
+
+
+def test_timerWithoutLogAddsNoCallback(monkeypatch):
+    monkeypatch.delenv('MUCRITIC_TIMING_LOG', raising=False)
+    timer = TrainingTimer('dense', 10)
+    assert timer.callbacks() == []
+    timer.finish()
+
+
+def test_perceptronRunSpansEveryFit(tmp_path):
+    timingLog = str(tmp_path / 'timing.jsonl')
+    features, labels = regressionRows()
+    validationFeatures, validationLabels = regressionRows(16, 1)
+    learningRates = [0.02, 0.2]
+    variableEpochPerceptron(
+        features,
+        labels,
+        validationFeatures,
+        validationLabels,
+        staleEpochsAllowed=2,
+        batchSize=16,
+        learningRates=learningRates,
+        timingLog=timingLog,
+    )
+
+    records = readJsonLines(timingLog)
+    epochs = [record for record in records if record['type'] == 'epoch']
+    run, = [record for record in records if record['type'] == 'run']
+    # one timer spans every short fit, so epochs keep counting up
+    assert [record['epoch'] for record in epochs] == list(
+        range(1, len(epochs) + 1),
+    )
+    assert run['epochs'] == len(epochs)
+    assert run['builder'] == 'variableEpochPerceptron'
+    # each learning rate recompiles, which traces a new train function
+    assert run['retraces'] >= len(learningRates)
+    assert all(record['validationSeconds'] > 0 for record in epochs)